@@ -0,0 +1,141 @@
+import threading
+from datetime import datetime, timedelta
+
+import database
+
+
+# Per-wallet transfer rollups. Every transfer block adds one to the sender's
+# and the receiver's count in the hour and day of its (local) timestamp,
+# plus its amount to the receiver's inflow and the sender's outflow. The
+# tables are keyed (wallet, bucket), so an N-bucket series is one range scan.
+HOURLY = "hourly"
+DAILY = "daily"
+_BUCKET_CHARS = {HOURLY: 13, DAILY: 10}  # "YYYY-MM-DD HH" / "YYYY-MM-DD"
+_STEP = {HOURLY: timedelta(hours=1), DAILY: timedelta(days=1)}
+_FORMAT = {HOURLY: "%Y-%m-%d %H", DAILY: "%Y-%m-%d"}
+WRITE_BATCH = 50_000
+# Appends are buffered and written this many blocks at a time (and before
+# any read). The stored height moves with the buckets, so blocks lost from
+# the buffer in a crash are simply rolled up again by the next sync.
+FLUSH_EVERY = 64
+
+
+def _transfer(data: str):
+    """(from, to, amount) of a transfer block's data, or None."""
+    fields = {}
+    for part in (data or "").split("|"):
+        key, sep, value = part.partition("=")
+        if sep:
+            fields[key.strip()] = value.strip()
+    try:
+        return fields["From"], fields["To"], float(fields["Amount"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _add(buckets, timestamp, data):
+    tx = _transfer(data)
+    if tx is None:
+        return
+    sender, receiver, amount = tx
+    for granularity, chars in _BUCKET_CHARS.items():
+        bucket = timestamp[:chars]
+        out = buckets.setdefault((granularity, sender, bucket), [0, 0.0, 0.0])
+        out[0] += 1
+        out[2] += amount
+        if receiver != sender:
+            inc = buckets.setdefault((granularity, receiver, bucket), [0, 0.0, 0.0])
+            inc[0] += 1
+        else:
+            inc = out
+        inc[1] += amount
+
+
+class ActivityRollup:
+    """Hourly and daily activity per wallet, kept in step with the chain."""
+
+    def __init__(self):
+        self.height = 0
+        self.tail_hash = None
+        self._pending = {}
+        self._unflushed = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        rollup = cls()
+        rollup.height, rollup.tail_hash = database.get_activity_state()
+        return rollup
+
+    def _push(self, index, timestamp, data, block_hash):
+        if index != self.height:
+            raise ValueError(f"expected block {self.height}, got block {index}")
+        _add(self._pending, timestamp, data)
+        self.height = index + 1
+        self.tail_hash = block_hash
+        self._unflushed += 1
+
+    def _flush(self):
+        if self._unflushed:
+            database.apply_activity(self._pending, self.height, self.tail_hash)
+            self._pending = {}
+            self._unflushed = 0
+
+    def append(self, index, timestamp, data, block_hash):
+        with self._lock:
+            self._push(index, timestamp, data, block_hash)
+            if self._unflushed >= FLUSH_EVERY:
+                self._flush()
+
+    def extend(self, rows):
+        """Roll up (index, timestamp, data, hash) rows that follow the current height."""
+        with self._lock:
+            for row in rows:
+                self._push(*row)
+                if self._unflushed >= WRITE_BATCH:
+                    self._flush()
+            self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def reset(self):
+        with self._lock:
+            database.clear_activity()
+            self.height = 0
+            self.tail_hash = None
+            self._pending = {}
+            self._unflushed = 0
+
+    def sync(self, height, hash_at, rows_from):
+        """
+        Catch up with a chain of `height` blocks. `hash_at(i)` returns block
+        i's hash and `rows_from(i)` yields rows from block i on. Rollups built
+        from a longer or different chain are rebuilt.
+        """
+        if self.height > height or (self.height and hash_at(self.height - 1) != self.tail_hash):
+            self.reset()
+        if self.height < height:
+            self.extend(rows_from(self.height))
+
+    def series(self, wallet, count=7, granularity=DAILY, end=None):
+        """
+        The last `count` buckets up to and including the one holding `end`
+        (default now), oldest first, with empty buckets filled in.
+        """
+        fmt, step = _FORMAT[granularity], _STEP[granularity]
+        end = datetime.strptime((end or datetime.now()).strftime(fmt), fmt)
+        labels = [(end - step * k).strftime(fmt) for k in range(count - 1, -1, -1)]
+        if not labels:
+            return []
+        self.flush()
+        found = {
+            bucket: (tx_count, inflow, outflow)
+            for bucket, tx_count, inflow, outflow in database.get_activity(granularity, wallet, labels[0], labels[-1])
+        }
+        out = []
+        for label in labels:
+            tx_count, inflow, outflow = found.get(label, (0, 0.0, 0.0))
+            out.append({"bucket": label, "count": tx_count, "inflow": inflow, "outflow": outflow})
+        return out
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_MAX_CONCURRENT = 2
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_QUEUE_TIMEOUT = 2.0
+RATE_ENV_VAR = "SVWEN_TRANSFER_RATE"
+# Idle buckets are dropped once there are this many.
+MAX_BUCKETS = 10_000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """`rate` tokens a second, holding at most `burst`; starts full."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now) -> bool:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1.0)
+
+    def wait_time(self) -> float:
+        return (1.0 - self.tokens) / self.rate
+
+    def full(self, now) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class AdmissionController:
+    """
+    Gate in front of the transfer path. Each user may start `rate`
+    transfers a second (bursts of up to `burst`) when a rate is set; at
+    most `max_concurrent` transfers run at once and up to `max_queue` more
+    wait, each for at most `queue_timeout` seconds. Anything beyond that is
+    rejected at once instead of queueing on SQLite's write lock, which keeps
+    the latency of the admitted transfers bounded under overload.
+    """
+
+    def __init__(self):
+        self.rate = None
+        self.burst = None
+        self.max_concurrent = DEFAULT_MAX_CONCURRENT
+        self.max_queue = DEFAULT_MAX_QUEUE
+        self.queue_timeout = DEFAULT_QUEUE_TIMEOUT
+        self.running = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected_rate = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self._buckets = {}
+        self._cond = threading.Condition()
+
+    def configure(self, rate=None, burst=None, max_concurrent=None, max_queue=None, queue_timeout=None):
+        """Change the limits; a rate of 0 turns per-user limiting off."""
+        with self._cond:
+            if rate is not None:
+                rate = float(rate)
+                if rate < 0:
+                    raise ValueError("rate must be >= 0")
+                self.rate = rate or None
+                self._buckets.clear()
+            if burst is not None:
+                burst = float(burst)
+                if burst < 1:
+                    raise ValueError("burst must be >= 1")
+                self.burst = burst
+                self._buckets.clear()
+            if max_concurrent is not None:
+                if int(max_concurrent) < 1:
+                    raise ValueError("max_concurrent must be >= 1")
+                self.max_concurrent = int(max_concurrent)
+                self._cond.notify_all()
+            if max_queue is not None:
+                self.max_queue = max(0, int(max_queue))
+            if queue_timeout is not None:
+                self.queue_timeout = max(0.0, float(queue_timeout))
+        return self.status()
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "rate": self.rate,
+                "burst": self._burst(),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "running": self.running,
+                "queue_depth": self.waiting,
+                "peak_queue_depth": self.peak_waiting,
+                "admitted": self.admitted,
+                "rejected_rate_limited": self.rejected_rate,
+                "rejected_queue_full": self.rejected_full,
+                "rejected_queue_timeout": self.rejected_timeout,
+            }
+
+    def _burst(self):
+        if self.rate is None:
+            return None
+        return self.burst if self.burst is not None else max(1.0, self.rate)
+
+    def _check_rate(self, user_id, now):
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                for idle in [k for k, b in self._buckets.items() if b.full(now)]:
+                    del self._buckets[idle]
+            bucket = self._buckets[user_id] = TokenBucket(self.rate, self._burst(), now)
+        if not bucket.take(now):
+            self.rejected_rate += 1
+            raise AdmissionRejected("Rate limit exceeded", retry_after=round(bucket.wait_time(), 3))
+        return bucket
+
+    def _acquire(self, user_id):
+        now = time.monotonic()
+        with self._cond:
+            bucket = self._check_rate(user_id, now) if self.rate is not None else None
+            try:
+                self._wait_for_slot(now)
+            except AdmissionRejected:
+                # Turned away for load, not for this user's rate: give the token back.
+                if bucket is not None and self._buckets.get(user_id) is bucket:
+                    bucket.refund()
+                raise
+            self.running += 1
+            self.admitted += 1
+
+    def _wait_for_slot(self, now):
+        """Wait, with _cond held, until a slot is free; raises AdmissionRejected if the queue is full or too slow."""
+        if self.running >= self.max_concurrent:
+            if self.waiting >= self.max_queue:
+                self.rejected_full += 1
+                raise AdmissionRejected("Server busy, try again later")
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            deadline = now + self.queue_timeout
+            try:
+                while self.running >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        raise AdmissionRejected("Server busy, try again later")
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+    def _release(self):
+        with self._cond:
+            self.running -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, user_id):
+        """Hold one transfer slot for `user_id`; raises AdmissionRejected instead of waiting too long."""
+        self._acquire(user_id)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+def admission_from_env():
+    """A controller with the per-user rate from SVWEN_TRANSFER_RATE ("rate" or "rate:burst"), if set."""
+    controller = AdmissionController()
+    spec = os.environ.get(RATE_ENV_VAR, "").strip()
+    if spec:
+        rate, _, burst = spec.partition(":")
+        controller.configure(rate=float(rate), burst=float(burst) if burst else None)
+    return controller
@@ -0,0 +1,303 @@
+import argparse
+import json
+import sys
+import threading
+from array import array
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; every query has a plain-Python path.
+    np = None
+
+import database
+from blockchain import Block
+
+
+_EPOCH = datetime(1970, 1, 1)
+QUERIES = ("top_counterparties", "volume_per_hour", "largest_transfers", "concentration")
+
+
+def _time_label(epoch, fmt="%Y-%m-%d %H:%M:%S"):
+    return (_EPOCH + timedelta(seconds=int(epoch))).strftime(fmt)
+
+
+def _largest(values, limit):
+    """Positions of the `limit` largest values, largest first; ties go to the earlier position."""
+    limit = min(int(limit), len(values))
+    if limit <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = np.partition(values, len(values) - limit)[len(values) - limit]
+    above = np.flatnonzero(values > kth)
+    ties = np.flatnonzero(values == kth)[: limit - len(above)]
+    picked = np.concatenate((above, ties))
+    return picked[np.lexsort((picked, -values[picked]))]
+
+
+class LedgerAnalytics:
+    """
+    Column store of the chain's transfers for aggregate queries: block
+    index, epoch time, amount and sender/receiver ids, one typed array per
+    column, with wallets numbered in first-seen order. sync() appends only
+    the blocks added since the previous call. With NumPy, queries run
+    vectorised over zero-copy views of the columns; without it they loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.index = array("q")
+        self.time = array("q")
+        self.amount = array("d")
+        self.src = array("i")
+        self.dst = array("i")
+        self.wallets = []
+        self._ids = {}
+        self._head = None
+        self._last = None
+
+    def __len__(self):
+        return len(self.amount)
+
+    @classmethod
+    def from_database(cls, since=None, until=None):
+        """Columns for the stored blocks, for use without a loaded ledger; bounds read only that range."""
+        analytics = cls()
+        rows = database.iter_blocks() if since is None and until is None else database.iter_blocks_between(since, until)
+        for row in rows:
+            analytics._add(Block.from_stored(*row))
+        return analytics
+
+    def sync(self, chain):
+        """Append the blocks `chain` gained since the last sync; rebuild if it was reloaded."""
+        with self._lock:
+            if chain.head is not self._head or (self._last is not None and chain.height <= self._last.index):
+                self._reset()
+                self._head = chain.head
+            node = chain.head if self._last is None else self._last.next
+            while node is not None:
+                self._add(node)
+                self._last = node
+                node = node.next
+        return len(self)
+
+    def _wallet_id(self, wallet):
+        ident = self._ids.get(wallet)
+        if ident is None:
+            ident = self._ids[wallet] = len(self.wallets)
+            self.wallets.append(wallet)
+        return ident
+
+    def _add(self, block):
+        tx = block.transfer()
+        if tx is None:
+            return
+        sender, receiver, amount, tx_time = tx
+        epoch = block.epoch if block.epoch is not None else tx_time
+        try:
+            amount = float(amount)
+        except ValueError:
+            return
+        if epoch is None:
+            return
+        self.index.append(block.index)
+        self.time.append(epoch)
+        self.amount.append(amount)
+        self.src.append(self._wallet_id(sender))
+        self.dst.append(self._wallet_id(receiver))
+
+    def _views(self):
+        # Zero-copy; only valid while the lock is held (appending would
+        # otherwise fail on an exported buffer).
+        return tuple(np.frombuffer(col, dtype=col.typecode) for col in (self.index, self.time, self.amount, self.src, self.dst))
+
+    def _time_mask(self, times, since, until):
+        # None selects every row, which saves copying the columns through a mask.
+        mask = None
+        if since is not None:
+            mask = times >= int(since)
+        if until is not None:
+            mask = times < int(until) if mask is None else mask & (times < int(until))
+        return mask
+
+    @staticmethod
+    def _select(column, mask):
+        return column if mask is None else column[mask]
+
+    @staticmethod
+    def _in_range(epoch, since, until):
+        return (since is None or epoch >= since) and (until is None or epoch < until)
+
+    def _top(self, volume, count, limit):
+        # Wallet ids with the largest volumes, skipping wallets with no transfers.
+        return [int(i) for i in _largest(volume, limit) if count[i]]
+
+    def top_counterparties(self, wallet=None, limit=10, since=None, until=None):
+        """
+        The wallets `wallet` moved the most volume with (both directions);
+        without a wallet, the wallets with the most volume overall.
+        """
+        with self._lock:
+            target = self._ids.get(wallet) if wallet is not None else None
+            if wallet is not None and target is None:
+                return []
+            if np is not None and len(self):
+                _, times, amount, src, dst = self._views()
+                size = len(self.wallets)
+                mask = self._time_mask(times, since, until)
+                if target is None:
+                    pairs = ((src, mask), (dst, mask))
+                else:
+                    # The counterparty of an outgoing transfer is its receiver and vice versa.
+                    outgoing, incoming = src == target, dst == target
+                    if mask is not None:
+                        outgoing &= mask
+                        incoming &= mask
+                    pairs = ((dst, outgoing), (src, incoming))
+                volume = np.zeros(size)
+                count = np.zeros(size, dtype=np.int64)
+                for ids, selected in pairs:
+                    ids, weights = self._select(ids, selected), self._select(amount, selected)
+                    volume += np.bincount(ids, weights=weights, minlength=size)
+                    count += np.bincount(ids, minlength=size)
+                return [
+                    {"wallet": self.wallets[i], "count": int(count[i]), "volume": float(volume[i])}
+                    for i in self._top(volume, count, limit)
+                ]
+            totals = {}
+            for epoch, amt, s, d in zip(self.time, self.amount, self.src, self.dst):
+                if not self._in_range(epoch, since, until):
+                    continue
+                if target is None:
+                    parties = (s, d)
+                else:
+                    parties = ((d,) if s == target else ()) + ((s,) if d == target else ())
+                for party in parties:
+                    entry = totals.setdefault(party, [0, 0.0])
+                    entry[0] += 1
+                    entry[1] += amt
+            ranked = sorted(totals.items(), key=lambda item: (-item[1][1], item[0]))[: int(limit)]
+            return [{"wallet": self.wallets[w], "count": c, "volume": v} for w, (c, v) in ranked]
+
+    def volume_per_hour(self, since=None, until=None):
+        """Transfer count and volume for every hour with activity, oldest first."""
+        with self._lock:
+            if np is not None and len(self):
+                _, times, amount, _, _ = self._views()
+                mask = self._time_mask(times, since, until)
+                hours = self._select(times, mask) // 3600
+                if not len(hours):
+                    return []
+                base = int(hours.min())
+                hours -= base
+                count = np.bincount(hours)
+                volume = np.bincount(hours, weights=self._select(amount, mask))
+                return [
+                    {"hour": _time_label((base + int(h)) * 3600, "%Y-%m-%d %H"), "count": int(count[h]),
+                     "volume": float(volume[h])}
+                    for h in np.flatnonzero(count)
+                ]
+            buckets = {}
+            for epoch, amt in zip(self.time, self.amount):
+                if self._in_range(epoch, since, until):
+                    entry = buckets.setdefault(epoch // 3600, [0, 0.0])
+                    entry[0] += 1
+                    entry[1] += amt
+            return [
+                {"hour": _time_label(h * 3600, "%Y-%m-%d %H"), "count": c, "volume": v}
+                for h, (c, v) in sorted(buckets.items())
+            ]
+
+    def largest_transfers(self, limit=10, since=None, until=None):
+        with self._lock:
+            if np is not None and len(self):
+                index, times, amount, src, dst = self._views()
+                mask = self._time_mask(times, since, until)
+                if mask is None:
+                    picked = _largest(amount, limit)
+                else:
+                    rows = np.flatnonzero(mask)
+                    picked = rows[_largest(amount[rows], limit)]
+            else:
+                rows = [i for i, epoch in enumerate(self.time) if self._in_range(epoch, since, until)]
+                picked = sorted(rows, key=lambda i: -self.amount[i])[: int(limit)]
+            return [
+                {"block_index": self.index[i], "time": _time_label(self.time[i]), "from": self.wallets[self.src[i]],
+                 "to": self.wallets[self.dst[i]], "amount": self.amount[i]}
+                for i in (int(i) for i in picked)
+            ]
+
+    def concentration(self, top=10, since=None, until=None):
+        """
+        How concentrated transfer volume is across wallets. A wallet's volume
+        is what it sent plus what it received; shares are of the sum over all
+        wallets. Reports the top wallets, their combined share and the
+        Herfindahl-Hirschman index (sum of squared shares; higher is more concentrated).
+        """
+        with self._lock:
+            if np is not None and len(self):
+                _, times, amount, src, dst = self._views()
+                size = len(self.wallets)
+                mask = self._time_mask(times, since, until)
+                src, dst, amount = self._select(src, mask), self._select(dst, mask), self._select(amount, mask)
+                volume = np.bincount(src, weights=amount, minlength=size) + np.bincount(dst, weights=amount, minlength=size)
+                count = np.bincount(src, minlength=size) + np.bincount(dst, minlength=size)
+                grand = float(volume.sum())
+                active = int(np.count_nonzero(count))
+                hhi = float(((volume / grand) ** 2).sum()) if grand else 0.0
+                leaders = [(i, float(volume[i])) for i in self._top(volume, count, top)]
+            else:
+                per_wallet = {}
+                for epoch, amt, s, d in zip(self.time, self.amount, self.src, self.dst):
+                    if self._in_range(epoch, since, until):
+                        per_wallet[s] = per_wallet.get(s, 0.0) + amt
+                        per_wallet[d] = per_wallet.get(d, 0.0) + amt
+                grand = sum(per_wallet.values())
+                active = len(per_wallet)
+                hhi = sum((v / grand) ** 2 for v in per_wallet.values()) if grand else 0.0
+                leaders = sorted(per_wallet.items(), key=lambda item: (-item[1], item[0]))[: int(top)]
+            return {
+                "wallets": active,
+                # Each transfer counts for both of its wallets.
+                "volume": grand / 2,
+                "top": [{"wallet": self.wallets[w], "volume": v, "share": v / grand if grand else 0.0} for w, v in leaders],
+                "top_share": sum(v for _, v in leaders) / grand if grand else 0.0,
+                "hhi": hhi,
+            }
+
+    def query(self, name, **params):
+        if name not in QUERIES:
+            raise ValueError(f"unknown query {name!r}; expected one of {', '.join(QUERIES)}")
+        return getattr(self, name)(**{k: v for k, v in params.items() if v is not None})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate queries over the stored SVWEN transfers.")
+    parser.add_argument("query", choices=QUERIES)
+    parser.add_argument("--db", default=None, help="database file (default: SVWEN_DB_PATH or blockchain.db)")
+    parser.add_argument("--wallet", help="wallet address (top_counterparties)")
+    parser.add_argument("--limit", type=int, help="rows to return (top_counterparties, largest_transfers)")
+    parser.add_argument("--top", type=int, help="wallets to list (concentration)")
+    parser.add_argument("--since", type=int, help="epoch seconds, inclusive")
+    parser.add_argument("--until", type=int, help="epoch seconds, exclusive")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.set_database_path(args.db)
+    database.init_database()
+    analytics = LedgerAnalytics.from_database(args.since, args.until)
+    params = {"since": args.since, "until": args.until}
+    if args.query == "top_counterparties":
+        params.update(wallet=args.wallet, limit=args.limit)
+    elif args.query == "largest_transfers":
+        params["limit"] = args.limit
+    elif args.query == "concentration":
+        params["top"] = args.top
+    print(json.dumps(analytics.query(args.query, **params), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,18 @@
 import sqlite3
 import secrets
 
-from database import DB_NAME
+import database
+from metrics import REGISTRY, timed_query
 
 
 def _connect():
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(database.DB_NAME)
+    conn.set_trace_callback(REGISTRY.count_statement)
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 
+@timed_query
 def ensure_auth_schema():
     conn = _connect()
     cur = conn.cursor()
@@ -36,6 +39,7 @@ def ensure_auth_schema():
     conn.commit()
     conn.close()
 
+@timed_query
 def get_all_usernames():
     conn = _connect()
     cur = conn.cursor()
@@ -45,6 +49,7 @@ def get_all_usernames():
     return [r[0] for r in rows]
 
 
+@timed_query
 def count_users():
     conn = _connect()
     cur = conn.cursor()
@@ -54,6 +59,7 @@ def count_users():
     return n
 
 
+@timed_query
 def get_user_by_username(username: str):
     conn = _connect()
     cur = conn.cursor()
@@ -65,6 +71,7 @@ def get_user_by_username(username: str):
     return {"id": row[0], "username": row[1], "password_hash": row[2], "role": row[3]}
 
 
+@timed_query
 def get_user_by_id(user_id: int):
     conn = _connect()
     cur = conn.cursor()
@@ -90,6 +97,7 @@ def _generate_wallet_address(conn) -> str:
     raise RuntimeError("Could not generate unique wallet address")
 
 
+@timed_query
 def generate_wallet_address() -> str:
     conn = _connect()
     try:
@@ -98,6 +106,7 @@ def generate_wallet_address() -> str:
         conn.close()
 
 
+@timed_query
 def create_user_with_wallet(username: str, password_hash: str, role: str, initial_balance: float):
     conn = _connect()
     try:
@@ -118,6 +127,7 @@ def create_user_with_wallet(username: str, password_hash: str, role: str, initia
         conn.close()
 
 
+@timed_query
 def get_wallet_by_user_id(user_id: int):
     conn = _connect()
     cur = conn.cursor()
@@ -132,6 +142,7 @@ def get_wallet_by_user_id(user_id: int):
     return {"wallet_address": row[0], "user_id": row[1], "balance": float(row[2])}
 
 
+@timed_query
 def get_wallet_by_address(wallet_address: str):
     conn = _connect()
     cur = conn.cursor()
@@ -145,6 +156,7 @@ def get_wallet_by_address(wallet_address: str):
         return None
     return {"wallet_address": row[0], "user_id": row[1], "balance": float(row[2])}
 
+@timed_query
 def find_wallet_addresses_by_username_query(query: str):
     q = (query or "").strip().lower()
     if not q:
@@ -165,7 +177,17 @@ def find_wallet_addresses_by_username_query(query: str):
     return [r[0] for r in rows]
 
 
-def transfer_balance(sender_user_id: int, receiver_wallet_address: str, amount: float) -> dict:
+@timed_query
+def transfer_balance(sender_user_id: int, receiver_wallet_address: str, amount: float, idempotency=None) -> dict:
+    """
+    Move `amount` between the wallets in one transaction. `idempotency`,
+    when given, is (key, fingerprint, result, created, not_before): the
+    sender's idempotency_keys row is claimed in the same transaction, so
+    the key is recorded if and only if the funds moved. A row created at or
+    after `not_before` is never replaced; the transfer is then rolled back
+    and the result carries that row as "idempotency_conflict"
+    (fingerprint, result, created).
+    """
     conn = _connect()
     try:
         conn.execute("BEGIN IMMEDIATE")
@@ -199,6 +221,24 @@ def transfer_balance(sender_user_id: int, receiver_wallet_address: str, amount:
 
         cur.execute("UPDATE wallets SET balance = ? WHERE user_id = ?", (new_sender_balance, int(sender_user_id)))
         cur.execute("UPDATE wallets SET balance = ? WHERE wallet_address = ?", (new_receiver_balance, receiver_wallet_address))
+        if idempotency is not None:
+            key, fingerprint, result, created, not_before = idempotency
+            # Only an expired row may be taken over; a live one means another
+            # request (possibly in another process) already used the key.
+            cur.execute(
+                "INSERT INTO idempotency_keys (user_id, key, fingerprint, result, created) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_id, key) DO UPDATE SET fingerprint = excluded.fingerprint, "
+                "result = excluded.result, created = excluded.created WHERE idempotency_keys.created < ?",
+                (int(sender_user_id), key, fingerprint, result, float(created), float(not_before)),
+            )
+            if cur.rowcount == 0:
+                cur.execute(
+                    "SELECT fingerprint, result, created FROM idempotency_keys WHERE user_id = ? AND key = ?",
+                    (int(sender_user_id), key),
+                )
+                stored = cur.fetchone()
+                conn.rollback()
+                return {"ok": False, "error": "Idempotency key already used", "idempotency_conflict": tuple(stored)}
         conn.commit()
         return {
             "ok": True,
@@ -217,7 +257,41 @@ def transfer_balance(sender_user_id: int, receiver_wallet_address: str, amount:
         conn.close()
 
 
-def reverse_transfer(sender_user_id: int, receiver_wallet_address: str, amount: float):
+@timed_query
+def get_all_balances() -> dict:
+    """{wallet address: (user id, balance)} for every wallet."""
+    conn = _connect()
+    rows = conn.execute("SELECT wallet_address, user_id, balance FROM wallets").fetchall()
+    conn.close()
+    return {address: (int(user_id), float(balance)) for address, user_id, balance in rows}
+
+
+@timed_query
+def commit_balances(balances: dict, layout=None):
+    """
+    Set {wallet address: balance} and, in the same transaction, the
+    storage_layout (key, value) pairs in `layout`, so both land or neither does.
+    """
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE wallets SET balance = ? WHERE wallet_address = ?",
+            [(float(balance), address) for address, balance in balances.items()],
+        )
+        if layout:
+            conn.executemany("INSERT OR REPLACE INTO storage_layout (key, value) VALUES (?, ?)", list(layout))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+@timed_query
+def reverse_transfer(sender_user_id: int, receiver_wallet_address: str, amount: float, idempotency_key=None):
+    # Also forgets the sender's idempotency key the transfer recorded, if any.
     conn = _connect()
     try:
         conn.execute("BEGIN IMMEDIATE")
@@ -233,6 +307,10 @@ def reverse_transfer(sender_user_id: int, receiver_wallet_address: str, amount:
         receiver_balance = float(r[0])
         cur.execute("UPDATE wallets SET balance = ? WHERE user_id = ?", (sender_balance + float(amount), int(sender_user_id)))
         cur.execute("UPDATE wallets SET balance = ? WHERE wallet_address = ?", (receiver_balance - float(amount), receiver_wallet_address))
+        if idempotency_key is not None:
+            cur.execute(
+                "DELETE FROM idempotency_keys WHERE user_id = ? AND key = ?", (int(sender_user_id), idempotency_key)
+            )
         conn.commit()
     except Exception:
         try:
@@ -243,6 +321,60 @@ def reverse_transfer(sender_user_id: int, receiver_wallet_address: str, amount:
         conn.close()
 
 
+@timed_query
+def ensure_idempotency_schema():
+    conn = _connect()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created REAL NOT NULL,
+            PRIMARY KEY (user_id, key)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idempotency_keys_created ON idempotency_keys (created)")
+    conn.commit()
+    conn.close()
+
+
+@timed_query
+def get_idempotency_key(user_id: int, key: str, not_before: float):
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT fingerprint, result, created FROM idempotency_keys WHERE user_id = ? AND key = ? AND created >= ?",
+        (int(user_id), key, float(not_before)),
+    )
+    row = cur.fetchone()
+    conn.close()
+    return row
+
+
+@timed_query
+def put_idempotency_key(user_id: int, key: str, fingerprint: str, result: str):
+    # Fills in the full result of a row transfer_balance claimed; never creates or takes over a row.
+    conn = _connect()
+    conn.execute(
+        "UPDATE idempotency_keys SET result = ? WHERE user_id = ? AND key = ? AND fingerprint = ?",
+        (result, int(user_id), key, fingerprint),
+    )
+    conn.commit()
+    conn.close()
+
+
+@timed_query
+def evict_idempotency_keys(before: float) -> int:
+    conn = _connect()
+    cur = conn.execute("DELETE FROM idempotency_keys WHERE created < ?", (float(before),))
+    conn.commit()
+    conn.close()
+    return cur.rowcount
+
+
 def insert_sample_pakistani_users():
     """
     Insert sample Pakistani users with 1000 starting balance if they don't already exist.
@@ -0,0 +1,272 @@
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import database
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.001
+DEFAULT_REPEAT = 3
+DEFAULT_HASH_BLOCKS = 100_000
+INSERT_BATCH = 50_000
+
+
+def _quiet(fn, *args, **kwargs):
+    with redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def _measure(fn, memory: bool = True, repeat: int = DEFAULT_REPEAT) -> dict:
+    best = None
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        _quiet(fn)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    out = {"seconds": round(best, 6)}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            _quiet(fn)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        out["peak_bytes"] = int(peak)
+    return out
+
+
+def chain_bytes_per_block() -> float:
+    """Memory retained by a loaded chain divided by its height."""
+    from blockchain import Blockchain
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        chain = _quiet(Blockchain, use_checkpoint=False)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(retained / max(1, chain.height), 1)
+
+
+def bench_hash_schemes(n_blocks: int = DEFAULT_HASH_BLOCKS, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Digest throughput of each hash scheme over typical transfer blocks,
+    with the previous hash as the raw digest a Block holds.
+    """
+    from hashing import SCHEME_NAMES, block_digest
+
+    base = datetime(2024, 1, 1)
+    blocks = []
+    prev = bytes.fromhex("ab" * 32)
+    for i in range(1, n_blocks + 1):
+        ts = (base + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+        data = (
+            f"TxHash={i:064x} | From={i % 50:032x} | To={(i * 7) % 50:032x} | "
+            f"Amount={1 + i % 97} | Type=TRANSFER | Time={ts}"
+        )
+        blocks.append((i, ts, data, prev))
+
+    out = {}
+    for name, scheme in SCHEME_NAMES.items():
+        def run_scheme():
+            for index, ts, data, prev_hash in blocks:
+                block_digest(index, ts, data, prev_hash, scheme)
+
+        r = _measure(run_scheme, memory=False, repeat=repeat)
+        r["blocks_per_second"] = int(n_blocks / r["seconds"]) if r["seconds"] else None
+        out[name] = r
+    return out
+
+
+def build_ledger(n_blocks: int, wallets: list):
+    """
+    Append `n_blocks - 1` transfer blocks after genesis straight into the
+    blocks table (or its partitions), hashing them with the real Block so
+    the chain verifies.
+    """
+    from blockchain import Block
+    from ledger_api import _tx_hash
+
+    last_index, prev_hash = database.get_last_block()
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(last_index + 1, n_blocks):
+        sender = wallets[i % len(wallets)]
+        receiver = wallets[(i * 7 + 1) % len(wallets)]
+        if receiver == sender:
+            receiver = wallets[(i + 1) % len(wallets)]
+        amount = str(1 + i % 97)
+        ts = (base + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+        txh = _tx_hash(sender, receiver, amount, ts)
+        data = f"TxHash={txh} | From={sender} | To={receiver} | Amount={amount} | Type=TRANSFER | Time={ts}"
+        block = Block(i, ts, data, prev_hash)
+        rows.append((i, ts, data, prev_hash, block.current_hash, block.scheme))
+        prev_hash = block.current_hash
+        if len(rows) >= INSERT_BATCH:
+            database.insert_blocks(rows)
+            rows = []
+    if rows:
+        database.insert_blocks(rows)
+
+
+def bench_size(n_blocks: int, memory: bool = True, repeat: int = DEFAULT_REPEAT, appends: int = 20) -> dict:
+    from blockchain import Blockchain
+    from ledger_api import LedgerAPI
+
+    workdir = tempfile.mkdtemp(prefix="svwen_bench_")
+    try:
+        database.set_database_path(os.path.join(workdir, "bench.db"))
+        api = _quiet(LedgerAPI)
+        created = api.seed_info()["created"]
+        wallets = [u["wallet_address"] for u in created.values()]
+        demo_token = api.login("demo_user", created["demo_user"]["seed_password"])["token"]
+        receiver = next(u["wallet_address"] for name, u in created.items() if name not in ("demo_user", "tester"))
+
+        start = time.perf_counter()
+        build_ledger(n_blocks, wallets)
+        results = {"build_seconds": round(time.perf_counter() - start, 3)}
+
+        def measure(fn):
+            return _measure(fn, memory, repeat)
+
+        results["load_cold"] = measure(lambda: Blockchain(use_checkpoint=False))
+        _quiet(Blockchain)
+        results["load_warm"] = measure(Blockchain)
+        if memory:
+            results["bytes_per_block"] = chain_bytes_per_block()
+        chain = _quiet(Blockchain)
+        api.blockchain = chain
+
+        results["verify_chain"] = measure(lambda: chain.verify_chain(full=True))
+        results["get_block_by_index"] = measure(lambda: chain.get_block_by_index(n_blocks - 1))
+        results["my_transactions"] = measure(lambda: api.my_transactions(demo_token))
+        results["search_transactions"] = measure(lambda: api.search_transactions(demo_token, "transfer"))
+
+        def appends_fn():
+            for i in range(appends):
+                chain.add_block(f"Bench append {i}")
+
+        r = measure(appends_fn)
+        r["per_call_seconds"] = round(r["seconds"] / appends, 6)
+        results["add_block"] = r
+        results["send_sol"] = measure(lambda: api.send_sol(demo_token, receiver, "0.01"))
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(sizes, memory: bool = True, repeat: int = DEFAULT_REPEAT, hash_blocks: int = DEFAULT_HASH_BLOCKS) -> dict:
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": {},
+    }
+    for n in sizes:
+        print(f"benchmarking {n} blocks ...", flush=True)
+        report["results"][str(n)] = bench_size(n, memory=memory, repeat=repeat)
+    if hash_blocks:
+        print(f"hashing {hash_blocks} blocks per scheme ...", flush=True)
+        report["hash_schemes"] = bench_hash_schemes(hash_blocks, repeat=repeat)
+    return report
+
+
+def _timings(entry: dict):
+    for op, value in entry.items():
+        if isinstance(value, dict) and "seconds" in value:
+            yield op, value["seconds"]
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD, min_delta: float = DEFAULT_MIN_DELTA) -> list:
+    """Return [(size, op, baseline_s, current_s, ratio)] for ops slower than threshold allows."""
+    regressions = []
+    entries = dict(current.get("results", {}))
+    base_entries = dict(baseline.get("results", {}))
+    if "hash_schemes" in current and "hash_schemes" in baseline:
+        entries["hash"] = current["hash_schemes"]
+        base_entries["hash"] = baseline["hash_schemes"]
+    for size, entry in entries.items():
+        base_entry = base_entries.get(size)
+        if not base_entry:
+            continue
+        base = dict(_timings(base_entry))
+        for op, seconds in _timings(entry):
+            b = base.get(op)
+            if not b:
+                continue
+            ratio = seconds / b
+            if ratio > 1.0 + threshold and seconds - b > min_delta:
+                regressions.append((size, op, b, seconds, ratio))
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    lines = []
+    for size, entry in report["results"].items():
+        lines.append(f"== {size} blocks (build {entry.get('build_seconds')}s)")
+        if "bytes_per_block" in entry:
+            lines.append(f"  {'chain memory':<22}{entry['bytes_per_block']:>12.1f} bytes/block")
+        for op, value in entry.items():
+            if not isinstance(value, dict):
+                continue
+            mem = value.get("peak_bytes")
+            mem_s = f"{mem / (1024 * 1024):10.2f} MiB" if mem is not None else ""
+            lines.append(f"  {op:<22}{value['seconds']:>12.6f}s {mem_s}")
+    if report.get("hash_schemes"):
+        lines.append("== hash throughput")
+        for name, value in report["hash_schemes"].items():
+            lines.append(f"  {name:<22}{value['seconds']:>12.6f}s {value['blocks_per_second']:>12,} blocks/s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the SVWEN chain and query hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--output", default="bench_results.json", help="machine-readable results file")
+    parser.add_argument("--compare", default=None, help="baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA, help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timing runs per operation (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    parser.add_argument("--hash-blocks", type=int, default=DEFAULT_HASH_BLOCKS, help="blocks hashed per scheme (0 to skip)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, memory=not args.no_memory, repeat=args.repeat, hash_blocks=args.hash_blocks)
+    print(format_report(report))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+        for size, op, b, c, ratio in regressions:
+            print(f"REGRESSION {size} blocks {op}: {b:.6f}s -> {c:.6f}s ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("no regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,20 @@
+from hashing import block_hash, default_scheme
+
+
 class Block:
     
-    def __init__(self, index, timestamp, data, previous_hash):
+    def __init__(self, index, timestamp, data, previous_hash, scheme=None):
         self.index = index
         self.timestamp = timestamp
         self.data = data
         self.previous_hash = previous_hash
+        self.scheme = default_scheme() if scheme is None else scheme
         self.current_hash = self.calculate_hash()
         self.next = None
     
     def calculate_hash(self):
-        hash_string = str(self.index) + self.timestamp + str(self.data) + self.previous_hash
-        return str(hash(hash_string))
+        # Same digest as blockchain.Block, so it is reproducible across runs.
+        return block_hash(self.index, self.timestamp, str(self.data), self.previous_hash, self.scheme)
     
     def __str__(self):
         return f"Block {self.index}: Hash={self.current_hash[:10]}..., Data={self.data}"
@@ -1,63 +1,472 @@
-from datetime import datetime
-import hashlib
+from array import array
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import date, datetime
+import gc
+import heapq
+import re
+import struct
+import sys
+import threading
+from activity import ActivityRollup
+from checkpoint import load_checkpoint, update_checkpoint
+from events import BLOCK, INTEGRITY, EventHub
+from hashing import block_digest, default_scheme
+from mmr import MountainRange
 from database import (
     get_all_blocks,
+    get_block_hash,
     init_database,
     insert_block,
+    insert_blocks,
     is_database_empty,
     update_block_hashes,
 )
 
+@contextmanager
+def _gc_paused():
+    # Loading allocates one Block per row and nothing cyclic; letting the
+    # cyclic collector run repeatedly over the growing chain dominates load time.
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+# Blocks are kept compact in memory: digests as 32 raw bytes, timestamps as
+# integer seconds and standard transfer payloads packed into a short bytes
+# record with interned wallet addresses. Every value is only converted back
+# to its original string when read, and a value is only packed when it
+# converts back exactly; anything else is kept as given.
+
+_TS_LEN = len("2000-01-01 00:00:00")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_minute_memo = (None, "")
+_prefix_memo = (None, 0)
+_TWO_DIGITS = [f"{i:02d}" for i in range(60)]
+_TWO_DIGIT_VALUES = {text: i for i, text in enumerate(_TWO_DIGITS)}
+
+_TRANSFER = struct.Struct("<III32sq")
+_TRANSFER_RE = re.compile(
+    r"TxHash=([0-9a-f]{64}) \| From=(.*?) \| To=(.*?) \| Amount=(.*?) \| Type=(.*?) \| Time=(.*)", re.S
+)
+_TX_HASH_RE = re.compile(r"TxHash=([0-9a-f]{64}) ")
+_NO_TIME = -(1 << 62)
+_interned = []
+_intern_ids = {}
+_intern_lock = threading.Lock()
+
+
+def _epoch_to_ts(epoch):
+    # Seconds on a naive, zone-free scale; only used so "%Y-%m-%d %H:%M:%S"
+    # strings round-trip exactly. Chains are read in time order, so the
+    # formatted minute is memoised.
+    global _minute_memo
+    minute, second = divmod(epoch, 60)
+    memo = _minute_memo
+    if memo[0] != minute:
+        day, rem = divmod(minute, 1440)
+        hour, mins = divmod(rem, 60)
+        prefix = f"{date.fromordinal(day + _EPOCH_ORDINAL).isoformat()} {_TWO_DIGITS[hour]}:{_TWO_DIGITS[mins]}:"
+        memo = _minute_memo = (minute, prefix)
+    return memo[1] + _TWO_DIGITS[second]
+
+
+def _ts_to_epoch(ts):
+    global _prefix_memo
+    if type(ts) is not str or len(ts) != _TS_LEN:
+        return None
+    second = _TWO_DIGIT_VALUES.get(ts[17:])
+    if second is None:
+        return None
+    prefix = ts[:17]
+    memo = _prefix_memo
+    if memo[0] != prefix:
+        if prefix[10] != " " or prefix[13] != ":" or prefix[16] != ":":
+            return None
+        try:
+            day = date.fromisoformat(prefix[:10])
+        except ValueError:
+            return None
+        hour = _TWO_DIGIT_VALUES.get(prefix[11:13])
+        minute = _TWO_DIGIT_VALUES.get(prefix[14:16])
+        if day.isoformat() != prefix[:10] or hour is None or hour > 23 or minute is None:
+            return None
+        memo = _prefix_memo = (prefix, ((day.toordinal() - _EPOCH_ORDINAL) * 1440 + hour * 60 + minute) * 60)
+    return memo[1] + second
+
+
+def _pack_digest(value):
+    if type(value) is str and len(value) == 64:
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return value
+        if raw.hex() == value:
+            return raw
+    return value
+
+
+def _unpack_digest(value):
+    return value.hex() if type(value) is bytes else value
+
+
+def _intern_id(text):
+    ident = _intern_ids.get(text)
+    if ident is None:
+        with _intern_lock:
+            ident = _intern_ids.get(text)
+            if ident is None:
+                ident = len(_interned)
+                _interned.append(sys.intern(text))
+                _intern_ids[text] = ident
+    return ident
+
+
+def _unpack_data(packed):
+    sender, receiver, kind, tx_hash, time_epoch = _TRANSFER.unpack_from(packed)
+    return (
+        f"TxHash={tx_hash.hex()} | From={_interned[sender]} | To={_interned[receiver]} | "
+        f"Amount={packed[_TRANSFER.size:].decode('utf-8')} | Type={_interned[kind]} | Time={_epoch_to_ts(time_epoch)}"
+    )
+
+
+def _pack_data(data):
+    match = _TRANSFER_RE.fullmatch(data) if type(data) is str else None
+    if match is None:
+        return data
+    tx_hash, sender, receiver, amount, kind, time_str = match.groups()
+    time_epoch = _ts_to_epoch(time_str)
+    if time_epoch is None:
+        return data
+    # Every field is stored verbatim (a lowercase hex digest and a
+    # round-tripping time), so unpacking rebuilds the original string.
+    return _TRANSFER.pack(
+        _intern_id(sender), _intern_id(receiver), _intern_id(kind), bytes.fromhex(tx_hash), time_epoch
+    ) + amount.encode("utf-8")
+
+
 class Block:
-    
-    def __init__(self, index, timestamp, data, previous_hash):
+    __slots__ = ("index", "_timestamp", "_data", "_previous_hash", "_current_hash", "scheme", "next")
+
+    def __init__(self, index, timestamp, data, previous_hash, scheme=None):
         self.index = index
-        self.timestamp = timestamp
-        self.data = data
-        self.previous_hash = previous_hash
-        self.current_hash = self.calculate_hash()
+        self.scheme = default_scheme() if scheme is None else scheme
+        self._store(timestamp, data, previous_hash)
+        # The stored previous hash is the raw digest where it decodes, which
+        # saves the hash a second hex decode.
+        self._current_hash = self._digest(timestamp, data, self._previous_hash)
         self.next = None
-    
+
+    @classmethod
+    def from_stored(cls, index, timestamp, data, previous_hash, current_hash, scheme=0):
+        # Rebuild a block whose hash was already verified, without rehashing.
+        block = cls.__new__(cls)
+        block.index = index
+        block.scheme = scheme
+        block._store(timestamp, data, previous_hash)
+        block._current_hash = _pack_digest(current_hash)
+        block.next = None
+        return block
+
+    def _store(self, timestamp, data, previous_hash):
+        epoch = _ts_to_epoch(timestamp)
+        self._timestamp = timestamp if epoch is None else epoch
+        self._data = _pack_data(data)
+        self._previous_hash = _pack_digest(previous_hash)
+
+    @property
+    def timestamp(self):
+        value = self._timestamp
+        return _epoch_to_ts(value) if type(value) is int else value
+
+    @timestamp.setter
+    def timestamp(self, value):
+        epoch = _ts_to_epoch(value)
+        self._timestamp = value if epoch is None else epoch
+
+    @property
+    def epoch(self):
+        """Timestamp as seconds on the naive scale of the stored strings, or None if it does not parse."""
+        value = self._timestamp
+        return value if type(value) is int else None
+
+    @property
+    def data(self):
+        value = self._data
+        return _unpack_data(value) if type(value) is bytes else value
+
+    @data.setter
+    def data(self, value):
+        self._data = _pack_data(value)
+
+    @property
+    def previous_hash(self):
+        return _unpack_digest(self._previous_hash)
+
+    @previous_hash.setter
+    def previous_hash(self, value):
+        self._previous_hash = _pack_digest(value)
+
+    @property
+    def current_hash(self):
+        return _unpack_digest(self._current_hash)
+
+    @current_hash.setter
+    def current_hash(self, value):
+        self._current_hash = _pack_digest(value)
+
+    def tx_digest(self):
+        """Raw digest of the TxHash= a transfer block starts with, else None."""
+        value = self._data
+        if type(value) is bytes:
+            return _TRANSFER.unpack_from(value)[3]
+        match = _TX_HASH_RE.match(value) if type(value) is str else None
+        return bytes.fromhex(match.group(1)) if match else None
+
+    def link_after(self, prev_block):
+        # Share the predecessor's digest object instead of holding a copy.
+        if self._previous_hash == prev_block._current_hash:
+            self._previous_hash = prev_block._current_hash
+
+    def _digest(self, timestamp, data, previous_hash):
+        return block_digest(self.index, timestamp, data, previous_hash, self.scheme)
+
     def calculate_hash(self):
-        payload = f"{self.index}|{self.timestamp}|{self.data}|{self.previous_hash}".encode("utf-8")
-        return hashlib.sha256(payload).hexdigest()
+        return self._digest(self.timestamp, self.data, self._previous_hash).hex()
+
+    def transfer(self):
+        """(from, to, amount text, Time= epoch or None) of a transfer block, else None."""
+        value = self._data
+        if type(value) is bytes:
+            sender, receiver, _, _, time_epoch = _TRANSFER.unpack_from(value)
+            return _interned[sender], _interned[receiver], value[_TRANSFER.size:].decode("utf-8"), time_epoch
+        match = _TRANSFER_RE.fullmatch(value) if type(value) is str else None
+        if match is None:
+            return None
+        _, sender, receiver, amount, _, time_str = match.groups()
+        return sender, receiver, amount, _ts_to_epoch(time_str)
 
 class Blockchain:
     
-    def __init__(self):
+    def __init__(self, use_checkpoint=True):
         self.head = None
-        self.is_valid = True
+        self.tail = None
+        self.height = 0
+        self.verified_height = 0
+        self.use_checkpoint = use_checkpoint
+        self.events = EventHub()
+        # Position i holds block (first index + i) and the latest epoch up to
+        # and including it, a non-decreasing sequence that bisect can search.
+        # Blocks stamped earlier than that (imported history, a clock stepped
+        # back) are also kept as sorted (epoch, position) pairs in _late.
+        self._blocks = []
+        self._time_hi = array("q")
+        self._late = []
+        self._untimed = 0  # blocks whose timestamp does not parse
+        self._by_tx = {}  # raw TxHash digest -> block
+        self._is_valid = True
+        self._lock = threading.RLock()
         init_database()
+        self.mmr = MountainRange.load()
+        self.activity = ActivityRollup.load()
         self.load_blocks_from_db()
     
     def load_blocks_from_db(self):
+        with _gc_paused():
+            self._load_blocks_from_db()
+            self._reindex()
+            self._sync_mmr()
+            self._sync_activity()
+
+    def _reindex(self):
+        self._blocks = []
+        self._time_hi = array("q")
+        self._late = []
+        self._untimed = 0
+        self._by_tx = {}
+        current = self.head
+        while current is not None:
+            self._index_block(current)
+            current = current.next
+
+    def _index_block(self, block):
+        epoch = block.epoch
+        last = self._time_hi[-1] if self._time_hi else _NO_TIME
+        if epoch is None:
+            self._untimed += 1
+        elif epoch < last:
+            insort(self._late, (epoch, len(self._blocks)))
+        self._blocks.append(block)
+        self._time_hi.append(last if epoch is None or epoch < last else epoch)
+        tx = block.tx_digest()
+        if tx is not None:
+            self._by_tx.setdefault(tx, block)
+
+    def blocks_between(self, since=None, until=None):
+        """
+        Blocks with since <= time < until (epoch seconds on the naive scale of
+        the stored strings) in chain order, found by bisection: O(log n + k).
+        Blocks stamped earlier than one before them come from the _late
+        index and are merged in by position. Blocks whose timestamp does not
+        parse fall outside any bound, as in database.iter_blocks_between.
+        """
+        times = self._time_hi
+        blocks = self._blocks
+        stop = min(len(blocks), len(times))
+        if since is None and until is None:
+            for position in range(stop):
+                yield blocks[position]
+            return
+        start = 0 if since is None else bisect_left(times, since)
+        if until is not None:
+            stop = min(stop, bisect_left(times, until))
+        late = self._late
+        if not late and not self._untimed:
+            for position in range(start, stop):
+                yield blocks[position]
+            return
+        lo = 0 if since is None else bisect_left(late, (since,))
+        hi = len(late) if until is None else bisect_left(late, (until,))
+
+        def in_order():
+            for position in range(start, stop):
+                epoch = blocks[position].epoch
+                if epoch is not None and epoch >= times[position]:
+                    yield position
+
+        for position in heapq.merge(in_order(), sorted(p for _, p in late[lo:hi])):
+            yield blocks[position]
+
+    def _sync_mmr(self):
+        def hash_at(index):
+            block = self.tail if index == self.height - 1 else self.get_block_by_index(index)
+            return block._current_hash
+
+        def rows_from(start):
+            current = self.head
+            while current is not None:
+                if current.index >= start:
+                    yield current.index, current._current_hash
+                current = current.next
+
+        self.mmr.sync(self.height, hash_at, rows_from)
+
+    def _sync_activity(self):
+        def hash_at(index):
+            block = self.tail if index == self.height - 1 else self.get_block_by_index(index)
+            return block.current_hash
+
+        def rows_from(start):
+            current = self.head
+            while current is not None:
+                if current.index >= start:
+                    yield current.index, current.timestamp, current.data, current.current_hash
+                current = current.next
+
+        self.activity.sync(self.height, hash_at, rows_from)
+
+    def _load_blocks_from_db(self):
+        ckpt = load_checkpoint() if self.use_checkpoint else None
+        if ckpt is not None:
+            height = int(ckpt.get("height") or 0)
+            if height <= 0 or get_block_hash(height - 1) != ckpt.get("tail_hash"):
+                ckpt = None
+
         blocks_data = get_all_blocks()
         if not blocks_data:
             return
+        if ckpt is not None and self._warm_load(blocks_data, ckpt):
+            return
+        self.head = None
+        self.tail = None
+        self.height = 0
         
         prev_block = None
         expected_prev_hash = "0"
         needs_migration = False
 
-        for index, timestamp, data, previous_hash_db, hash_db in blocks_data:
-            block = Block(index, timestamp, data, expected_prev_hash)
+        for index, timestamp, data, previous_hash_db, hash_db, scheme in blocks_data:
+            block = Block(index, timestamp, data, expected_prev_hash, scheme)
 
             if previous_hash_db != expected_prev_hash or hash_db != block.current_hash:
                 needs_migration = True
 
             if prev_block:
+                block.link_after(prev_block)
                 prev_block.next = block
             else:
                 self.head = block
 
             prev_block = block
             expected_prev_hash = block.current_hash
+            self.height += 1
+
+        self.tail = prev_block
 
         if needs_migration and self.head is not None:
+            self.mmr.reset()
             current = self.head
             while current is not None:
                 update_block_hashes(current.index, current.previous_hash, current.current_hash)
                 current = current.next
+
+        self.verified_height = self.height
+        if self.use_checkpoint:
+            self.save_checkpoint()
+
+    def _warm_load(self, blocks_data, ckpt):
+        # Rows up to the checkpointed tail were verified when the checkpoint
+        # was written and its tail hash still matches, so only rows appended
+        # since then are rehashed.
+        trusted = int(ckpt["height"])
+        if len(blocks_data) < trusted or blocks_data[trusted - 1][4] != ckpt["tail_hash"]:
+            return False
+
+        self.head = None
+        self.tail = None
+        self.height = 0
+        prev_block = None
+        expected_prev_hash = "0"
+
+        for position, (index, timestamp, data, previous_hash_db, hash_db, scheme) in enumerate(blocks_data):
+            if index != position:
+                return False
+            if position < trusted:
+                block = Block.from_stored(index, timestamp, data, previous_hash_db, hash_db, scheme)
+            else:
+                block = Block(index, timestamp, data, expected_prev_hash, scheme)
+                if previous_hash_db != expected_prev_hash or hash_db != block.current_hash:
+                    return False
+
+            if prev_block:
+                block.link_after(prev_block)
+                prev_block.next = block
+            else:
+                self.head = block
+
+            prev_block = block
+            expected_prev_hash = block.current_hash
+            self.height += 1
+
+        self.tail = prev_block
+        verified = int(ckpt.get("verified_height", 0))
+        self.verified_height = self.height if verified >= trusted else verified
+        if self.height != trusted:
+            self.save_checkpoint()
+        return True
+
+    def save_checkpoint(self):
+        if self.tail is None:
+            return
+        update_checkpoint(
+            height=self.height,
+            tail_hash=self.tail.current_hash,
+            verified_height=min(self.verified_height, self.height),
+        )
     
     def create_genesis_block(self):
         if self.head is not None:
@@ -71,12 +480,41 @@ class Blockchain:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         genesis = Block(0, timestamp, "Genesis Block", "0")
         self.head = genesis
+        self.tail = genesis
+        self.height = 1
         
         insert_block(genesis.index, genesis.timestamp, genesis.data, 
-                    genesis.previous_hash, genesis.current_hash)
+                    genesis.previous_hash, genesis.current_hash, genesis.scheme)
+        self._index_block(genesis)
+        self.mmr.append(genesis.index, genesis._current_hash)
+        self.activity.append(genesis.index, genesis.timestamp, genesis.data, genesis.current_hash)
         print(f"Genesis block created! Hash: {genesis.current_hash}")
     
+    @property
+    def is_valid(self):
+        return self._is_valid
+
+    @is_valid.setter
+    def is_valid(self, value):
+        changed = bool(value) != self._is_valid
+        self._is_valid = bool(value)
+        if changed and self.events:
+            self.events.publish({"kind": INTEGRITY, "valid": self._is_valid, "source": "chain", "divergences": None})
+
     def add_block(self, data):
+        with self._lock:
+            return self._add_block(data)
+
+    def _publish_block(self, block):
+        tx = block.transfer()
+        sender, receiver, amount = tx[:3] if tx else (None, None, None)
+        self.events.publish(
+            {"kind": BLOCK, "index": block.index, "hash": block.current_hash,
+             "from": sender, "to": receiver, "amount": amount, "time": block.timestamp},
+            wallets=(sender, receiver) if tx else (),
+        )
+
+    def _add_block(self, data):
         if not self.is_valid:
             print("Cannot add transactions: Blockchain integrity is compromised!")
             return False
@@ -85,30 +523,98 @@ class Blockchain:
             print("Please create genesis block first!")
             return False
         
-        current = self.head
-        while current.next is not None:
-            current = current.next
+        current = self.tail
         
         index = current.index + 1
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_block = Block(index, timestamp, data, current.current_hash)
+        new_block = Block(index, timestamp, data, current._current_hash)
         
+        new_block.link_after(current)
         current.next = new_block
+        self.tail = new_block
+        self.height += 1
+        self._index_block(new_block)
         
         insert_block(new_block.index, new_block.timestamp, new_block.data,
-                    new_block.previous_hash, new_block.current_hash)
+                    new_block.previous_hash, new_block.current_hash, new_block.scheme)
+        self.mmr.append(new_block.index, new_block._current_hash)
+        self.activity.append(new_block.index, timestamp, data, new_block.current_hash)
+        if self.events:
+            self._publish_block(new_block)
         print(f"Block {index} added! Hash: {new_block.current_hash}")
         return True
     
+    def add_blocks(self, datas):
+        """Append one block per item of `datas`, written in one batch; returns the new blocks ([] if refused)."""
+        with self._lock:
+            if not self.is_valid:
+                print("Cannot add transactions: Blockchain integrity is compromised!")
+                return []
+            if self.head is None:
+                print("Please create genesis block first!")
+                return []
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            blocks = []
+            prev = self.tail
+            for data in datas:
+                block = Block(prev.index + 1, timestamp, data, prev._current_hash)
+                block.link_after(prev)
+                blocks.append(block)
+                prev = block
+            if not blocks:
+                return []
+            # Written before linking, so a failed write leaves the chain as it was.
+            insert_blocks([
+                (b.index, b.timestamp, b.data, b.previous_hash, b.current_hash, b.scheme) for b in blocks
+            ])
+            self.tail.next = blocks[0]
+            for prev, block in zip(blocks, blocks[1:]):
+                prev.next = block
+            self.tail = blocks[-1]
+            self.height += len(blocks)
+            for block in blocks:
+                self._index_block(block)
+            self.mmr.extend((b.index, b._current_hash) for b in blocks)
+            for block in blocks:
+                self.activity.append(block.index, timestamp, block.data, block.current_hash)
+                if self.events:
+                    self._publish_block(block)
+            print(f"Blocks {blocks[0].index}-{blocks[-1].index} added! Tail hash: {blocks[-1].current_hash}")
+            return blocks
+
+    def get_block_by_tx_hash(self, tx_hash):
+        """The first block whose data starts with TxHash=`tx_hash` (hex), or None."""
+        if len(tx_hash) != 64:
+            return None
+        try:
+            tx = bytes.fromhex(tx_hash)
+        except ValueError:
+            return None
+        block = self._by_tx.get(tx)
+        # A tampered block no longer carries the hash it was indexed under.
+        if block is None or block.tx_digest() != tx:
+            return None
+        return block
+
     def get_block_by_index(self, index):
-        current = self.head
-        while current is not None:
-            if current.index == index:
-                return current
-            current = current.next
+        blocks = self._blocks
+        if not blocks:
+            return None
+        position = index - blocks[0].index
+        if 0 <= position < len(blocks) and blocks[position].index == index:
+            return blocks[position]
+        # A gap in the stored indices; fall back to a scan.
+        for block in blocks:
+            if block.index == index:
+                return block
         return None
     
-    def verify_chain(self):
+    def verify_chain(self, full=False):
+        """
+        Check every hash and link, or with full=False only those of blocks
+        from verified_height on: the blocks below it were checked before and
+        only tampering changes them, which lowers the mark.
+        """
         if self.head is None:
             print("Blockchain is empty!")
             self.is_valid = False
@@ -116,13 +622,19 @@ class Blockchain:
         
         current = self.head
         prev_hash = "0"
+        if not full and self.verified_height > 0:
+            prev = self.get_block_by_index(self.verified_height - 1)
+            if prev is not None:
+                current = prev.next
+                prev_hash = prev._current_hash
         
         while current is not None:
-            if current.previous_hash != prev_hash:
+            if current._previous_hash != prev_hash:
                 print(f"Block {current.index}: Previous hash mismatch!")
                 print("⚠ Blockchain integrity check: FAILED")
                 print("Ledger is compromised!")
                 self.is_valid = False
+                self.verified_height = min(self.verified_height, current.index)
                 return False
             
             calculated_hash = current.calculate_hash()
@@ -131,13 +643,15 @@ class Blockchain:
                 print("⚠ Blockchain integrity check: FAILED")
                 print("Ledger is compromised!")
                 self.is_valid = False
+                self.verified_height = min(self.verified_height, current.index)
                 return False
             
-            prev_hash = current.current_hash
+            prev_hash = current._current_hash
             current = current.next
         
         print("Blockchain verification: VALID")
         self.is_valid = True
+        self.verified_height = self.height
         return True
     
     def search_by_name(self, name):
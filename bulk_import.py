@@ -0,0 +1,264 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import database
+from auth_db import commit_balances, get_all_balances
+from hashing import block_digest, default_scheme
+
+
+PROGRESS_KEY = "import_progress"
+# Followed by the file digest; set once an import of that content finished.
+DONE_KEY_PREFIX = "import_done:"
+DEFAULT_BATCH = 50_000
+MAX_REPORTED = 20
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class RejectedTransfer(ValueError):
+    def __init__(self, record, message):
+        super().__init__(f"record {record}: {message}")
+        self.record = record
+        self.reason = message
+
+
+def _tx_hash(sender_wallet, receiver_wallet, amount_str, timestamp):
+    # As in ledger_api, so imported blocks match ones made by send_sol.
+    payload = f"{sender_wallet}|{receiver_wallet}|{amount_str}|{timestamp}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_transfers(path, fmt=None):
+    """
+    Yield (record number, {"from", "to", "amount", "time"}) from a JSONL
+    file (one object per line) or a CSV file with a header row; "time" is
+    optional. The format follows the extension unless `fmt` is given.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for number, row in enumerate(csv.DictReader(f), 1):
+                yield number, row
+            return
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+
+
+class BulkImporter:
+    """
+    Appends the transfers in a JSONL/CSV file to the stored chain without
+    going through send_sol. Balances are checked and applied in memory
+    with send_sol's rules, and each block is hashed once in a streaming
+    pass. Every `batch_size` records, the blocks are written in one batch.
+    The touched balances and the resume point are then committed in one
+    transaction. Imports are keyed on the SHA-256 of the file's contents: a
+    rerun of an unfinished one resumes after the last committed batch and
+    drops any blocks an interrupted batch left behind, and a rerun of a
+    finished one does nothing unless `force` is set.
+    Run it while no ledger process is writing.
+    """
+
+    def __init__(self, path, fmt=None, batch_size=DEFAULT_BATCH, skip_invalid=False, progress=None, force=False):
+        self.path = path
+        self.source = os.path.abspath(path)
+        self.fmt = fmt
+        self.batch_size = max(1, int(batch_size))
+        self.skip_invalid = skip_invalid
+        self.progress = progress
+        self.force = force
+        self.scheme = default_scheme()
+        self.digest = None
+
+    def _start(self):
+        """(next index, tail hash, records to skip), or None when this file was already imported."""
+        last = database.get_last_block()
+        if last is None:
+            raise RuntimeError("the ledger has no blocks; create it first (python svwen_app.py --setup)")
+        if not self.force and database.get_layout_value(DONE_KEY_PREFIX + self.digest) is not None:
+            return None
+        state = json.loads(database.get_layout_value(PROGRESS_KEY) or "null")
+        if not state or state.get("done"):
+            return last[0] + 1, last[1], 0
+        resume = state.get("digest") == self.digest
+        if not resume and not self.force:
+            raise RuntimeError(
+                f"an import of {state.get('source')} is unfinished; rerun it to resume, or pass --force to abandon it"
+            )
+        height = int(state["height"])
+        if last[0] + 1 > height:
+            database.delete_blocks(height, last[0])
+            last = database.get_last_block()
+        if (last[0] + 1, last[1]) != (height, state["tail"]):
+            raise RuntimeError("the ledger changed since the import stopped; it cannot be resumed")
+        if not resume:
+            return last[0] + 1, last[1], 0
+        return height, state["tail"], int(state["records"])
+
+    def _transfer(self, number, record, balances):
+        if not isinstance(record, dict):
+            raise RejectedTransfer(number, "not a JSON object")
+        sender = str(record.get("from") or "").strip()
+        receiver = str(record.get("to") or "").strip()
+        try:
+            dec = Decimal(str(record.get("amount", "")).strip())
+        except InvalidOperation:
+            raise RejectedTransfer(number, "Invalid amount") from None
+        if not dec.is_finite():
+            raise RejectedTransfer(number, "Invalid amount")
+        if dec <= 0:
+            raise RejectedTransfer(number, "Amount must be positive")
+        stamp = str(record.get("time") or "").strip()
+        if stamp:
+            try:
+                timestamp = datetime.strptime(stamp, TIME_FORMAT).strftime(TIME_FORMAT)
+            except ValueError:
+                raise RejectedTransfer(number, f"Invalid time (expected {TIME_FORMAT})") from None
+        else:
+            timestamp = datetime.now().strftime(TIME_FORMAT)
+        if sender not in balances:
+            raise RejectedTransfer(number, "Sender wallet not found")
+        if receiver not in balances:
+            raise RejectedTransfer(number, "Receiver wallet not found")
+        amount = float(dec)
+        sender_id, sender_balance = balances[sender]
+        receiver_id, receiver_balance = balances[receiver]
+        if sender_balance < amount:
+            raise RejectedTransfer(number, "Insufficient balance")
+        if receiver_id == sender_id:
+            raise RejectedTransfer(number, "Cannot send to your own wallet")
+        # The same float arithmetic as auth_db.transfer_balance.
+        balances[sender] = (sender_id, sender_balance - amount)
+        balances[receiver] = (receiver_id, receiver_balance + amount)
+        amount_str = format(dec.normalize(), "f")
+        data = (
+            f"TxHash={_tx_hash(sender, receiver, amount_str, timestamp)} | From={sender} | To={receiver} | "
+            f"Amount={amount_str} | Type=TRANSFER | Time={timestamp}"
+        )
+        return sender, receiver, timestamp, data
+
+    def run(self) -> dict:
+        self.digest = file_digest(self.path)
+        start_at = self._start()
+        if start_at is None:
+            return {"source": self.source, "digest": self.digest, "already_imported": True,
+                    "records": 0, "imported": 0, "rejected": 0, "rejects": []}
+        index, tail, skip = start_at
+        balances = get_all_balances()
+        prev_raw = bytes.fromhex(tail)
+        scheme = self.scheme
+        stats = {
+            "source": self.source,
+            "digest": self.digest,
+            "resumed_at": skip,
+            "records": skip,
+            "imported": 0,
+            "rejected": 0,
+            "rejects": [],
+        }
+        rows, touched = [], set()
+        start = time.perf_counter()
+
+        def commit(done=False):
+            nonlocal rows, touched
+            if rows:
+                database.insert_blocks(rows)
+            state = {"source": self.source, "digest": self.digest, "records": stats["records"], "height": index,
+                     "tail": prev_raw.hex(), "done": done}
+            layout = [(PROGRESS_KEY, json.dumps(state))]
+            if done:
+                layout.append((DONE_KEY_PREFIX + self.digest, json.dumps({"source": self.source, "height": index})))
+            commit_balances({w: balances[w][1] for w in touched}, layout)
+            stats["imported"] += len(rows)
+            rows, touched = [], set()
+            elapsed = time.perf_counter() - start
+            stats["seconds"] = round(elapsed, 3)
+            stats["rows_per_second"] = round(stats["imported"] / elapsed, 1) if elapsed else None
+            stats["height"] = index
+            if self.progress is not None:
+                self.progress(dict(stats))
+
+        for number, record in read_transfers(self.path, self.fmt):
+            if skip:
+                skip -= 1
+                continue
+            try:
+                sender, receiver, timestamp, data = self._transfer(number, record, balances)
+            except RejectedTransfer as e:
+                if not self.skip_invalid:
+                    # Commit everything before the bad record, so fixing it and rerunning resumes there.
+                    commit()
+                    raise
+                stats["records"] += 1
+                stats["rejected"] += 1
+                if len(stats["rejects"]) < MAX_REPORTED:
+                    stats["rejects"].append({"record": e.record, "error": e.reason})
+                continue
+            digest = block_digest(index, timestamp, data, prev_raw, scheme)
+            rows.append((index, timestamp, data, prev_raw.hex(), digest.hex(), scheme))
+            touched.add(sender)
+            touched.add(receiver)
+            prev_raw = digest
+            index += 1
+            stats["records"] += 1
+            if len(rows) >= self.batch_size:
+                commit()
+        commit(done=True)
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append historical transfers from a JSONL/CSV file to the SVWEN ledger.")
+    parser.add_argument("file", help="transfers: JSONL objects or CSV rows with from, to, amount and optional time")
+    parser.add_argument("--db", default=None, help="database file (default: SVWEN_DB_PATH or blockchain.db)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="input format (default: from the extension)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="records per committed batch")
+    parser.add_argument("--skip-invalid", action="store_true", help="skip invalid records instead of stopping")
+    parser.add_argument("--verify", action="store_true", help="load the ledger and verify the chain afterwards")
+    parser.add_argument("--force", action="store_true",
+                        help="import even if this file was already imported, abandoning any other unfinished import")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.set_database_path(args.db)
+    database.init_database()
+
+    def report(stats):
+        print(f"{stats['records']} records, {stats['imported']} imported, {stats['rejected']} rejected, "
+              f"height {stats['height']}, {stats['rows_per_second']} rows/s", file=sys.stderr)
+
+    importer = BulkImporter(args.file, args.format, args.batch, args.skip_invalid, progress=report, force=args.force)
+    try:
+        stats = importer.run()
+    except (OSError, RuntimeError, RejectedTransfer) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    if args.verify:
+        from blockchain import Blockchain
+
+        with redirect_stdout(sys.stderr):
+            stats["valid"] = Blockchain().verify_chain(full=True)
+    print(json.dumps(stats, indent=2))
+    return 0 if stats.get("valid", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
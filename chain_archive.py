@@ -0,0 +1,257 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+import database
+from hashing import block_digest
+
+
+# File layout:
+#   header   : magic, version, record size, block count, payload area offset
+#   records  : one fixed-width record per block, in index order; the byte
+#              after the payload length is the block's hash scheme (files
+#              written before schemes existed hold 0, the legacy scheme)
+#   payloads : per block, u16 timestamp length + timestamp + u32 data length + data
+MAGIC = b"SVWENARC"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+RECORD = struct.Struct("<q32s32sQIB3x")
+TS_LEN = struct.Struct("<H")
+DATA_LEN = struct.Struct("<I")
+GENESIS_PREV = b"\x00" * 32
+IMPORT_BATCH = 50_000
+WRITE_BUFFER = 1 << 20
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _digest(hex_hash: str) -> bytes:
+    if hex_hash == "0":
+        return GENESIS_PREV
+    try:
+        raw = bytes.fromhex(hex_hash)
+    except ValueError:
+        raise ArchiveError(f"not a hex digest: {hex_hash!r}")
+    if len(raw) != 32:
+        raise ArchiveError(f"digest is not 32 bytes: {hex_hash!r}")
+    return raw
+
+
+def _hex(index: int, raw) -> str:
+    if index == 0 and raw == GENESIS_PREV:
+        return "0"
+    return bytes(raw).hex()
+
+
+def export_archive(path: str) -> int:
+    """Stream the blocks table into a binary archive; returns the block count."""
+    last = database.get_last_block()
+    count = 0 if last is None else int(last[0]) + 1
+    rows = database.iter_blocks(0, count - 1) if count else iter(())
+    return write_archive(path, rows, count, 0)
+
+
+def write_archive(path: str, rows, count: int, first_index: int = 0) -> int:
+    """Write `count` contiguous block rows starting at `first_index` to `path`."""
+    payload_offset = HEADER.size + count * RECORD.size
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, count, payload_offset))
+        f.truncate(payload_offset)
+
+    written = 0
+    rel = 0
+    with open(path, "r+b", buffering=WRITE_BUFFER) as records, open(path, "r+b", buffering=WRITE_BUFFER) as payloads:
+        records.seek(HEADER.size)
+        payloads.seek(payload_offset)
+        for row in rows:
+            index, timestamp, data, previous_hash, hash_value = row[:5]
+            scheme = row[5] if len(row) > 5 else 0
+            if written >= count:
+                break
+            if index != first_index + written:
+                raise ArchiveError(f"blocks table has a gap at index {first_index + written}")
+            ts = timestamp.encode("utf-8")
+            body = data.encode("utf-8")
+            entry = TS_LEN.pack(len(ts)) + ts + DATA_LEN.pack(len(body)) + body
+            records.write(RECORD.pack(index, _digest(previous_hash), _digest(hash_value), rel, len(entry), scheme))
+            payloads.write(entry)
+            rel += len(entry)
+            written += 1
+        if written != count:
+            raise ArchiveError(f"expected {count} blocks, exported {written}")
+    return count
+
+
+class ChainArchive:
+    """Read-only, memory-mapped view of an exported archive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ArchiveError("file too small to be an archive")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._attach(memoryview(self._mm), size)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """View an archive already held in memory (e.g. a decompressed segment)."""
+        archive = cls.__new__(cls)
+        archive.path = None
+        archive._file = None
+        archive._mm = None
+        if len(data) < HEADER.size:
+            raise ArchiveError("buffer too small to be an archive")
+        archive._attach(memoryview(data), len(data))
+        return archive
+
+    def _attach(self, view, size: int):
+        self.view = view
+        magic, version, record_size, _, self.count, self.payload_offset = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ArchiveError("bad magic")
+        if version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ArchiveError(f"unsupported archive version {version}")
+        if self.payload_offset != HEADER.size + self.count * RECORD.size or self.payload_offset > size:
+            self.close()
+            raise ArchiveError("truncated archive")
+
+    def close(self):
+        view = getattr(self, "view", None)
+        if view is not None:
+            view.release()
+            self.view = None
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record_offset(self, i: int) -> int:
+        return HEADER.size + i * RECORD.size
+
+    def hash_slice(self, i: int) -> memoryview:
+        off = self._record_offset(i) + 8 + 32
+        return self.view[off:off + 32]
+
+    def prev_slice(self, i: int) -> memoryview:
+        off = self._record_offset(i) + 8
+        return self.view[off:off + 32]
+
+    def record(self, i: int) -> tuple:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        index, prev, cur, rel, length, scheme = RECORD.unpack_from(self.view, self._record_offset(i))
+        off = self.payload_offset + rel
+        (ts_len,) = TS_LEN.unpack_from(self.view, off)
+        off += TS_LEN.size
+        timestamp = bytes(self.view[off:off + ts_len]).decode("utf-8")
+        off += ts_len
+        (data_len,) = DATA_LEN.unpack_from(self.view, off)
+        off += DATA_LEN.size
+        data = bytes(self.view[off:off + data_len]).decode("utf-8")
+        return index, timestamp, data, _hex(index, prev), cur.hex(), scheme
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.record(i)
+
+    def first_index(self) -> int:
+        return RECORD.unpack_from(self.view, HEADER.size)[0] if self.count else 0
+
+    def verify(self, rehash: bool = True, expected_prev: bytes = GENESIS_PREV):
+        """
+        Walk the archive. Linkage (prev digest == previous record's digest) is
+        compared on memoryview slices of the map without copying; with
+        `rehash`, every block's digest is recomputed under its own scheme.
+        `expected_prev` is the digest the first record must link to (zero for
+        an archive that starts at genesis).
+        Returns (ok, first_bad_index_or_None, message).
+        """
+        first = self.first_index()
+        for i in range(self.count):
+            if self.prev_slice(i) != expected_prev:
+                return False, first + i, f"block {first + i}: previous hash mismatch"
+            if rehash:
+                index, timestamp, data, prev_hex, cur_hex, scheme = self.record(i)
+                if index != first + i:
+                    return False, first + i, f"record {i} holds index {index}"
+                try:
+                    digest = block_digest(index, timestamp, data, prev_hex, scheme)
+                except ValueError as e:
+                    return False, index, f"block {index}: {e}"
+                if digest != self.hash_slice(i):
+                    return False, index, f"block {index}: hash mismatch"
+            expected_prev = self.hash_slice(i)
+        return True, None, f"{self.count} blocks verified"
+
+
+def import_archive(path: str, batch_size: int = IMPORT_BATCH) -> int:
+    """Load an archive into an empty blocks table; returns the block count."""
+    database.init_database()
+    if not database.is_database_empty():
+        raise ArchiveError("blocks table is not empty")
+    with ChainArchive(path) as archive:
+        ok, _, message = archive.verify(rehash=False)
+        if not ok:
+            raise ArchiveError(message)
+        batch = []
+        for row in archive:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                database.insert_blocks(batch)
+                batch = []
+        if batch:
+            database.insert_blocks(batch)
+        return archive.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export, import and verify binary SVWEN chain archives.")
+    parser.add_argument("--db", default=None, help="database file (default: SVWEN_DB_PATH or blockchain.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export")
+    p.add_argument("archive")
+    p = sub.add_parser("import")
+    p.add_argument("archive")
+    p = sub.add_parser("verify")
+    p.add_argument("archive")
+    p.add_argument("--links-only", action="store_true", help="check hash linkage without rehashing payloads")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.set_database_path(args.db)
+    try:
+        if args.command == "export":
+            print(f"exported {export_archive(args.archive)} blocks to {args.archive}")
+        elif args.command == "import":
+            print(f"imported {import_archive(args.archive)} blocks into {database.DB_NAME}")
+        else:
+            with ChainArchive(args.archive) as archive:
+                ok, _, message = archive.verify(rehash=not args.links_only)
+            print(("VALID: " if ok else "INVALID: ") + message)
+            return 0 if ok else 1
+    except ArchiveError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
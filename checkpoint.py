@@ -0,0 +1,53 @@
+import json
+import os
+
+import database
+
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path() -> str:
+    return database.DB_NAME + ".ckpt"
+
+
+def load_checkpoint():
+    """Return the checkpoint dict for the current database, or None if missing/unreadable."""
+    try:
+        with open(checkpoint_path(), "r", encoding="utf-8") as f:
+            ckpt = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(ckpt, dict) or ckpt.get("version") != CHECKPOINT_VERSION:
+        return None
+    return ckpt
+
+
+def save_checkpoint(ckpt: dict):
+    path = checkpoint_path()
+    tmp = path + ".tmp"
+    data = dict(ckpt)
+    data["version"] = CHECKPOINT_VERSION
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        # A missing checkpoint only costs a cold start next time.
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def update_checkpoint(**fields):
+    ckpt = load_checkpoint() or {}
+    ckpt.update(fields)
+    save_checkpoint(ckpt)
+
+
+def discard_checkpoint():
+    try:
+        os.remove(checkpoint_path())
+    except OSError:
+        pass
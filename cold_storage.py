@@ -0,0 +1,284 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+import database
+from chain_archive import GENESIS_PREV, ArchiveError, ChainArchive, _digest, write_archive
+
+
+DEFAULT_SEGMENT_SIZE = 10_000
+SEGMENT_CACHE_SIZE = 4
+COPY_CHUNK = 1 << 20
+
+
+def segments_dir() -> str:
+    return database.DB_NAME + ".segments"
+
+
+def _connect():
+    conn = sqlite3.connect(database.DB_NAME)
+    return conn
+
+
+def list_segments():
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT segment_id, first_index, last_index, file_name, sha256 FROM archived_segments ORDER BY first_index")
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _SegmentCache:
+    """Keeps the last few decompressed segments; segments never change once written."""
+
+    def __init__(self, size: int = SEGMENT_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, path: str) -> bytes:
+        with self._lock:
+            data = self._items.get(path)
+            if data is not None:
+                self._items.move_to_end(path)
+                return data
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read())
+        with self._lock:
+            self._items[path] = data
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_CACHE = _SegmentCache()
+
+
+def open_segment(file_name: str) -> ChainArchive:
+    return ChainArchive.from_bytes(_CACHE.get(os.path.join(segments_dir(), file_name)))
+
+
+def iter_archived_rows(start_index: int = 0, end_index=None):
+    """Yield archived block rows in index order, like database.iter_blocks."""
+    for _, first, last, file_name, _ in list_segments():
+        if last < start_index or (end_index is not None and first > end_index):
+            continue
+        archive = open_segment(file_name)
+        try:
+            lo = max(start_index, first) - first
+            hi = last if end_index is None else min(last, end_index)
+            for i in range(lo, hi - first + 1):
+                yield archive.record(i)
+        finally:
+            archive.close()
+
+
+def _write_segment(rows: list, segment_id: int) -> tuple:
+    os.makedirs(segments_dir(), exist_ok=True)
+    first, last = rows[0][0], rows[-1][0]
+    file_name = f"seg_{segment_id:06d}_{first:012d}_{last:012d}.svws"
+    path = os.path.join(segments_dir(), file_name)
+    raw_path = path + ".raw"
+    write_archive(raw_path, rows, len(rows), first)
+    comp = zlib.compressobj(6)
+    tmp = path + ".tmp"
+    with open(raw_path, "rb") as src, open(tmp, "wb") as dst:
+        for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+            dst.write(comp.compress(chunk))
+        dst.write(comp.flush())
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.remove(raw_path)
+    os.replace(tmp, path)
+    try:
+        os.chmod(path, 0o444)
+    except OSError:
+        pass
+    return file_name, _file_sha256(path)
+
+
+def archive_cold_blocks(below_height: int, segment_size: int = DEFAULT_SEGMENT_SIZE, vacuum: bool = False) -> int:
+    """
+    Move blocks with index < below_height out of the blocks table into
+    compressed read-only segment files, keeping their headers in
+    block_headers. The newest block always stays hot. Returns blocks moved.
+    """
+    database.init_database()
+    _, hot_first, hot_last = database.get_hot_range()
+    if hot_first is None:
+        return 0
+    stop = min(int(below_height), int(hot_last))  # never archive the tail
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MAX(segment_id), 0) FROM archived_segments")
+        segment_id = int(cur.fetchone()[0])
+    finally:
+        conn.close()
+
+    moved = 0
+    start = int(hot_first)
+    while start + segment_size <= stop:
+        end = start + segment_size - 1
+        rows = list(database.iter_blocks(start, end))
+        if len(rows) != segment_size or rows[0][0] != start or rows[-1][0] != end:
+            raise ArchiveError(f"blocks {start}..{end} are not contiguous")
+        segment_id += 1
+        file_name, sha = _write_segment(rows, segment_id)
+
+        conn = _connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                'INSERT INTO block_headers ("index", previous_hash, hash, segment_id) VALUES (?, ?, ?, ?)',
+                [(r[0], r[3], r[4], segment_id) for r in rows],
+            )
+            conn.execute(
+                "INSERT INTO archived_segments (segment_id, first_index, last_index, file_name, sha256) VALUES (?, ?, ?, ?, ?)",
+                (segment_id, start, end, file_name, sha),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            os.remove(os.path.join(segments_dir(), file_name))
+            raise
+        finally:
+            conn.close()
+        # Readers skip rows at or below the archived range, so the hot copies
+        # (possibly in a block partition) can be dropped after the commit.
+        database.delete_blocks(start, end)
+        moved += len(rows)
+        start = end + 1
+
+    if vacuum and moved:
+        conn = _connect()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    return moved
+
+
+def verify_segments(rehash: bool = True):
+    """
+    Check every segment against its recorded file digest, its own hash chain
+    and the retained header chain, and check that the first hot block links
+    to the last archived header. Returns (ok, message).
+    """
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        expected_prev = GENESIS_PREV
+        expected_first = 0
+        for segment_id, first, last, file_name, sha in list_segments():
+            path = os.path.join(segments_dir(), file_name)
+            if first != expected_first:
+                return False, f"segment {segment_id} starts at {first}, expected {expected_first}"
+            if not os.path.exists(path):
+                return False, f"segment {segment_id} file missing: {file_name}"
+            if _file_sha256(path) != sha:
+                return False, f"segment {segment_id} file digest mismatch"
+            archive = open_segment(file_name)
+            try:
+                ok, bad, message = archive.verify(rehash=rehash, expected_prev=expected_prev)
+                if not ok:
+                    return False, f"segment {segment_id}: {message}"
+                cur.execute(
+                    'SELECT "index", hash FROM block_headers WHERE "index" BETWEEN ? AND ? ORDER BY "index"', (first, last)
+                )
+                headers = cur.fetchall()
+                if len(headers) != archive.count:
+                    return False, f"segment {segment_id}: header count mismatch"
+                for i, (index, hash_value) in enumerate(headers):
+                    if archive.hash_slice(i) != _digest(hash_value):
+                        return False, f"block {index}: segment and header hash differ"
+                expected_prev = bytes(archive.hash_slice(archive.count - 1))
+            finally:
+                archive.close()
+            expected_first = last + 1
+
+        if expected_first:
+            row = next(database.iter_blocks(expected_first, expected_first), None)
+            if row is not None and (row[0] != expected_first or _digest(row[3]) != expected_prev):
+                return False, f"hot block {row[0]} does not link to the archived header chain"
+        return True, f"{expected_first} archived blocks verified"
+    finally:
+        conn.close()
+
+
+def status() -> dict:
+    hot_count, hot_first, hot_last = database.get_hot_range()
+    segments = list_segments()
+    return {
+        "segments": len(segments),
+        "archived_blocks": sum(last - first + 1 for _, first, last, _, _ in segments),
+        "hot_blocks": hot_count,
+        "hot_range": (hot_first, hot_last),
+        "segment_bytes": sum(
+            os.path.getsize(os.path.join(segments_dir(), s[3]))
+            for s in segments
+            if os.path.exists(os.path.join(segments_dir(), s[3]))
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move cold SVWEN blocks into compressed read-only segments.")
+    parser.add_argument("--db", default=None, help="database file (default: SVWEN_DB_PATH or blockchain.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("archive")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--below", type=int, help="archive blocks with index below this height")
+    group.add_argument("--keep-hot", type=int, help="keep this many newest blocks in the blocks table")
+    p.add_argument("--segment-size", type=int, default=DEFAULT_SEGMENT_SIZE)
+    p.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards")
+    p = sub.add_parser("verify")
+    p.add_argument("--links-only", action="store_true")
+    sub.add_parser("status")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.set_database_path(args.db)
+    database.init_database()
+    try:
+        if args.command == "archive":
+            below = args.below
+            if below is None:
+                last = database.get_last_block()
+                below = 0 if last is None else int(last[0]) + 1 - max(1, args.keep_hot)
+            moved = archive_cold_blocks(below, args.segment_size, args.vacuum)
+            print(f"archived {moved} blocks")
+        elif args.command == "verify":
+            ok, message = verify_segments(rehash=not args.links_only)
+            print(("VALID: " if ok else "INVALID: ") + message)
+            return 0 if ok else 1
+        else:
+            for key, value in status().items():
+                print(f"{key}: {value}")
+    except ArchiveError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
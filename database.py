@@ -1,44 +1,277 @@
 import sqlite3
 import os
+from datetime import datetime
+from urllib.parse import quote
+
+from metrics import REGISTRY, timed_query
 
 _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_NAME = os.path.join(_BASE_DIR, "blockchain.db")
+DB_NAME = os.environ.get("SVWEN_DB_PATH") or os.path.join(_BASE_DIR, "blockchain.db")
+
+# Only read when a database has no blocks yet; afterwards the layout recorded
+# in storage_layout wins.
+PARTITION_SIZE_ENV_VAR = "SVWEN_BLOCK_PARTITION_SIZE"
+
+_BLOCKS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS blocks (
+        "index" INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        data TEXT NOT NULL,
+        previous_hash TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        hash_scheme INTEGER NOT NULL DEFAULT 0,
+        ts_epoch INTEGER
+    )
+'''
+
+# Seconds since 1970-01-01 00:00:00 of the naive "%Y-%m-%d %H:%M:%S"
+# timestamp (SQLite reads it as UTC, so no zone shifts it); NULL if it does
+# not parse.
+_EPOCH_SQL = "CAST(strftime('%s', {}) AS INTEGER)"
+_INSERT_BLOCK_SQL = f'''
+    INSERT INTO blocks ("index", timestamp, data, previous_hash, hash, hash_scheme, ts_epoch)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, {_EPOCH_SQL.format("?2")})
+'''
+
+_ACTIVITY_TABLES = {"hourly": "activity_hourly", "daily": "activity_daily"}
+
+_partition_sizes = {}
+# Set in read-only worker processes; every file is then opened with mode=ro.
+_read_only = False
+_wal = False
+
+
+def set_database_path(path):
+    global DB_NAME
+    DB_NAME = path
+
+
+def _connect():
+    return _connect_file(DB_NAME)
+
+
+def set_read_only(enabled=True):
+    global _read_only
+    _read_only = bool(enabled)
+
+
+def enable_wal():
+    """Put the database and its partition files in WAL mode, so readers in other processes never block appends."""
+    global _wal
+    paths = [DB_NAME] + ([partition_path(n) for n in list_partitions()] if partition_size() else [])
+    for path in paths:
+        conn = _connect_file(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+    _wal = True
 
+
+def _connect_file(path):
+    if _read_only:
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(path)
+    conn.set_trace_callback(REGISTRY.count_statement)
+    return conn
+
+
+def _ensure_blocks_schema(conn):
+    conn.execute(_BLOCKS_SCHEMA)
+    # Blocks written before digest schemes existed were all legacy (scheme 0).
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(blocks)")]
+    if "hash_scheme" not in columns:
+        conn.execute("ALTER TABLE blocks ADD COLUMN hash_scheme INTEGER NOT NULL DEFAULT 0")
+    if "ts_epoch" not in columns:
+        conn.execute("ALTER TABLE blocks ADD COLUMN ts_epoch INTEGER")
+        conn.execute(f"UPDATE blocks SET ts_epoch = {_EPOCH_SQL.format('timestamp')}")
+    conn.execute("CREATE INDEX IF NOT EXISTS blocks_ts_epoch ON blocks (ts_epoch)")
+
+@timed_query
 def init_database():
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect()
     cursor = conn.cursor()
+    _ensure_blocks_schema(conn)
+    # Blocks moved to cold segment files keep their header here, so hash
+    # linkage stays checkable without opening the segment.
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS blocks (
+        CREATE TABLE IF NOT EXISTS block_headers (
             "index" INTEGER PRIMARY KEY,
-            timestamp TEXT NOT NULL,
-            data TEXT NOT NULL,
             previous_hash TEXT NOT NULL,
-            hash TEXT NOT NULL
+            hash TEXT NOT NULL,
+            segment_id INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_segments (
+            segment_id INTEGER PRIMARY KEY,
+            first_index INTEGER NOT NULL,
+            last_index INTEGER NOT NULL,
+            file_name TEXT NOT NULL,
+            sha256 TEXT NOT NULL
         )
     ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS storage_layout (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+    # Merkle Mountain Range nodes over block hashes, in MMR position order.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mmr_nodes (
+            pos INTEGER PRIMARY KEY,
+            hash BLOB NOT NULL
+        )
+    ''')
+    # Per-wallet transfer rollups, keyed by local "YYYY-MM-DD HH" / "YYYY-MM-DD".
+    for table in _ACTIVITY_TABLES.values():
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                wallet TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                tx_count INTEGER NOT NULL,
+                inflow REAL NOT NULL,
+                outflow REAL NOT NULL,
+                PRIMARY KEY (wallet, bucket)
+            ) WITHOUT ROWID
+        ''')
+    requested = os.environ.get(PARTITION_SIZE_ENV_VAR, "").strip()
+    if requested and int(requested) > 0:
+        cursor.execute("SELECT 1 FROM storage_layout WHERE key = 'partition_size'")
+        configured = cursor.fetchone() is not None
+        cursor.execute('SELECT COUNT(*) FROM blocks')
+        if not configured and cursor.fetchone()[0] == 0 and _archived_upto(cursor) < 0:
+            cursor.execute(
+                "INSERT INTO storage_layout (key, value) VALUES ('partition_size', ?)", (str(int(requested)),)
+            )
+            _partition_sizes.pop(DB_NAME, None)
     conn.commit()
     conn.close()
+    for number in list_partitions() if partition_size() else ():
+        conn = _connect_file(partition_path(number))
+        _ensure_blocks_schema(conn)
+        conn.commit()
+        conn.close()
+
 
-def insert_block(index, timestamp, data, previous_hash, hash_value):
-    conn = sqlite3.connect(DB_NAME)
+# Block partitions: with a partition size set, blocks live in
+# <db>.parts/blocks_<n>.db, file n holding indexes [n * size, (n + 1) * size).
+# The main file keeps users, wallets and the archive bookkeeping, so block
+# appends (which only touch the newest partition) never take the lock that
+# wallet updates need.
+
+def partition_size():
+    size = _partition_sizes.get(DB_NAME)
+    if size is None:
+        conn = _connect()
+        try:
+            row = conn.execute("SELECT value FROM storage_layout WHERE key = 'partition_size'").fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        finally:
+            conn.close()
+        size = int(row[0]) if row else 0
+        _partition_sizes[DB_NAME] = size
+    return size
+
+
+def partitions_dir():
+    return DB_NAME + ".parts"
+
+
+def partition_path(number):
+    return os.path.join(partitions_dir(), f"blocks_{int(number):06d}.db")
+
+
+def list_partitions():
+    try:
+        names = os.listdir(partitions_dir())
+    except OSError:
+        return []
+    numbers = []
+    for name in names:
+        if name.startswith("blocks_") and name.endswith(".db"):
+            try:
+                numbers.append(int(name[len("blocks_"):-len(".db")]))
+            except ValueError:
+                pass
+    return sorted(numbers)
+
+
+def _block_files(start_index=0, end_index=None):
+    # Files that can hold blocks in [start_index, end_index], in index order.
+    size = partition_size()
+    if not size:
+        return [DB_NAME]
+    lo = max(0, int(start_index)) // size
+    hi = None if end_index is None else int(end_index) // size
+    return [partition_path(n) for n in list_partitions() if n >= lo and (hi is None or n <= hi)]
+
+
+def _connect_blocks(index):
+    size = partition_size()
+    if not size:
+        return _connect()
+    path = partition_path(int(index) // size)
+    created = not os.path.exists(path)
+    if created:
+        os.makedirs(partitions_dir(), exist_ok=True)
+    conn = _connect_file(path)
+    if created:
+        if _wal:
+            conn.execute("PRAGMA journal_mode=WAL")
+        _ensure_blocks_schema(conn)
+        conn.commit()
+    return conn
+
+
+def _archived_upto(cursor):
+    cursor.execute('SELECT MAX(last_index) FROM archived_segments')
+    row = cursor.fetchone()
+    return -1 if row is None or row[0] is None else int(row[0])
+
+
+def get_archived_upto():
+    conn = _connect()
+    try:
+        return _archived_upto(conn.cursor())
+    finally:
+        conn.close()
+
+
+def _archived_rows(start_index, end_index):
+    from cold_storage import iter_archived_rows
+
+    return iter_archived_rows(start_index, end_index)
+
+@timed_query
+def insert_block(index, timestamp, data, previous_hash, hash_value, hash_scheme=0):
+    conn = _connect_blocks(index)
     cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO blocks ("index", timestamp, data, previous_hash, hash)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (index, timestamp, data, previous_hash, hash_value))
+    cursor.execute(_INSERT_BLOCK_SQL, (index, timestamp, data, previous_hash, hash_value, hash_scheme))
     conn.commit()
     conn.close()
 
+@timed_query
 def get_all_blocks():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute('SELECT "index", timestamp, data, previous_hash, hash FROM blocks ORDER BY "index"')
-    results = cursor.fetchall()
-    conn.close()
+    archived_upto = get_archived_upto()
+    results = []
+    if archived_upto >= 0:
+        results = list(_archived_rows(0, archived_upto))
+    for path in _block_files(archived_upto + 1):
+        conn = _connect_file(path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT "index", timestamp, data, previous_hash, hash, hash_scheme FROM blocks WHERE "index" > ? ORDER BY "index"',
+            (archived_upto,),
+        )
+        results.extend(cursor.fetchall())
+        conn.close()
     return results
 
+@timed_query
 def update_block_hashes(index, previous_hash, hash_value):
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect_blocks(index)
     cursor = conn.cursor()
     cursor.execute(
         'UPDATE blocks SET previous_hash = ?, hash = ? WHERE "index" = ?',
@@ -47,10 +280,353 @@ def update_block_hashes(index, previous_hash, hash_value):
     conn.commit()
     conn.close()
 
+@timed_query
 def is_database_empty():
-    conn = sqlite3.connect(DB_NAME)
+    if get_archived_upto() >= 0:
+        return False
+    for path in _block_files():
+        conn = _connect_file(path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM blocks')
+        count = cursor.fetchone()[0]
+        conn.close()
+        if count:
+            return False
+    return True
+
+
+@timed_query
+def get_last_block():
+    for path in reversed(_block_files()):
+        conn = _connect_file(path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT "index", hash FROM blocks ORDER BY "index" DESC LIMIT 1')
+        row = cursor.fetchone()
+        conn.close()
+        if row is not None:
+            return row
+    conn = _connect()
     cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM blocks')
-    count = cursor.fetchone()[0]
+    cursor.execute('SELECT "index", hash FROM block_headers ORDER BY "index" DESC LIMIT 1')
+    row = cursor.fetchone()
     conn.close()
-    return count == 0
+    return row
+
+
+@timed_query
+def get_hot_range():
+    """(count, first index, last index) of blocks not moved to cold segments."""
+    archived_upto = get_archived_upto()
+    count, first, last = 0, None, None
+    for path in _block_files(archived_upto + 1):
+        conn = _connect_file(path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), MIN("index"), MAX("index") FROM blocks WHERE "index" > ?', (archived_upto,))
+        n, lo, hi = cursor.fetchone()
+        conn.close()
+        if n:
+            count += n
+            first = lo if first is None else first
+            last = hi
+    return count, first, last
+
+
+@timed_query
+def delete_blocks(start_index, end_index):
+    size = partition_size()
+    for path in _block_files(start_index, end_index):
+        conn = _connect_file(path)
+        conn.execute('DELETE FROM blocks WHERE "index" BETWEEN ? AND ?', (int(start_index), int(end_index)))
+        conn.commit()
+        empty = conn.execute('SELECT COUNT(*) FROM blocks').fetchone()[0] == 0
+        conn.close()
+        # A partition whose whole range was removed is never written again.
+        number = int(os.path.basename(path)[len("blocks_"):-len(".db")]) if size else None
+        if size and empty and (number + 1) * size - 1 <= int(end_index):
+            os.remove(path)
+
+
+def iter_blocks(start_index=0, end_index=None, batch_size=10000):
+    # Streams rows in index order without materialising the table; rows that
+    # were moved to cold segments are read from there first.
+    archived_upto = get_archived_upto()
+    if archived_upto >= start_index:
+        last = archived_upto if end_index is None else min(archived_upto, int(end_index))
+        for row in _archived_rows(start_index, last):
+            yield row
+        start_index = archived_upto + 1
+        if end_index is not None and start_index > end_index:
+            return
+    for path in _block_files(start_index, end_index):
+        conn = _connect_file(path)
+        try:
+            cursor = conn.cursor()
+            if end_index is None:
+                cursor.execute(
+                    'SELECT "index", timestamp, data, previous_hash, hash, hash_scheme FROM blocks WHERE "index" >= ? ORDER BY "index"',
+                    (int(start_index),),
+                )
+            else:
+                cursor.execute(
+                    'SELECT "index", timestamp, data, previous_hash, hash, hash_scheme FROM blocks '
+                    'WHERE "index" >= ? AND "index" <= ? ORDER BY "index"',
+                    (int(start_index), int(end_index)),
+                )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            conn.close()
+
+
+@timed_query
+def insert_blocks(rows):
+    # Rows arrive in index order; each run that falls in one partition is
+    # written in a single transaction on that partition's file. Rows without
+    # a hash_scheme column are legacy blocks.
+    size = partition_size()
+    groups = []
+    for row in rows:
+        if len(row) == 5:
+            row = (*row, 0)
+        key = int(row[0]) // size if size else 0
+        if not groups or groups[-1][0] != key:
+            groups.append((key, []))
+        groups[-1][1].append(row)
+    for _, group in groups:
+        conn = _connect_blocks(group[0][0])
+        cursor = conn.cursor()
+        cursor.executemany(_INSERT_BLOCK_SQL, group)
+        conn.commit()
+        conn.close()
+
+
+_UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def _row_epoch(timestamp):
+    # What _EPOCH_SQL computes, for rows read back from cold segments.
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    return int((parsed.replace(tzinfo=None) - _UNIX_EPOCH).total_seconds())
+
+
+def iter_blocks_between(since=None, until=None, batch_size=10000):
+    # Rows with since <= ts_epoch < until in index order. Hot rows are found
+    # through the ts_epoch index; segments carry no such column, so rows
+    # moved to cold storage are scanned and filtered here.
+    archived_upto = get_archived_upto()
+    if archived_upto >= 0:
+        for row in _archived_rows(0, archived_upto):
+            epoch = _row_epoch(row[1])
+            if epoch is not None and (since is None or epoch >= since) and (until is None or epoch < until):
+                yield row
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("ts_epoch >= ?")
+        params.append(int(since))
+    if until is not None:
+        clauses.append("ts_epoch < ?")
+        params.append(int(until))
+    where = " AND ".join(clauses) or "ts_epoch IS NOT NULL"
+    for path in _block_files(0):
+        conn = _connect_file(path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT "index", timestamp, data, previous_hash, hash, hash_scheme FROM blocks '
+                f'WHERE {where} ORDER BY "index"',
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            conn.close()
+
+
+@timed_query
+def get_block_hash(index):
+    if int(index) < 0:
+        return None
+    row = None
+    if not partition_size() or os.path.exists(partition_path(int(index) // partition_size())):
+        conn = _connect_blocks(index)
+        cursor = conn.cursor()
+        cursor.execute('SELECT hash FROM blocks WHERE "index" = ?', (int(index),))
+        row = cursor.fetchone()
+        conn.close()
+    if row is None:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT hash FROM block_headers WHERE "index" = ?', (int(index),))
+        row = cursor.fetchone()
+        conn.close()
+    return row[0] if row else None
+
+
+@timed_query
+def get_mmr_size():
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM mmr_nodes')
+    size = cursor.fetchone()[0]
+    conn.close()
+    return size
+
+
+@timed_query
+def get_mmr_nodes(positions):
+    positions = [int(p) for p in positions]
+    if not positions:
+        return {}
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        f'SELECT pos, hash FROM mmr_nodes WHERE pos IN ({",".join("?" * len(positions))})', positions
+    )
+    nodes = dict(cursor.fetchall())
+    conn.close()
+    return nodes
+
+
+@timed_query
+def append_mmr_nodes(rows):
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.executemany('INSERT INTO mmr_nodes (pos, hash) VALUES (?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+@timed_query
+def clear_mmr():
+    conn = _connect()
+    conn.execute('DELETE FROM mmr_nodes')
+    conn.commit()
+    conn.close()
+
+
+@timed_query
+def get_layout_value(key, default=None):
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT value FROM storage_layout WHERE key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return default if row is None else row[0]
+
+
+@timed_query
+def get_activity_state():
+    """(blocks rolled up, hash of the last one) for the activity tables."""
+    conn = _connect()
+    rows = dict(conn.execute(
+        "SELECT key, value FROM storage_layout WHERE key IN ('activity_height', 'activity_tail')"
+    ).fetchall())
+    conn.close()
+    return int(rows.get("activity_height", 0)), rows.get("activity_tail")
+
+
+@timed_query
+def apply_activity(buckets, height, tail_hash):
+    """
+    Add {(granularity, wallet, bucket): [count, inflow, outflow]} to the
+    rollups and record the new height in the same transaction, so a crash
+    never counts a block twice.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    for granularity, table in _ACTIVITY_TABLES.items():
+        cursor.executemany(
+            f'''INSERT INTO {table} (wallet, bucket, tx_count, inflow, outflow) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (wallet, bucket) DO UPDATE SET
+                   tx_count = tx_count + excluded.tx_count,
+                   inflow = inflow + excluded.inflow,
+                   outflow = outflow + excluded.outflow''',
+            [(w, b, c, i, o) for (g, w, b), (c, i, o) in buckets.items() if g == granularity],
+        )
+    cursor.executemany(
+        "INSERT OR REPLACE INTO storage_layout (key, value) VALUES (?, ?)",
+        [("activity_height", str(height)), ("activity_tail", tail_hash)],
+    )
+    conn.commit()
+    conn.close()
+
+
+@timed_query
+def get_activity(granularity, wallet, first_bucket, last_bucket):
+    table = _ACTIVITY_TABLES[granularity]
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        f'SELECT bucket, tx_count, inflow, outflow FROM {table} WHERE wallet = ? AND bucket BETWEEN ? AND ?',
+        (wallet, first_bucket, last_bucket),
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+@timed_query
+def clear_activity():
+    conn = _connect()
+    for table in _ACTIVITY_TABLES.values():
+        conn.execute(f'DELETE FROM {table}')
+    conn.execute("DELETE FROM storage_layout WHERE key IN ('activity_height', 'activity_tail')")
+    conn.commit()
+    conn.close()
+
+
+def partition_blocks(size, batch_size=50000):
+    """
+    Move the blocks table of an unpartitioned database into range partitions
+    of `size` blocks. Rows are copied first and only removed from the main
+    file in the transaction that records the layout, so an interrupted run
+    leaves the database as it was. Returns the number of blocks moved.
+    """
+    size = int(size)
+    if size <= 0:
+        raise ValueError("partition size must be positive")
+    init_database()
+    if partition_size():
+        raise RuntimeError("blocks are already partitioned")
+    for n in list_partitions():
+        os.remove(partition_path(n))
+
+    moved = 0
+    _partition_sizes[DB_NAME] = size
+    try:
+        conn = _connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT "index", timestamp, data, previous_hash, hash, hash_scheme FROM blocks ORDER BY "index"')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                insert_blocks(rows)
+                moved += len(rows)
+        finally:
+            conn.close()
+    finally:
+        _partition_sizes.pop(DB_NAME, None)
+
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO storage_layout (key, value) VALUES ('partition_size', ?)", (str(size),))
+        conn.execute("DELETE FROM blocks")
+        conn.commit()
+    finally:
+        conn.close()
+    _partition_sizes[DB_NAME] = size
+    return moved
@@ -0,0 +1,55 @@
+import itertools
+import threading
+
+
+# Event kinds. Events are small dicts with a "kind" key:
+#   block     {"kind", "index", "hash", "from", "to", "amount", "time"}
+#   balance   {"kind", "wallet", "balance"}
+#   integrity {"kind", "valid", "source", "divergences"}
+BLOCK = "block"
+BALANCE = "balance"
+INTEGRITY = "integrity"
+
+
+class EventHub:
+    """
+    In-process change notifications. A subscriber passes a callback and,
+    optionally, the wallets and kinds it wants; events published for other
+    wallets are not delivered to it, while events published without wallets
+    (integrity changes) go to everyone. Callbacks run synchronously on the
+    publishing thread, so they should only hand the event off.
+    """
+
+    def __init__(self):
+        self._subs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, wallets=None, kinds=None) -> int:
+        wallets = None if wallets is None else frozenset(wallets)
+        kinds = None if kinds is None else frozenset(kinds)
+        with self._lock:
+            sub_id = next(self._ids)
+            self._subs[sub_id] = (callback, wallets, kinds)
+        return sub_id
+
+    def unsubscribe(self, sub_id) -> bool:
+        with self._lock:
+            return self._subs.pop(sub_id, None) is not None
+
+    def __bool__(self):
+        return bool(self._subs)
+
+    def publish(self, event: dict, wallets=None):
+        with self._lock:
+            subs = list(self._subs.values())
+        for callback, wallet_filter, kinds in subs:
+            if kinds is not None and event["kind"] not in kinds:
+                continue
+            if wallets is not None and wallet_filter is not None and wallet_filter.isdisjoint(wallets):
+                continue
+            try:
+                callback(event)
+            except Exception:
+                # A broken subscriber must not fail the write that published.
+                pass
@@ -1,18 +1,15 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import sys
 import os
+import queue
+import threading
+from functools import partial
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.append(current_dir)
 
-try:
-    from ledger_api import LedgerAPI
-except ImportError as e:
-    messagebox.showerror("Critical Error", f"Could not find 'ledger_api.py'.\n\nError: {e}")
-    sys.exit(1)
-
 COLORS = {
     "brand": "#15803D",
     "brand_dark": "#14532D", 
@@ -82,6 +79,229 @@ class ActivityChart(tk.Canvas):
         for x, y in points:
             self.create_oval(x-4, y-4, x+4, y+4, fill="white", outline=COLORS["brand"], width=2)
 
+class VirtualTable(tk.Frame):
+    """
+    Treeview over a result set that may be far larger than the screen. Only
+    the rows that fit are kept as items; scrolling rewrites their values in
+    place. Rows are fetched a page at a time through
+    `fetch(offset, limit, done)`, which must eventually call
+    `done(total, rows)` on the Tk thread; the next page is requested once
+    the view comes within `margin` rows of it.
+    """
+
+    PAGE = 200
+    PLACEHOLDER = "…"
+
+    def __init__(self, parent, columns, height=10, margin=50, bg=None):
+        super().__init__(parent, bg=bg)
+        self.columns = columns
+        self.margin = margin
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height)
+        self.scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<Configure>", lambda e: self._refresh())
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self._visible_rows()))
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self._visible_rows()))
+        self.fetch = None
+        self.total = 0
+        self.first = 0
+        self._pages = {}
+        self._requested = set()
+        self._epoch = 0
+
+    def heading(self, column, **kw):
+        self.tree.heading(column, **kw)
+
+    def column(self, column, **kw):
+        self.tree.column(column, **kw)
+
+    def load(self, fetch):
+        """Show a new result set; replies for the previous one are ignored."""
+        self._epoch += 1
+        self.fetch = fetch
+        self.total = 0
+        self.first = 0
+        self._pages.clear()
+        self._requested.clear()
+        self._request(0)
+        self._refresh()
+
+    def append(self, row):
+        """Add a row at the end without refetching; unloaded pages pick it up when fetched."""
+        page = self.total // self.PAGE
+        if page in self._pages:
+            self._pages[page].append(row)
+        self.total += 1
+        self._refresh()
+
+    def scroll_by(self, rows):
+        self.first += rows
+        self._refresh()
+        return "break"
+
+    def _on_wheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.first = int(float(amount) * self.total)
+        elif unit == "pages":
+            self.first += int(amount) * self._visible_rows()
+        else:
+            self.first += int(amount)
+        self._refresh()
+
+    def _visible_rows(self) -> int:
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        items = self.tree.get_children()
+        box = self.tree.bbox(items[0]) if items else None
+        top = box[1] if box else row_height
+        return max(1, (self.tree.winfo_height() - top) // row_height)
+
+    def _request(self, page):
+        if self.fetch is None or page in self._pages or page in self._requested:
+            return
+        if page and page * self.PAGE >= self.total:
+            return
+        self._requested.add(page)
+        epoch = self._epoch
+        self.fetch(page * self.PAGE, self.PAGE, lambda total, rows: self._arrived(epoch, page, total, rows))
+
+    def _arrived(self, epoch, page, total, rows):
+        if epoch != self._epoch or not self.winfo_exists():
+            return
+        self._requested.discard(page)
+        self._pages[page] = rows
+        self.total = total
+        self._refresh()
+
+    def _row(self, i):
+        rows = self._pages.get(i // self.PAGE)
+        if rows is None:
+            self._request(i // self.PAGE)
+            return None
+        offset = i % self.PAGE
+        return rows[offset] if offset < len(rows) else None
+
+    def _refresh(self):
+        visible = self._visible_rows()
+        self.first = max(0, min(self.first, self.total - visible))
+        count = min(visible, self.total - self.first)
+        items = list(self.tree.get_children())
+        for iid in items[count:]:
+            self.tree.delete(iid)
+        while len(items) < count:
+            items.append(self.tree.insert("", "end"))
+        self.tree.selection_remove(self.tree.selection())
+        blank = (self.PLACEHOLDER,) * len(self.columns)
+        for k, iid in enumerate(items[:count]):
+            self.tree.item(iid, values=self._row(self.first + k) or blank)
+        if self.total:
+            self.scroll.set(self.first / self.total, min(1.0, (self.first + visible) / self.total))
+            # Prefetch the pages on either side once the view is within the margin.
+            self._request((self.first + count + self.margin) // self.PAGE)
+            self._request(max(0, self.first - self.margin) // self.PAGE)
+        else:
+            self.scroll.set(0.0, 1.0)
+
+
+class Dispatcher:
+    """
+    Runs ledger calls on a small pool of worker threads and hands the
+    results back on the Tk thread through after(). Each call is tagged with
+    the generation it was submitted in; cancel() starts a new generation, so
+    calls still queued are skipped and results of calls already running are
+    dropped instead of painting into a view that is gone.
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, root, workers=3, on_busy=None):
+        self.root = root
+        self.on_busy = on_busy
+        self.generation = 0
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._active = {}  # job id -> label, for the busy indicator
+        self._next_id = 0
+        self._outstanding = 0
+        self._polling = False
+        for n in range(workers):
+            threading.Thread(target=self._work, name=f"svwen-gui-{n}", daemon=True).start()
+
+    def submit(self, call, on_done=None, on_error=None, label=None, scoped=True):
+        """
+        Run `call()` on a worker. `on_done(result)` or `on_error(exc)` runs on
+        the Tk thread; unscoped calls survive cancel().
+        """
+        self._next_id += 1
+        job = (self._next_id, self.generation if scoped else None, call, on_done, on_error)
+        self._outstanding += 1
+        self._active[self._next_id] = label
+        self._jobs.put(job)
+        self._notify()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+        return self._next_id
+
+    def cancel(self):
+        self.generation += 1
+        for job_id in self._active:
+            self._active[job_id] = None
+        self._notify()
+
+    def _stale(self, generation) -> bool:
+        return generation is not None and generation != self.generation
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if self._stale(job[1]):
+                self._results.put((job, None, None))
+                continue
+            try:
+                self._results.put((job, job[2](), None))
+            except Exception as e:
+                self._results.put((job, None, e))
+
+    def _poll(self):
+        while True:
+            try:
+                (job_id, generation, _, on_done, on_error), value, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            self._active.pop(job_id, None)
+            if self._stale(generation):
+                continue
+            try:
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                    else:
+                        messagebox.showerror("Error", str(error))
+                elif on_done is not None:
+                    on_done(value)
+            except tk.TclError:
+                # The widgets the result was meant for were closed meanwhile.
+                pass
+        self._notify()
+        if self._outstanding:
+            self.root.after(self.POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _notify(self):
+        if self.on_busy is not None:
+            labels = [label for label in self._active.values() if label]
+            self.on_busy(labels[-1] if labels else None)
+
+
 class SVWENApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -92,13 +312,113 @@ class SVWENApp(tk.Tk):
         
         self.center_window()
         
-        self.api = LedgerAPI()
+        # The ledger (SQLite, chain load) is opened on a background thread so
+        # the login window paints first; ledger_api is imported there too.
+        self.api = None
+        self._ledger_error = None
+        self._ledger_thread = threading.Thread(target=self._open_ledger, daemon=True)
+        self._ledger_thread.start()
         
         self.token = None
         self.username = None
+        # Ledger calls made from the UI run on the dispatcher's workers.
+        self.dispatcher = Dispatcher(self, on_busy=self._set_busy)
+        self.busy_bar = None
+        self.busy_label = None
+        # Ledger change events arrive on whichever thread made the change and
+        # are handed to the Tk thread through this queue.
+        self.wallet_address = None
+        self.subscription = None
+        self._events = queue.Queue()
         
         self.setup_styles()
         self.show_login()
+        self.after(50, self._poll_ledger_ready)
+
+    def _open_ledger(self):
+        try:
+            from ledger_api import LedgerAPI
+            self.api = LedgerAPI(seed=False)
+        except Exception as e:
+            self._ledger_error = e
+
+    def _poll_ledger_ready(self):
+        if self._ledger_thread.is_alive():
+            self.after(50, self._poll_ledger_ready)
+            return
+        if self._ledger_error is not None:
+            messagebox.showerror("Critical Error", f"Could not open the ledger.\n\nError: {self._ledger_error}")
+            self.destroy()
+            return
+        self._set_login_status("")
+        if self.api.needs_setup():
+            self._offer_setup()
+
+    def _build_busy_bar(self, parent, bg):
+        bar = tk.Frame(parent, bg=bg)
+        self.busy_bar = ttk.Progressbar(bar, mode="indeterminate", length=160)
+        self.busy_label = tk.Label(bar, text="", bg=bg, fg=COLORS["text_secondary"], font=FONT_BODY)
+        self.busy_label.pack(side="left", padx=(0, 10))
+        return bar
+
+    def _set_busy(self, text):
+        bar = self.busy_bar
+        if bar is None or not bar.winfo_exists():
+            return
+        if text:
+            self.busy_label.config(text=text)
+            if not bar.winfo_ismapped():
+                bar.pack(side="left")
+                bar.start(15)
+        else:
+            self.busy_label.config(text="")
+            bar.stop()
+            bar.pack_forget()
+
+    def _set_login_status(self, text):
+        label = getattr(self, "login_status", None)
+        if label is not None and label.winfo_exists():
+            label.config(text=text)
+
+    def _offer_setup(self):
+        self._set_login_status("No accounts yet. Run first-time setup to create them.")
+        frame = getattr(self, "login_frame", None)
+        if frame is None or not frame.winfo_exists():
+            return
+        self.setup_btn = tk.Button(frame, text="Run First-Time Setup", bg=COLORS["text_secondary"], fg="white",
+                                   font=FONT_BOLD, relief="flat", pady=8, command=self.run_setup)
+        self.setup_btn.pack(fill="x", pady=(10, 0))
+
+    def run_setup(self):
+        self.setup_btn.config(state="disabled")
+        self._set_login_status("Creating accounts...")
+        result = {}
+
+        def work():
+            try:
+                result["info"] = self.api.setup()
+            except Exception as e:
+                result["error"] = e
+
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+
+        def poll():
+            if worker.is_alive():
+                self.after(50, poll)
+                return
+            if "error" in result:
+                self.setup_btn.config(state="normal")
+                self._set_login_status("")
+                messagebox.showerror("Setup Failed", str(result["error"]))
+                return
+            self.setup_btn.destroy()
+            self._set_login_status("")
+            created = result["info"].get("created") or {}
+            lines = [f"{name}: {u.get('seed_password')}" for name, u in created.items()]
+            messagebox.showinfo("Setup Complete", "Accounts created:\n\n" + "\n".join(lines))
+
+        self.after(50, poll)
 
     def center_window(self):
         self.update_idletasks()
@@ -129,10 +449,13 @@ class SVWENApp(tk.Tk):
             widget.destroy()
 
     def show_login(self):
+        self.dispatcher.cancel()
+        self._end_session()
         self.clear_screen()
         
         frame = ttk.Frame(self)
         frame.place(relx=0.5, rely=0.5, anchor="center")
+        self.login_frame = frame
         
         tk.Label(frame, text="SVWEN", font=("Segoe UI", 36, "bold"), fg=COLORS["brand"], bg=COLORS["bg"]).pack(pady=(0, 10))
         tk.Label(frame, text="Private Crypto Dashboard", font=("Segoe UI", 12), fg=COLORS["text_secondary"], bg=COLORS["bg"]).pack(pady=(0, 40))
@@ -146,21 +469,113 @@ class SVWENApp(tk.Tk):
         tk.Label(frame, text="Password", bg=COLORS["bg"], fg=COLORS["text_primary"], font=FONT_BOLD).pack(anchor="w")
         ttk.Entry(frame, textvariable=self.pass_var, show="•", width=35, font=("Segoe UI", 11)).pack(pady=(5, 25))
         
-        btn = tk.Button(frame, text="Sign In", bg=COLORS["brand"], fg="white", font=FONT_BOLD, 
-                        relief="flat", pady=10, command=self.process_login)
-        btn.pack(fill="x")
+        self.login_btn = tk.Button(frame, text="Sign In", bg=COLORS["brand"], fg="white", font=FONT_BOLD, 
+                                   relief="flat", pady=10, command=self.process_login)
+        self.login_btn.pack(fill="x")
+
+        self.login_status = tk.Label(frame, text="" if self.api is not None else "Loading ledger...",
+                                     bg=COLORS["bg"], fg=COLORS["text_secondary"], font=FONT_BODY)
+        self.login_status.pack(pady=(10, 0))
+        self._build_busy_bar(frame, COLORS["bg"]).pack(pady=(10, 0))
 
     def process_login(self):
+        if self.api is None:
+            messagebox.showinfo("Please Wait", "The ledger is still loading.")
+            return
         u = self.user_var.get()
         p = self.pass_var.get()
-        
-        res = self.api.login(u, p)
+
+        self.login_btn.config(state="disabled")
+
+        def done(res):
+            self.login_btn.config(state="normal")
+            if res.get("ok"):
+                self.token = res["token"]
+                self.username = res["username"]
+                self.dispatcher.submit(partial(self.api.subscribe, self.token, self._events.put),
+                                       on_done=self._start_session, label="Signing in...")
+            else:
+                messagebox.showerror("Login Failed", res.get("error", "Invalid Credentials"))
+
+        def failed(e):
+            self.login_btn.config(state="normal")
+            messagebox.showerror("Login Failed", str(e))
+
+        self.dispatcher.submit(partial(self.api.login, u, p), on_done=done, on_error=failed, label="Signing in...")
+
+    def _start_session(self, res):
         if res.get("ok"):
-            self.token = res["token"]
-            self.username = res["username"]
-            self.show_dashboard_layout()
+            self.subscription = res["subscription"]
+            self.wallet_address = res["wallet_address"]
+            self.after(100, self._drain_events, self.subscription)
+        self.show_dashboard_layout()
+
+    def _end_session(self):
+        if self.subscription is not None:
+            self.dispatcher.submit(partial(self.api.unsubscribe, self.token, self.subscription),
+                                   on_error=lambda e: None, scoped=False)
+        self.subscription = None
+        self.wallet_address = None
+        self.token = None
+
+    def _drain_events(self, subscription):
+        # Only drains the local queue; nothing is asked of the ledger here.
+        if subscription != self.subscription:
+            return
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self._on_ledger_event(event)
+            except tk.TclError:
+                pass
+        self.after(100, self._drain_events, subscription)
+
+    def _live(self, name):
+        widget = getattr(self, name, None)
+        return widget if widget is not None and widget.winfo_exists() else None
+
+    def _on_ledger_event(self, event):
+        kind = event["kind"]
+        if kind == "balance":
+            if event["wallet"] != self.wallet_address:
+                return
+            if self._live("balance_label"):
+                self.balance_label.config(text=f"${event['balance']}")
+            if self._live("wallet_balance_label"):
+                self.wallet_balance_label.config(text=f"{event['balance']} SOL")
+        elif kind == "block":
+            mine = self.wallet_address in (event["from"], event["to"])
+            if not mine:
+                return
+            chart = self._live("activity_chart")
+            if chart is not None:
+                chart.data[-1] += 1
+                chart.draw_chart()
+            tree = self._live("recent_tree")
+            if tree is not None and len(tree.get_children()) < 5:
+                tree.insert("", "end", values=self._recent_row(event["from"], event["to"], event["time"], event["amount"]))
+            if self._live("history_table"):
+                self.history_table.append((event["time"], event["from"], event["to"], f"{event['amount']} SOL"))
+        elif kind == "integrity":
+            self._show_integrity(event["valid"], event.get("divergences"))
+
+    def _show_integrity(self, valid, divergences=None):
+        label = self._live("integrity_label")
+        if label is None:
+            return
+        if valid:
+            label.config(text="● Ledger valid", fg="white")
         else:
-            messagebox.showerror("Login Failed", res.get("error", "Invalid Credentials"))
+            detail = f" ({divergences} divergences)" if divergences else ""
+            label.config(text=f"● Ledger compromised{detail}", fg="#FECACA")
+
+    def _recent_row(self, sender, receiver, time, amount):
+        t_type = "Received" if receiver == self.wallet_address else "Sent"
+        party = sender if t_type == "Received" else receiver
+        return (t_type, party, time or "N/A", f"{amount} SOL")
 
     def show_dashboard_layout(self):
         self.clear_screen()
@@ -189,7 +604,13 @@ class SVWENApp(tk.Tk):
                             font=("Segoe UI", 13, "bold"), 
                             fg="white", bg=COLORS["brand"],
                             padx=18, pady=10)
-        user_label.pack()
+        user_label.pack(side="right")
+
+        self.integrity_label = tk.Label(user_frame, text="", font=FONT_BOLD, fg="white", bg=COLORS["brand"])
+        self.integrity_label.pack(side="right", padx=(0, 10))
+        self.dispatcher.submit(partial(self.api.integrity_status, self.token),
+                               on_done=lambda res: res.get("ok") and self._show_integrity(res["is_valid"]),
+                               on_error=lambda e: None, scoped=False)
         
         sidebar = ttk.Frame(self, style="Sidebar.TFrame", width=250)
         sidebar.pack(side="left", fill="y")
@@ -220,6 +641,9 @@ class SVWENApp(tk.Tk):
 
         self.main_area = ttk.Frame(self)
         self.main_area.pack(side="right", fill="both", expand=True)
+
+        status_bar = self._build_busy_bar(self.main_area, COLORS["bg"])
+        status_bar.pack(side="bottom", fill="x", padx=30, pady=(0, 10))
         
         self.content_frame = ttk.Frame(self.main_area, padding=30)
         self.content_frame.pack(fill="both", expand=True)
@@ -227,6 +651,8 @@ class SVWENApp(tk.Tk):
         self.render_dashboard()
 
     def switch_view(self, view_name):
+        # Results still on their way belong to the view being left.
+        self.dispatcher.cancel()
         for widget in self.content_frame.winfo_children():
             widget.destroy()
             
@@ -236,9 +662,6 @@ class SVWENApp(tk.Tk):
         elif view_name == "Wallet": self.render_wallet()
 
     def render_dashboard(self):
-        me = self.api.me(self.token)
-        balance = me.get("balance", "0.00")
-        
         # Enhanced cards container with better spacing
         cards_container = tk.Frame(self.content_frame, bg=COLORS["bg"])
         cards_container.pack(fill="x", pady=(0, 25))
@@ -256,9 +679,15 @@ class SVWENApp(tk.Tk):
                  font=("Segoe UI", 12), fg=COLORS["light_green"], 
                  bg=COLORS["brand"]).pack(anchor="w", pady=(0, 5))
         
-        tk.Label(balance_content, text=f"${balance}", 
-                 font=("Segoe UI", 28, "bold"), fg="white", 
-                 bg=COLORS["brand"]).pack(anchor="w", pady=(5, 15))
+        self.balance_label = balance_label = tk.Label(balance_content, text="$...", 
+                                                      font=("Segoe UI", 28, "bold"), fg="white", 
+                                                      bg=COLORS["brand"])
+        balance_label.pack(anchor="w", pady=(5, 15))
+        self.dispatcher.submit(
+            partial(self.api.me, self.token),
+            on_done=lambda me: balance_label.config(text=f"${me.get('balance', '0.00')}"),
+            label="Loading balance...",
+        )
         
         # Activity card with enhanced styling
         activity_card = tk.Frame(cards_container, bg=COLORS["card_bg"], relief="flat", bd=1, highlightbackground=COLORS["border"])
@@ -273,8 +702,16 @@ class SVWENApp(tk.Tk):
                  font=("Segoe UI", 12), fg=COLORS["text_secondary"], 
                  bg=COLORS["card_bg"]).pack(anchor="w", pady=(0, 5))
         
-        chart = ActivityChart(activity_content, width=400, height=100, data=[10, 25, 18, 40, 35, 60, 55])
+        self.activity_chart = chart = ActivityChart(activity_content, width=400, height=100, data=[0] * 7)
         chart.pack(pady=(10, 0))
+
+        def fill_chart(res):
+            if res.get("ok"):
+                chart.data = [b["count"] for b in res["series"]]
+                chart.draw_chart()
+
+        self.dispatcher.submit(partial(self.api.activity_series, self.token, 7), on_done=fill_chart,
+                               on_error=lambda e: None, label="Loading activity...")
         
         # Quick Actions section
         quick_actions_frame = tk.Frame(self.content_frame, bg=COLORS["card_bg"], relief="flat", bd=1, highlightbackground=COLORS["border"])
@@ -320,7 +757,7 @@ class SVWENApp(tk.Tk):
         
         # Enhanced treeview with better styling
         cols = ("Type", "Counterparty", "Date", "Amount")
-        tree = ttk.Treeview(transactions_frame, columns=cols, show="headings", height=8)
+        self.recent_tree = tree = ttk.Treeview(transactions_frame, columns=cols, show="headings", height=8)
         
         style = ttk.Style()
         style.configure("Treeview.Heading", font=("Segoe UI", 11, "bold"), 
@@ -342,15 +779,14 @@ class SVWENApp(tk.Tk):
         tree.pack(fill="both", expand=True, pady=(15, 0))
 
         # Load recent transactions
-        try:
-            res = self.api.search_transactions(self.token, self.username)
+        def fill_recent(res):
             if res.get("ok"):
-                for tx_wrap in res.get("transactions", [])[:5]:
+                for tx_wrap in res.get("transactions", []):
                     tx = tx_wrap["tx"]
-                    t_type = "Received" if tx["To"] == self.username else "Sent"
-                    party = tx["From"] if t_type == "Received" else tx["To"]
-                    tree.insert("", "end", values=(t_type, party, tx.get("Time", "N/A"), f"{tx['Amount']} SOL"))
-        except: pass
+                    tree.insert("", "end", values=self._recent_row(tx["From"], tx["To"], tx.get("Time"), tx["Amount"]))
+
+        self.dispatcher.submit(partial(self.api.search_transactions, self.token, self.username, limit=5),
+                               on_done=fill_recent, on_error=lambda e: None, label="Loading transactions...")
 
     def render_transactions(self):
         container = tk.Frame(self.content_frame, bg=COLORS["card_bg"], relief="flat", bd=1, highlightbackground=COLORS["border"])
@@ -358,7 +794,7 @@ class SVWENApp(tk.Tk):
         
         # Form content with better spacing and visibility
         form_content = tk.Frame(container, bg=COLORS["card_bg"])
-        form_content.pack(fill="both", expand=True, padx=40, pady=40)
+        form_content.pack(fill="x", padx=40, pady=(30, 20))
         
         tk.Label(form_content, text="💸 Send SOL", font=FONT_H2, 
                  fg=COLORS["text_primary"], bg=COLORS["card_bg"]).pack(anchor="w", pady=(0, 20))
@@ -384,21 +820,85 @@ class SVWENApp(tk.Tk):
         self.tx_amt.pack(fill="x", ipady=10)
         
         # Submit button with better visibility
-        btn = tk.Button(form_content, text="Confirm Transfer", bg=COLORS["brand"], fg="white", 
-                       font=FONT_BOLD, relief="flat", pady=15, padx=30, 
-                       command=self.do_transfer, cursor="hand2")
-        btn.pack(fill="x", pady=(10, 0))
+        self.tx_btn = tk.Button(form_content, text="Confirm Transfer", bg=COLORS["brand"], fg="white", 
+                                font=FONT_BOLD, relief="flat", pady=15, padx=30, 
+                                command=self.do_transfer, cursor="hand2")
+        self.tx_btn.pack(fill="x", pady=(10, 0))
+
+        history_frame = tk.Frame(container, bg=COLORS["card_bg"])
+        history_frame.pack(fill="both", expand=True, padx=40, pady=(0, 30))
+
+        history_header = tk.Frame(history_frame, bg=COLORS["card_bg"])
+        history_header.pack(fill="x", pady=(0, 10))
+        tk.Label(history_header, text="History", font=("Segoe UI", 12, "bold"),
+                 fg=COLORS["text_secondary"], bg=COLORS["card_bg"]).pack(side="left")
+        tk.Button(history_header, text="Export Statement", bg=COLORS["text_secondary"], fg="white", font=FONT_BOLD,
+                  relief="flat", padx=12, command=self.do_export, cursor="hand2").pack(side="right")
+
+        cols = ("Time", "From", "To", "Amount")
+        self.history_table = VirtualTable(history_frame, cols, height=6, bg=COLORS["card_bg"])
+        for col in cols:
+            self.history_table.heading(col, text=col, anchor="w")
+        self.history_table.pack(fill="both", expand=True)
+        self._load_history()
+
+    def _load_history(self):
+        def to_row(tx):
+            return (tx.get("Time", "N/A"), tx["From"], tx["To"], f"{tx['Amount']} SOL")
+
+        self.history_table.load(self._paged(partial(self.api.my_transactions, self.token), to_row,
+                                            "Loading history..."))
+
+    def do_export(self):
+        path = filedialog.asksaveasfilename(title="Export Statement", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        fmt = "jsonl" if path.lower().endswith(".jsonl") else "csv"
+
+        def export():
+            with open(path, "w", encoding="utf-8", newline="") as out:
+                return self.api.export_statement(self.token, out, fmt)
+
+        def done(res):
+            if res.get("ok"):
+                messagebox.showinfo("Statement Exported", f"{res['rows']} transactions written to\n{path}")
+            else:
+                messagebox.showerror("Error", res.get("error"))
+
+        # Not scoped to the view: the file is written either way, so report it.
+        self.dispatcher.submit(export, on_done=done,
+                               on_error=lambda e: messagebox.showerror("Error", str(e)),
+                               label="Exporting statement...", scoped=False)
 
     def do_transfer(self):
         u = self.tx_user.get()
         a = self.tx_amt.get()
-        res = self.api.send_sol_to_username(self.token, u, a)
-        if res.get("ok"):
-            messagebox.showinfo("Success", f"Sent {a} SOL to {u}\nTxHash: {res.get('tx_hash')}")
-            self.tx_user.delete(0, 'end')
-            self.tx_amt.delete(0, 'end')
-        else:
-            messagebox.showerror("Error", res.get("error"))
+        self.tx_btn.config(state="disabled")
+
+        # The form may be gone by the time the transfer settles; only touch it if not.
+        def reset_form(sent):
+            if self._live("tx_btn"):
+                self.tx_btn.config(state="normal")
+                if sent:
+                    self.tx_user.delete(0, 'end')
+                    self.tx_amt.delete(0, 'end')
+                    self._load_history()
+
+        def done(res):
+            if res.get("ok"):
+                messagebox.showinfo("Success", f"Sent {a} SOL to {u}\nTxHash: {res.get('tx_hash')}")
+            else:
+                messagebox.showerror("Error", res.get("error"))
+            reset_form(res.get("ok"))
+
+        def failed(e):
+            messagebox.showerror("Error", str(e))
+            reset_form(False)
+
+        # Not scoped to the view: the transfer happens either way, so report it.
+        self.dispatcher.submit(partial(self.api.send_sol_to_username, self.token, u, a),
+                               on_done=done, on_error=failed, label="Sending transfer...", scoped=False)
 
     def render_search(self):
         search_container = tk.Frame(self.content_frame, bg=COLORS["card_bg"], relief="flat", bd=1, highlightbackground=COLORS["border"])
@@ -429,7 +929,7 @@ class SVWENApp(tk.Tk):
         tk.Label(results_container, text="Search Results", font=("Segoe UI", 12, "bold"), 
                  fg=COLORS["text_secondary"], bg=COLORS["card_bg"]).pack(anchor="w", pady=(0, 10))
         
-        self.results_tree = ttk.Treeview(results_container, columns=("Hash", "From", "To", "Amount"), show="headings", height=10)
+        self.results_tree = VirtualTable(results_container, ("Hash", "From", "To", "Amount"), height=10, bg=COLORS["card_bg"])
         self.results_tree.heading("Hash", text="Tx Hash")
         self.results_tree.heading("From", text="From")
         self.results_tree.heading("To", text="To")
@@ -449,19 +949,33 @@ class SVWENApp(tk.Tk):
 
     def do_search(self):
         q = self.search_var.get()
-        res = self.api.search_transactions(self.token, q)
-        for i in self.results_tree.get_children(): self.results_tree.delete(i)
-        
-        if res.get("ok"):
-            for tx_wrap in res.get("transactions", []):
-                tx = tx_wrap["tx"]
-                self.results_tree.insert("", "end", values=(tx["TxHash"], tx["From"], tx["To"], tx["Amount"]))
-        else:
+
+        def to_row(tx):
+            return (tx["TxHash"], tx["From"], tx["To"], tx["Amount"])
+
+        def failed(res):
             messagebox.showinfo("Info", "No transactions found.")
 
+        self.results_tree.load(self._paged(partial(self.api.search_transactions, self.token, q), to_row,
+                                           "Searching...", failed))
+
+    def _paged(self, call, to_row, label, on_failure=None):
+        """
+        VirtualTable fetch function over a paged API method: `call` gets
+        offset= and limit= and returns {"ok", "total", "transactions"}.
+        """
+        def fetch(offset, limit, done):
+            def arrived(res):
+                if res.get("ok"):
+                    done(res.get("total", 0), [to_row(t["tx"]) for t in res.get("transactions", [])])
+                elif on_failure is not None:
+                    on_failure(res)
+
+            self.dispatcher.submit(partial(call, offset=offset, limit=limit), on_done=arrived, label=label)
+
+        return fetch
+
     def render_wallet(self):
-        me = self.api.me(self.token)
-        
         # Enhanced wallet info container
         wallet_container = tk.Frame(self.content_frame, bg=COLORS["card_bg"], relief="flat", bd=1, highlightbackground=COLORS["border"])
         wallet_container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -481,16 +995,22 @@ class SVWENApp(tk.Tk):
             tk.Label(row_frame, text=label, font=("Segoe UI", 11, "bold"), width=20, anchor="w", 
                      fg=COLORS["text_secondary"], bg=COLORS["card_bg"]).pack(side="left", padx=(0, 20))
             
-            tk.Label(row_frame, text=val, font=("Segoe UI", 11), bg=COLORS["card_bg"], 
-                     fg=COLORS["text_primary"]).pack(side="left", anchor="w")
+            value = tk.Label(row_frame, text=val, font=("Segoe UI", 11), bg=COLORS["card_bg"], 
+                             fg=COLORS["text_primary"])
+            value.pack(side="left", anchor="w")
+            return value
         
         row("Username", self.username)
-        row("Role", me.get("role", "User"))
-        row("Wallet Address", me.get("wallet_address", "Loading..."))
-        row("Balance", f"{me.get('balance')} SOL")
 
-        if me.get("role") == "tester":
-            self.render_tester_tools()
+        def fill(me):
+            row("Role", me.get("role", "User"))
+            row("Wallet Address", me.get("wallet_address", "Loading..."))
+            self.wallet_balance_label = row("Balance", f"{me.get('balance')} SOL")
+
+            if me.get("role") == "tester":
+                self.render_tester_tools()
+
+        self.dispatcher.submit(partial(self.api.me, self.token), on_done=fill, label="Loading wallet...")
 
     def render_tester_tools(self):
         tk.Label(self.content_frame, text="Admin Controls (Tester Only)", font=FONT_H2, bg=COLORS["bg"]).pack(anchor="w", pady=(30, 10))
@@ -498,6 +1018,38 @@ class SVWENApp(tk.Tk):
         btn_verify = tk.Button(self.content_frame, text="Verify Blockchain Integrity", bg="#2563eb", fg="white",
                               font=FONT_BOLD, relief="flat", pady=8, padx=15, command=self.do_verify)
         btn_verify.pack(anchor="w")
+
+        btn_metrics = tk.Button(self.content_frame, text="View Performance Metrics", bg=COLORS["text_secondary"], fg="white",
+                               font=FONT_BOLD, relief="flat", pady=8, padx=15, command=self.show_metrics)
+        btn_metrics.pack(anchor="w", pady=(10, 0))
+
+        profile_frame = tk.Frame(self.content_frame, bg=COLORS["bg"])
+        profile_frame.pack(anchor="w", fill="x", pady=(10, 0))
+
+        tk.Label(profile_frame, text="Profile calls slower than (ms):", font=FONT_BODY, bg=COLORS["bg"]).pack(side="left", padx=(0, 10))
+        self.profile_ms = ttk.Entry(profile_frame, width=10)
+        self.profile_ms.pack(side="left", padx=(0, 10))
+        self.profile_ms.insert(0, "250")
+
+        tk.Button(profile_frame, text="Start Profiling", bg=COLORS["brand"], fg="white", font=FONT_BOLD,
+                  relief="flat", padx=15, command=lambda: self.do_profiling(True)).pack(side="left", padx=(0, 10))
+        tk.Button(profile_frame, text="Stop", bg=COLORS["text_secondary"], fg="white", font=FONT_BOLD,
+                  relief="flat", padx=15, command=lambda: self.do_profiling(False)).pack(side="left")
+
+        scrub_frame = tk.Frame(self.content_frame, bg=COLORS["bg"])
+        scrub_frame.pack(anchor="w", fill="x", pady=(10, 0))
+
+        tk.Label(scrub_frame, text="Background scrub budget (KiB/s):", font=FONT_BODY, bg=COLORS["bg"]).pack(side="left", padx=(0, 10))
+        self.scrub_kib = ttk.Entry(scrub_frame, width=10)
+        self.scrub_kib.pack(side="left", padx=(0, 10))
+        self.scrub_kib.insert(0, "1024")
+
+        tk.Button(scrub_frame, text="Start Scrubber", bg=COLORS["brand"], fg="white", font=FONT_BOLD,
+                  relief="flat", padx=15, command=lambda: self.do_scrubber(True)).pack(side="left", padx=(0, 10))
+        tk.Button(scrub_frame, text="Status", bg=COLORS["text_secondary"], fg="white", font=FONT_BOLD,
+                  relief="flat", padx=15, command=self.show_scrub_status).pack(side="left", padx=(0, 10))
+        tk.Button(scrub_frame, text="Stop", bg=COLORS["text_secondary"], fg="white", font=FONT_BOLD,
+                  relief="flat", padx=15, command=lambda: self.do_scrubber(False)).pack(side="left")
         
         tk.Label(self.content_frame, text="Tamper Blockchain Block", font=("Segoe UI", 11, "bold"), bg=COLORS["bg"]).pack(anchor="w", pady=(20, 5))
         
@@ -517,10 +1069,116 @@ class SVWENApp(tk.Tk):
         btn_tamper.pack(side="left")
 
     def do_verify(self):
-        res = self.api.verify_blockchain(self.token)
-        valid = res.get("valid", False)
-        msg = f"Blockchain Integrity: {'VALID' if valid else 'CORRUPTED'}\n\n{res.get('output')}"
-        messagebox.showinfo("Verification Result", msg)
+        def done(res):
+            valid = res.get("valid", False)
+            msg = f"Blockchain Integrity: {'VALID' if valid else 'CORRUPTED'}\n\n{res.get('output')}"
+            messagebox.showinfo("Verification Result", msg)
+
+        self.dispatcher.submit(partial(self.api.verify_blockchain, self.token), on_done=done,
+                               label="Verifying chain...")
+
+    def show_metrics(self):
+        self.dispatcher.submit(partial(self.api.stats, self.token), on_done=self._show_metrics,
+                               label="Collecting metrics...")
+
+    def _show_metrics(self, res):
+        if not res.get("ok"):
+            messagebox.showerror("Error", res.get("error"))
+            return
+        stats = res["stats"]
+
+        win = tk.Toplevel(self)
+        win.title("Performance Metrics (Tester Only)")
+        win.geometry("760x520")
+        win.configure(bg=COLORS["bg"])
+
+        cols = ("Name", "Calls", "Errors", "p50 ms", "p95 ms", "p99 ms", "Total ms")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=18)
+        for col in cols:
+            tree.heading(col, text=col, anchor="w")
+            tree.column(col, width=90 if col != "Name" else 220)
+        tree.pack(fill="both", expand=True, padx=15, pady=15)
+
+        def ms(v):
+            return "inf" if v == float("inf") else f"{v * 1000:.2f}"
+
+        for name, m in stats["methods"].items():
+            h = m["latency"]
+            tree.insert("", "end", values=(f"api.{name}", m["calls"], m["errors"], ms(h["p50_seconds"]),
+                                           ms(h["p95_seconds"]), ms(h["p99_seconds"]), ms(h["sum_seconds"])))
+        for name, q in stats["queries"].items():
+            h = q["latency"]
+            tree.insert("", "end", values=(f"db.{name} ({q['statements']} stmts)", q["calls"], q["exceptions"],
+                                           ms(h["p50_seconds"]), ms(h["p95_seconds"]), ms(h["p99_seconds"]), ms(h["sum_seconds"])))
+
+        def show_text(text_res):
+            top = tk.Toplevel(win)
+            top.title("Metrics Exposition")
+            txt = tk.Text(top, font=("Consolas", 9), wrap="none")
+            txt.insert("1.0", text_res.get("text", text_res.get("error", "")))
+            txt.configure(state="disabled")
+            txt.pack(fill="both", expand=True)
+
+        def dump_text():
+            # Tied to the metrics window, not the view behind it.
+            self.dispatcher.submit(partial(self.api.stats_text, self.token), on_done=show_text, scoped=False)
+
+        tk.Button(win, text="Text Exposition", bg=COLORS["brand"], fg="white", font=FONT_BOLD,
+                  relief="flat", padx=15, pady=6, command=dump_text).pack(anchor="e", padx=15, pady=(0, 15))
+
+    def do_profiling(self, enabled):
+        try:
+            slow_ms = float(self.profile_ms.get())
+        except ValueError:
+            messagebox.showerror("Error", "Threshold must be a number of milliseconds")
+            return
+
+        def done(res):
+            if res.get("ok"):
+                p = res["profiling"]
+                state = f"ON (>= {p['slow_ms']:g} ms)" if p["enabled"] else "OFF"
+                messagebox.showinfo("Profiling", f"Profiling {state}\nCaptures: {p['captured']}\nDirectory: {p['out_dir']}")
+            else:
+                messagebox.showerror("Error", res.get("error"))
+
+        self.dispatcher.submit(partial(self.api.configure_profiling, self.token, enabled, slow_ms=slow_ms), on_done=done,
+                               scoped=False)
+
+    def do_scrubber(self, enabled):
+        try:
+            budget = float(self.scrub_kib.get()) * 1024
+        except ValueError:
+            messagebox.showerror("Error", "Budget must be a number of KiB per second")
+            return
+
+        def done(res):
+            if res.get("ok"):
+                state = "running" if res["scrubber"]["running"] else "stopped"
+                messagebox.showinfo("Integrity Scrubber", f"Scrubber {state} ({budget / 1024:g} KiB/s)")
+            else:
+                messagebox.showerror("Error", res.get("error"))
+
+        # Stopping waits for the scrub thread to notice, so it runs off the Tk thread too.
+        self.dispatcher.submit(partial(self.api.configure_scrubber, self.token, enabled, bytes_per_sec=budget),
+                               on_done=done, label="Updating scrubber...", scoped=False)
+
+    def show_scrub_status(self):
+        self.dispatcher.submit(partial(self.api.integrity_status, self.token), on_done=self._show_scrub_status)
+
+    def _show_scrub_status(self, res):
+        if not res.get("ok"):
+            messagebox.showerror("Error", res.get("error"))
+            return
+        sc = res["scrubber"]
+        last = sc["last_pass"] or {}
+        lines = [
+            f"Running: {sc['running']}   Passes: {sc['passes']}",
+            f"Last pass: {last.get('rows', 0)} rows in {last.get('seconds', 0)} s "
+            f"({last.get('rows_per_second') or 0} rows/s, busy {last.get('busy_seconds', 0)} s)",
+            f"Divergences: {sc['divergence_count']}",
+        ]
+        lines += [f"  block {d['index']}: {d['kind']} ({d['detail']})" for d in sc["divergences"][:10]]
+        messagebox.showinfo("Integrity Scrubber", "\n".join(lines))
 
     def do_tamper(self):
         idx = self.tamper_idx.get()
@@ -530,11 +1188,16 @@ class SVWENApp(tk.Tk):
             messagebox.showerror("Error", "Block Index must be a number")
             return
             
-        res = self.api.tamper_blockchain(self.token, int(idx), data)
-        if res.get("ok"):
-            messagebox.showinfo("Success", res.get("message"))
-        else:
-            messagebox.showerror("Error", res.get("error"))
+
+        def done(res):
+            if res.get("ok"):
+                messagebox.showinfo("Success", res.get("message"))
+            else:
+                messagebox.showerror("Error", res.get("error"))
+
+        # Not scoped to the view: the block is rewritten either way, so report it.
+        self.dispatcher.submit(partial(self.api.tamper_blockchain, self.token, int(idx), data), on_done=done,
+                               label="Tampering block...", scoped=False)
 
 if __name__ == "__main__":
     app = SVWENApp()
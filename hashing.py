@@ -0,0 +1,92 @@
+import hashlib
+import os
+import struct
+
+
+# Digest schemes. Every stored block carries the scheme it was hashed with,
+# so blocks written before a scheme change keep verifying under their own.
+#   0 legacy  : SHA-256 of the text "index|timestamp|data|previous_hash"
+#   1 sha256  : SHA-256 of the canonical binary encoding below
+#   2 blake2b : 32-byte BLAKE2b of the canonical binary encoding below
+SCHEME_LEGACY = 0
+SCHEME_SHA256 = 1
+SCHEME_BLAKE2B = 2
+SCHEME_NAMES = {"legacy": SCHEME_LEGACY, "sha256": SCHEME_SHA256, "blake2b": SCHEME_BLAKE2B}
+SCHEME_ENV_VAR = "SVWEN_HASH_SCHEME"
+
+# Canonical encoding, version 1 (all integers little-endian):
+#   u8 encoding version, u8 scheme, i64 index,
+#   u16 timestamp byte length, u32 data byte length,
+#   UTF-8 timestamp, UTF-8 data,
+#   32-byte previous digest (all zero for the genesis block's "0")
+ENCODING_VERSION = 1
+_HEAD = struct.Struct("<BBqHI")
+_pack_head = _HEAD.pack
+_sha256 = hashlib.sha256
+_blake2b = hashlib.blake2b
+GENESIS_PREV = b"\x00" * 32
+
+
+def scheme_from_name(name) -> int:
+    scheme = SCHEME_NAMES.get(str(name).strip().lower())
+    if scheme is None:
+        raise ValueError(f"unknown hash scheme: {name!r} (expected one of {', '.join(SCHEME_NAMES)})")
+    return scheme
+
+
+def scheme_name(scheme: int) -> str:
+    for name, value in SCHEME_NAMES.items():
+        if value == scheme:
+            return name
+    return f"unknown({scheme})"
+
+
+def default_scheme() -> int:
+    """Scheme for newly created blocks: SVWEN_HASH_SCHEME, or canonical SHA-256."""
+    return scheme_from_name(os.environ.get(SCHEME_ENV_VAR) or "sha256")
+
+
+def _prev_digest(previous_hash) -> bytes:
+    if type(previous_hash) is bytes and len(previous_hash) == 32:
+        return previous_hash
+    if previous_hash == "0":
+        return GENESIS_PREV
+    raw = bytes.fromhex(previous_hash)
+    if len(raw) != 32:
+        raise ValueError(f"previous hash is not a 32-byte digest: {previous_hash!r}")
+    return raw
+
+
+def encode_block(index, timestamp, data, previous_hash, scheme=SCHEME_SHA256) -> bytes:
+    """Canonical binary form of a block's hashed fields."""
+    ts = timestamp.encode("utf-8")
+    body = data.encode("utf-8")
+    return _pack_head(ENCODING_VERSION, scheme, index, len(ts), len(body)) + ts + body + _prev_digest(previous_hash)
+
+
+def block_digest(index, timestamp, data, previous_hash, scheme=SCHEME_LEGACY) -> bytes:
+    """
+    Raw 32-byte digest of a block; previous_hash may be hex or raw bytes.
+    Raw bytes (as Block keeps them) skip a hex decode for the canonical
+    schemes.
+    """
+    if scheme == SCHEME_SHA256:
+        # The default scheme's hot path: ASCII fields (byte lengths are the
+        # string lengths) and a raw previous digest, hashed in one call.
+        if timestamp.isascii() and data.isascii() and type(previous_hash) is bytes and len(previous_hash) == 32:
+            return _sha256(
+                _pack_head(ENCODING_VERSION, SCHEME_SHA256, index, len(timestamp), len(data))
+                + (timestamp + data).encode() + previous_hash
+            ).digest()
+        return _sha256(encode_block(index, timestamp, data, previous_hash, scheme)).digest()
+    if scheme == SCHEME_LEGACY:
+        if type(previous_hash) is bytes:
+            previous_hash = "0" if index == 0 and previous_hash == GENESIS_PREV else previous_hash.hex()
+        return _sha256(f"{index}|{timestamp}|{data}|{previous_hash}".encode("utf-8")).digest()
+    if scheme == SCHEME_BLAKE2B:
+        return _blake2b(encode_block(index, timestamp, data, previous_hash, scheme), digest_size=32).digest()
+    raise ValueError(f"unknown hash scheme: {scheme!r}")
+
+
+def block_hash(index, timestamp, data, previous_hash, scheme=SCHEME_LEGACY) -> str:
+    return block_digest(index, timestamp, data, previous_hash, scheme).hex()
@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from auth_db import (
+    ensure_idempotency_schema,
+    evict_idempotency_keys,
+    get_idempotency_key,
+    put_idempotency_key,
+)
+
+
+DEFAULT_TTL = 24 * 3600.0
+DEFAULT_CAPACITY = 4096
+MAX_KEY_LENGTH = 128
+# Expired rows are deleted after every this many stored results.
+EVICT_EVERY = 256
+
+
+class IdempotencyStore:
+    """
+    Results of requests made with a client idempotency key, per user, so a
+    retried request gets the original result back instead of running again.
+    Results live in the indexed idempotency_keys table for `ttl` seconds
+    with the most recent `capacity` cached in an LRU in front of it. Only
+    successful results are kept: a failed request moved nothing and is run
+    again when retried. The row is first written by the transfer itself, in
+    the transaction that moves the funds, so a retry can never pay twice.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, capacity=DEFAULT_CAPACITY):
+        self.ttl = float(ttl)
+        self.capacity = int(capacity)
+        self._cache = OrderedDict()
+        self._in_flight = set()
+        self._stored = 0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(key):
+        key = str(key).strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"idempotency key must be 1-{MAX_KEY_LENGTH} characters")
+        return key
+
+    def _cached(self, entry_key, now):
+        cached = self._cache.get(entry_key)
+        if cached is not None:
+            if cached[2] >= now - self.ttl:
+                self._cache.move_to_end(entry_key)
+                return cached
+            del self._cache[entry_key]
+        return None
+
+    def _remember(self, entry_key, entry):
+        self._cache[entry_key] = entry
+        self._cache.move_to_end(entry_key)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def run(self, user_id, key, fingerprint, call):
+        """
+        Run `call()` once for (`user_id`, `key`). A retry with the same
+        fingerprint returns the stored result with "replayed" set; a
+        different fingerprint or an overlapping retry is refused. `call`
+        is expected to record the key with its balance update (see
+        auth_db.transfer_balance); the full result is stored afterwards.
+        """
+        entry_key = (int(user_id), self.normalize(key))
+        now = time.time()
+        with self._lock:
+            if not self._ready:
+                ensure_idempotency_schema()
+                self._ready = True
+            found = self._cached(entry_key, now)
+            if found is None:
+                if entry_key in self._in_flight:
+                    return {"ok": False, "error": "A request with this idempotency key is still in progress"}
+                self._in_flight.add(entry_key)
+
+        try:
+            if found is None:
+                # Read outside the lock; the in-flight mark keeps this key to one caller.
+                row = get_idempotency_key(entry_key[0], entry_key[1], now - self.ttl)
+                if row is not None:
+                    found = (row[0], json.loads(row[1]), row[2])
+                    with self._lock:
+                        self._remember(entry_key, found)
+            if found is None:
+                result = call()
+                if result.get("ok"):
+                    self._store(entry_key, fingerprint, result)
+                    return result
+                conflict = result.get("idempotency_conflict")
+                if conflict is None:
+                    return result
+                # Claimed meanwhile by another process sharing the database.
+                found = (conflict[0], json.loads(conflict[1]), conflict[2])
+                with self._lock:
+                    self._remember(entry_key, found)
+            if found[0] != fingerprint:
+                return {"ok": False, "error": "Idempotency key was already used for a different request"}
+            return dict(found[1], replayed=True)
+        finally:
+            with self._lock:
+                self._in_flight.discard(entry_key)
+
+    def _store(self, entry_key, fingerprint, result):
+        created = time.time()
+        with self._lock:
+            self._remember(entry_key, (fingerprint, json.loads(json.dumps(result)), created))
+            self._stored += 1
+            evict = self._stored % EVICT_EVERY == 0
+        # The key was already recorded with the balances; this only swaps in
+        # the full result, so a failure here must not fail the request.
+        try:
+            put_idempotency_key(entry_key[0], entry_key[1], fingerprint, json.dumps(result))
+            if evict:
+                evict_idempotency_keys(created - self.ttl)
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,263 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from metrics import Histogram
+
+
+DEFAULT_MAX_PENDING = 10_000
+DEFAULT_INTERVAL_MS = 50.0
+DEFAULT_MAX_BATCH = 100
+INTERVAL_ENV_VAR = "SVWEN_SEAL_INTERVAL_MS"
+
+
+class MempoolFull(Exception):
+    pass
+
+
+class PendingTransfer:
+    """A debited transfer waiting for its block; `receipt` resolves to the send_sol-style result."""
+
+    __slots__ = ("sender_id", "sender", "receiver", "amount", "data", "tx_hash", "timestamp",
+                 "sender_balance", "receiver_balance", "priority", "nonce", "seq", "arrived", "receipt",
+                 "idempotency_key")
+
+    def __init__(self, sender_id, sender, receiver, amount, data, tx_hash, timestamp,
+                 sender_balance, receiver_balance, priority=0):
+        self.sender_id = sender_id
+        self.sender = sender
+        self.receiver = receiver
+        self.amount = amount
+        self.data = data
+        self.tx_hash = tx_hash
+        self.timestamp = timestamp
+        self.sender_balance = sender_balance
+        self.receiver_balance = receiver_balance
+        self.priority = int(priority)
+        self.nonce = None
+        self.seq = None
+        self.arrived = None
+        self.receipt = Future()
+        self.idempotency_key = None
+
+
+class Mempool:
+    """
+    Pending transfers, taken highest priority first and then in arrival
+    order. A sender's transfers are numbered with consecutive nonces and
+    always leave the pool in nonce order: only each sender's lowest
+    pending nonce sits in the heap, and the next one enters when it leaves.
+    """
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING):
+        self.max_pending = int(max_pending)
+        self._heap = []
+        self._waiting = {}  # sender -> deque of its transfers behind the one in the heap
+        self._nonces = {}  # sender -> next nonce
+        self._size = 0
+        self._oldest = None
+        self._seq = itertools.count()
+        self.cond = threading.Condition()
+
+    def __len__(self):
+        return self._size
+
+    def next_nonce(self, sender) -> int:
+        with self.cond:
+            return self._nonces.get(sender, 0)
+
+    def full(self) -> bool:
+        return self._size >= self.max_pending
+
+    def add(self, tx, nonce=None):
+        """Queue `tx`; a given `nonce` must be the sender's next one. Raises MempoolFull or ValueError."""
+        with self.cond:
+            if self._size >= self.max_pending:
+                raise MempoolFull("Mempool is full")
+            expected = self._nonces.get(tx.sender, 0)
+            if nonce is not None and int(nonce) != expected:
+                raise ValueError(f"expected nonce {expected}")
+            tx.nonce = expected
+            tx.seq = next(self._seq)
+            tx.arrived = time.monotonic()
+            self._nonces[tx.sender] = expected + 1
+            behind = self._waiting.get(tx.sender)
+            if behind is None:
+                self._waiting[tx.sender] = deque()
+                heapq.heappush(self._heap, (-tx.priority, tx.seq, tx))
+            else:
+                behind.append(tx)
+            if self._size == 0:
+                self._oldest = tx.arrived
+            self._size += 1
+            self.cond.notify_all()
+        return tx
+
+    def take(self, limit):
+        """Remove and return up to `limit` transfers in sealing order."""
+        with self.cond:
+            batch = []
+            while self._heap and len(batch) < limit:
+                _, _, tx = heapq.heappop(self._heap)
+                batch.append(tx)
+                behind = self._waiting[tx.sender]
+                if behind:
+                    following = behind.popleft()
+                    heapq.heappush(self._heap, (-following.priority, following.seq, following))
+                else:
+                    del self._waiting[tx.sender]
+            self._size -= len(batch)
+            if not self._size:
+                self._oldest = None
+            elif batch:
+                self._oldest = min(tx.arrived for _, _, tx in self._heap)
+            return batch
+
+    def oldest(self):
+        return self._oldest
+
+
+class BlockProducer:
+    """
+    Seals pending transfers with `seal(batch)`, one block each, whenever
+    `max_batch` are waiting or the oldest has waited `interval_ms`,
+    whichever comes first. `seal` must resolve every receipt in the batch.
+    Stopping seals whatever is still pending first.
+    """
+
+    def __init__(self, pool, seal):
+        self.pool = pool
+        self._seal = seal
+        self.interval_ms = DEFAULT_INTERVAL_MS
+        self.max_batch = DEFAULT_MAX_BATCH
+        self.seals = 0
+        self.sealed = 0
+        self.last_seal = None
+        self.seal_latency = Histogram()
+        self.inclusion_latency = Histogram()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool = True, interval_ms=None, max_batch=None, max_pending=None):
+        if interval_ms is not None:
+            interval_ms = float(interval_ms)
+            if interval_ms < 0:
+                raise ValueError("interval_ms must be >= 0")
+            self.interval_ms = interval_ms
+        if max_batch is not None:
+            if int(max_batch) < 1:
+                raise ValueError("max_batch must be >= 1")
+            self.max_batch = int(max_batch)
+        if max_pending is not None:
+            if int(max_pending) < 1:
+                raise ValueError("max_pending must be >= 1")
+            self.pool.max_pending = int(max_pending)
+        with self.pool.cond:
+            self.pool.cond.notify_all()
+        if enabled:
+            self.start()
+        else:
+            self.stop()
+        return self.status()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="svwen-producer", daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        self._stop.set()
+        with self.pool.cond:
+            self.pool.cond.notify_all()
+        if wait and thread is not None:
+            thread.join()
+
+    def submit(self, tx, nonce=None):
+        """Queue `tx` (see Mempool.add) and return its receipt future."""
+        self.pool.add(tx, nonce)
+        if not self.running:
+            # Stopped since the caller checked; seal here rather than strand the receipt.
+            while not tx.receipt.done() and self.seal_once():
+                pass
+        return tx.receipt
+
+    def status(self) -> dict:
+        seal, inclusion = self.seal_latency, self.inclusion_latency
+        return {
+            "running": self.running,
+            "interval_ms": self.interval_ms,
+            "max_batch": self.max_batch,
+            "max_pending": self.pool.max_pending,
+            "pending": len(self.pool),
+            "seals": self.seals,
+            "sealed": self.sealed,
+            "last_seal": dict(self.last_seal) if self.last_seal else None,
+            "seal_p50_ms": seal.quantile(0.50) * 1000.0,
+            "seal_p99_ms": seal.quantile(0.99) * 1000.0,
+            # From submission until the block holding the transfer was written.
+            "inclusion_p50_ms": inclusion.quantile(0.50) * 1000.0,
+            "inclusion_p99_ms": inclusion.quantile(0.99) * 1000.0,
+        }
+
+    def _wait_for_batch(self):
+        pool = self.pool
+        with pool.cond:
+            while not len(pool) and not self._stop.is_set():
+                pool.cond.wait(0.5)
+            while len(pool) < self.max_batch and not self._stop.is_set():
+                remaining = pool.oldest() + self.interval_ms / 1000.0 - time.monotonic()
+                if remaining <= 0:
+                    break
+                pool.cond.wait(remaining)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wait_for_batch()
+            self.seal_once()
+        while len(self.pool):
+            self.seal_once()
+
+    def seal_once(self) -> int:
+        """Seal one batch now; returns its size."""
+        batch = self.pool.take(self.max_batch)
+        if not batch:
+            return 0
+        start = time.monotonic()
+        try:
+            self._seal(batch)
+        except Exception as e:
+            for tx in batch:
+                if not tx.receipt.done():
+                    tx.receipt.set_result({"ok": False, "error": f"Sealing failed: {e}"})
+        done = time.monotonic()
+        self.seal_latency.observe(done - start)
+        for tx in batch:
+            self.inclusion_latency.observe(done - tx.arrived)
+        self.seals += 1
+        self.sealed += len(batch)
+        self.last_seal = {"transfers": len(batch), "ms": round((done - start) * 1000.0, 3)}
+        return len(batch)
+
+
+def producer_from_env(pool, seal):
+    """A producer for `pool`, started when SVWEN_SEAL_INTERVAL_MS is set."""
+    producer = BlockProducer(pool, seal)
+    interval = os.environ.get(INTERVAL_ENV_VAR, "").strip()
+    if interval:
+        producer.configure(enabled=True, interval_ms=float(interval))
+    return producer
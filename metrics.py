@@ -0,0 +1,221 @@
+import bisect
+import functools
+import threading
+import time
+
+
+# Upper bounds in seconds; anything slower lands in the +Inf bucket.
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "p50_seconds": self.quantile(0.50),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "buckets": {str(b): c for b, c in zip(LATENCY_BUCKETS + ("+Inf",), self.counts)},
+        }
+
+
+class _Series:
+    __slots__ = ("calls", "errors", "exceptions", "statements", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.exceptions = 0
+        self.statements = 0
+        self.latency = Histogram()
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters for API methods and SQL helpers.
+
+    Everything is plain ints/floats behind one lock, so recording a call
+    costs a perf_counter pair and a dict lookup.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.methods = {}
+        self.queries = {}
+        self._local = threading.local()
+
+    def _series(self, table: dict, name: str) -> _Series:
+        s = table.get(name)
+        if s is None:
+            s = table[name] = _Series()
+        return s
+
+    def observe_call(self, name: str, seconds: float, error: bool = False, exception: bool = False):
+        with self._lock:
+            s = self._series(self.methods, name)
+            s.calls += 1
+            s.latency.observe(seconds)
+            if error:
+                s.errors += 1
+            if exception:
+                s.exceptions += 1
+
+    def observe_query(self, name: str, seconds: float, exception: bool = False):
+        with self._lock:
+            s = self._series(self.queries, name)
+            s.calls += 1
+            s.latency.observe(seconds)
+            if exception:
+                s.exceptions += 1
+
+    def count_statement(self, _sql=None):
+        if not self.enabled:
+            return
+        name = getattr(self._local, "helper", None) or "other"
+        with self._lock:
+            self._series(self.queries, name).statements += 1
+
+    def reset(self):
+        with self._lock:
+            self.methods = {}
+            self.queries = {}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            methods = {
+                name: {"calls": s.calls, "errors": s.errors, "exceptions": s.exceptions, "latency": s.latency.snapshot()}
+                for name, s in sorted(self.methods.items())
+            }
+            queries = {
+                name: {
+                    "calls": s.calls,
+                    "statements": s.statements,
+                    "exceptions": s.exceptions,
+                    "seconds": round(s.latency.total, 6),
+                    "latency": s.latency.snapshot(),
+                }
+                for name, s in sorted(self.queries.items())
+            }
+        return {
+            "methods": methods,
+            "queries": queries,
+            "sql_statements_total": sum(q["statements"] for q in queries.values()),
+            "sql_seconds_total": round(sum(q["seconds"] for q in queries.values()), 6),
+        }
+
+    def render_text(self) -> str:
+        """Prometheus-style text exposition of the current snapshot."""
+        snap = self.snapshot()
+        lines = []
+
+        def hist(metric: str, label: str, h: dict):
+            cumulative = 0
+            for bound, c in h["buckets"].items():
+                cumulative += c
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{label}}} {h['sum_seconds']}")
+            lines.append(f"{metric}_count{{{label}}} {h['count']}")
+
+        lines.append("# TYPE svwen_api_calls_total counter")
+        for name, m in snap["methods"].items():
+            lines.append(f'svwen_api_calls_total{{method="{name}"}} {m["calls"]}')
+        lines.append("# TYPE svwen_api_errors_total counter")
+        for name, m in snap["methods"].items():
+            lines.append(f'svwen_api_errors_total{{method="{name}"}} {m["errors"]}')
+            lines.append(f'svwen_api_exceptions_total{{method="{name}"}} {m["exceptions"]}')
+        lines.append("# TYPE svwen_api_latency_seconds histogram")
+        for name, m in snap["methods"].items():
+            hist("svwen_api_latency_seconds", f'method="{name}"', m["latency"])
+        lines.append("# TYPE svwen_db_queries_total counter")
+        for name, q in snap["queries"].items():
+            lines.append(f'svwen_db_queries_total{{helper="{name}"}} {q["calls"]}')
+            lines.append(f'svwen_db_statements_total{{helper="{name}"}} {q["statements"]}')
+        lines.append("# TYPE svwen_db_query_seconds histogram")
+        for name, q in snap["queries"].items():
+            hist("svwen_db_query_seconds", f'helper="{name}"', q["latency"])
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def timed_method(fn):
+    """Count calls, {"ok": False} results, exceptions and latency of an API method."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not REGISTRY.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            REGISTRY.observe_call(name, time.perf_counter() - start, error=True, exception=True)
+            raise
+        failed = isinstance(result, dict) and result.get("ok") is False
+        REGISTRY.observe_call(name, time.perf_counter() - start, error=failed)
+        return result
+
+    return wrapper
+
+
+def timed_query(fn):
+    """Count calls and time spent in a database helper; statements are attributed to it."""
+    name = fn.__name__
+    local = REGISTRY._local
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not REGISTRY.enabled:
+            return fn(*args, **kwargs)
+        outer = getattr(local, "helper", None)
+        local.helper = name
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            REGISTRY.observe_query(name, time.perf_counter() - start, exception=True)
+            raise
+        finally:
+            local.helper = outer
+        REGISTRY.observe_query(name, time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+def set_enabled(enabled: bool):
+    REGISTRY.enabled = bool(enabled)
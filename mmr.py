@@ -0,0 +1,301 @@
+import argparse
+import hashlib
+import json
+import struct
+import sys
+import threading
+
+import database
+
+
+# Merkle Mountain Range over block hashes. Nodes are numbered in post-order
+# (the usual MMR positions) and stored in the mmr_nodes table; a node is
+# never rewritten once appended, so only the peaks need to be kept in memory.
+#   leaf   = SHA-256(0x00 || u64 block index || block digest)
+#   parent = SHA-256(0x01 || left || right)
+#   root   = SHA-256(0x02 || u64 leaf count || peaks, left to right)
+PROOF_VERSION = 1
+_LEAF = b"\x00"
+_NODE = b"\x01"
+_ROOT = b"\x02"
+_U64 = struct.Struct("<Q")
+WRITE_BATCH = 50_000
+
+
+def _raw(block_hash) -> bytes:
+    return block_hash if type(block_hash) is bytes else bytes.fromhex(block_hash)
+
+
+def leaf_hash(index: int, block_hash) -> bytes:
+    return hashlib.sha256(_LEAF + _U64.pack(index) + _raw(block_hash)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def bag_peaks(leaf_count: int, peaks) -> bytes:
+    return hashlib.sha256(_ROOT + _U64.pack(leaf_count) + b"".join(peaks)).digest()
+
+
+def mmr_size(leaf_count: int) -> int:
+    return 2 * leaf_count - bin(leaf_count).count("1")
+
+
+def leaf_position(index: int) -> int:
+    return mmr_size(index)
+
+
+def mountains(leaf_count: int):
+    """Yield (height, first leaf, root position) for each peak, left to right."""
+    pos = -1
+    first = 0
+    for height in range(leaf_count.bit_length() - 1, -1, -1):
+        if leaf_count >> height & 1:
+            pos += (1 << (height + 1)) - 1
+            yield height, first, pos
+            first += 1 << height
+
+
+def _leaf_count_for_size(size: int):
+    lo, hi = 0, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if mmr_size(mid) < size:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo if mmr_size(lo) == size else None
+
+
+class MountainRange:
+    """Append-only accumulator persisted in the mmr_nodes table."""
+
+    def __init__(self):
+        self.leaf_count = 0
+        self.size = 0
+        self._peaks = []  # [(height, hash)]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        mmr = cls()
+        size = database.get_mmr_size()
+        leaf_count = _leaf_count_for_size(size)
+        if leaf_count is None:
+            # An interrupted write left a partial MMR; it is rebuilt on sync.
+            database.clear_mmr()
+            return mmr
+        peaks = list(mountains(leaf_count))
+        nodes = database.get_mmr_nodes([pos for _, _, pos in peaks])
+        mmr.leaf_count = leaf_count
+        mmr.size = size
+        mmr._peaks = [(height, nodes[pos]) for height, _, pos in peaks]
+        return mmr
+
+    def root(self) -> bytes:
+        with self._lock:
+            return bag_peaks(self.leaf_count, [h for _, h in self._peaks])
+
+    def _push(self, index, block_hash, out):
+        # Appends one leaf and the parents it completes; O(log n).
+        if index != self.leaf_count:
+            raise ValueError(f"expected leaf {self.leaf_count}, got block {index}")
+        node = leaf_hash(index, block_hash)
+        height = 0
+        out.append((self.size, node))
+        self.size += 1
+        while self._peaks and self._peaks[-1][0] == height:
+            _, left = self._peaks.pop()
+            node = node_hash(left, node)
+            height += 1
+            out.append((self.size, node))
+            self.size += 1
+        self._peaks.append((height, node))
+        self.leaf_count += 1
+
+    def append(self, index, block_hash):
+        with self._lock:
+            nodes = []
+            self._push(index, block_hash, nodes)
+            database.append_mmr_nodes(nodes)
+
+    def extend(self, rows):
+        """Append (index, block hash) pairs in order, writing in batches."""
+        with self._lock:
+            nodes = []
+            for index, block_hash in rows:
+                self._push(index, block_hash, nodes)
+                if len(nodes) >= WRITE_BATCH:
+                    database.append_mmr_nodes(nodes)
+                    nodes = []
+            if nodes:
+                database.append_mmr_nodes(nodes)
+
+    def reset(self):
+        with self._lock:
+            database.clear_mmr()
+            self.leaf_count = 0
+            self.size = 0
+            self._peaks = []
+
+    def matches(self, index, block_hash) -> bool:
+        """True if leaf `index` was accumulated from `block_hash`."""
+        if index >= self.leaf_count:
+            return False
+        node = database.get_mmr_nodes([leaf_position(index)]).get(leaf_position(index))
+        return node == leaf_hash(index, block_hash)
+
+    def sync(self, height, hash_at, rows_from):
+        """
+        Bring the accumulator in line with a chain of `height` blocks.
+        `hash_at(i)` returns block i's hash and `rows_from(i)` yields
+        (index, hash) from block i on. If the stored MMR is longer than the
+        chain or its last leaf no longer matches, it is rebuilt.
+        """
+        if self.leaf_count > height or (
+            self.leaf_count and not self.matches(self.leaf_count - 1, hash_at(self.leaf_count - 1))
+        ):
+            self.reset()
+        if self.leaf_count < height:
+            self.extend(rows_from(self.leaf_count))
+
+    def proof(self, index: int, block_hash) -> dict:
+        with self._lock:
+            leaf_count = self.leaf_count
+            peaks = [h for _, h in self._peaks]
+        if not 0 <= index < leaf_count:
+            raise IndexError(index)
+        positions = []
+        peak_index = None
+        for i, (height, first, pos) in enumerate(mountains(leaf_count)):
+            if first <= index < first + (1 << height):
+                peak_index = i
+                lo = first
+                while height > 0:
+                    half = 1 << (height - 1)
+                    left, right = pos - (1 << height), pos - 1
+                    if index < lo + half:
+                        positions.append(right)
+                        pos = left
+                    else:
+                        positions.append(left)
+                        pos = right
+                        lo += half
+                    height -= 1
+                break
+        positions.reverse()
+        nodes = database.get_mmr_nodes(positions)
+        return {
+            "version": PROOF_VERSION,
+            "block_index": index,
+            "block_hash": _raw(block_hash).hex(),
+            "leaf_count": leaf_count,
+            "path": [nodes[p].hex() for p in positions],
+            "peaks": [None if i == peak_index else h.hex() for i, h in enumerate(peaks)],
+            "root": bag_peaks(leaf_count, peaks).hex(),
+        }
+
+
+def verify_proof(proof: dict, block_hash=None, root=None):
+    """
+    Check an inclusion proof without the chain. `block_hash` (hex, e.g.
+    from a receipt) and `root` (hex) default to the values carried in the
+    proof; pass trusted ones to check against them. Returns (ok, message).
+    """
+    try:
+        if proof.get("version") != PROOF_VERSION:
+            return False, "unsupported proof version"
+        if block_hash is not None and block_hash != proof["block_hash"]:
+            return False, "proof is for a different block hash"
+        index = int(proof["block_index"])
+        leaf_count = int(proof["leaf_count"])
+        node = leaf_hash(index, proof["block_hash"])
+        layout = list(mountains(leaf_count))
+        if len(proof["peaks"]) != len(layout):
+            return False, "peak count does not match leaf count"
+        for i, (height, first, _) in enumerate(layout):
+            if first <= index < first + (1 << height):
+                break
+        else:
+            return False, "block index outside the accumulator"
+        if len(proof["path"]) != height or proof["peaks"][i] is not None:
+            return False, "proof shape does not match the block's mountain"
+        local = index - first
+        for level, sibling in enumerate(proof["path"]):
+            sibling = bytes.fromhex(sibling)
+            node = node_hash(sibling, node) if local >> level & 1 else node_hash(node, sibling)
+        peaks = [node if j == i else bytes.fromhex(p) for j, p in enumerate(proof["peaks"])]
+        computed = bag_peaks(leaf_count, peaks).hex()
+    except (KeyError, TypeError, ValueError) as e:
+        return False, f"malformed proof: {e}"
+    expected = root if root is not None else proof.get("root")
+    if computed != expected:
+        return False, "root mismatch"
+    return True, f"block {index} is included in the {leaf_count}-block ledger with root {computed}"
+
+
+def find_tx_block(tx_hash: str):
+    """Index of the block holding TxHash=`tx_hash`, streaming the blocks table."""
+    needle = f"TxHash={tx_hash.strip().lower()} "
+    for row in database.iter_blocks():
+        if row[2].startswith(needle):
+            return row[0]
+    return None
+
+
+def load_synced() -> MountainRange:
+    """Accumulator caught up with the stored blocks, for use without a ledger."""
+    mmr = MountainRange.load()
+    last = database.get_last_block()
+    height = 0 if last is None else int(last[0]) + 1
+    mmr.sync(
+        height,
+        database.get_block_hash,
+        lambda start: ((row[0], row[4]) for row in database.iter_blocks(start)),
+    )
+    return mmr
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merkle Mountain Range inclusion proofs for SVWEN blocks.")
+    parser.add_argument("--db", default=None, help="database file (default: SVWEN_DB_PATH or blockchain.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("root")
+    p = sub.add_parser("prove")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--index", type=int)
+    group.add_argument("--tx", help="TxHash of a transfer")
+    p = sub.add_parser("verify", help="check a proof file; needs no database")
+    p.add_argument("proof")
+    p.add_argument("--root", help="trusted root (hex) to check against")
+    p.add_argument("--block-hash", help="block hash the proof must commit to")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        with open(args.proof, "r", encoding="utf-8") as f:
+            ok, message = verify_proof(json.load(f), args.block_hash, args.root)
+        print(("VALID: " if ok else "INVALID: ") + message)
+        return 0 if ok else 1
+
+    if args.db:
+        database.set_database_path(args.db)
+    database.init_database()
+    mmr = load_synced()
+    if args.command == "root":
+        print(json.dumps({"leaf_count": mmr.leaf_count, "root": mmr.root().hex()}))
+        return 0
+    index = args.index if args.tx is None else find_tx_block(args.tx)
+    if index is None:
+        print("error: transaction not found", file=sys.stderr)
+        return 1
+    block_hash = database.get_block_hash(index)
+    if block_hash is None or index >= mmr.leaf_count:
+        print(f"error: no block {index}", file=sys.stderr)
+        return 1
+    print(json.dumps(mmr.proof(index, block_hash), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+
+import database
+
+
+def partition_info():
+    """[(number, path, count, first, last, bytes)] for every block partition file."""
+    out = []
+    for n in database.list_partitions():
+        path = database.partition_path(n)
+        conn = sqlite3.connect(path)
+        try:
+            count, first, last = conn.execute('SELECT COUNT(*), MIN("index"), MAX("index") FROM blocks').fetchone()
+        finally:
+            conn.close()
+        out.append((n, path, count, first, last, os.path.getsize(path)))
+    return out
+
+
+def backup_partition(number: int, dest_dir: str) -> str:
+    """Copy one partition with SQLite's online backup, safe while the ledger runs."""
+    os.makedirs(dest_dir, exist_ok=True)
+    src_path = database.partition_path(number)
+    if not os.path.exists(src_path):
+        raise FileNotFoundError(src_path)
+    dest_path = os.path.join(dest_dir, os.path.basename(src_path))
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return dest_path
+
+
+def verify_partition(number: int, rehash: bool = True):
+    """
+    Check one partition on its own: indexes are contiguous, every block links
+    to the one before it (the first to the stored hash of the previous
+    partition's last block) and, with `rehash`, every hash is recomputed.
+    Returns (ok, message).
+    """
+    from blockchain import Block
+
+    size = database.partition_size()
+    path = database.partition_path(number)
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT "index", timestamp, data, previous_hash, hash, hash_scheme FROM blocks ORDER BY "index"')
+        expected = None
+        checked = 0
+        for index, timestamp, data, previous_hash, hash_value, scheme in cursor:
+            if index // size != number:
+                return False, f"block {index} does not belong in partition {number}"
+            if expected is None:
+                prev = "0" if index == 0 else database.get_block_hash(index - 1)
+                if prev is None:
+                    return False, f"block {index - 1} before partition {number} is missing"
+            elif index != expected:
+                return False, f"partition {number} has a gap at index {expected}"
+            else:
+                prev = last_hash
+            if previous_hash != prev:
+                return False, f"block {index}: previous hash mismatch"
+            if rehash and Block(index, timestamp, data, previous_hash, scheme).current_hash != hash_value:
+                return False, f"block {index}: hash mismatch"
+            last_hash = hash_value
+            expected = index + 1
+            checked += 1
+        return True, f"partition {number}: {checked} blocks verified"
+    finally:
+        conn.close()
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage range-partitioned SVWEN block storage.")
+    parser.add_argument("--db", default=None, help="database file (default: SVWEN_DB_PATH or blockchain.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("migrate", help="move the blocks table into partition files")
+    p.add_argument("--size", type=int, required=True, help="blocks per partition")
+    sub.add_parser("list")
+    p = sub.add_parser("backup")
+    p.add_argument("dest")
+    p.add_argument("--partition", type=int, action="append", help="partition number (default: all)")
+    p = sub.add_parser("verify")
+    p.add_argument("--partition", type=int, action="append", help="partition number (default: all)")
+    p.add_argument("--links-only", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.set_database_path(args.db)
+    database.init_database()
+
+    if args.command == "migrate":
+        try:
+            moved = database.partition_blocks(args.size)
+        except (ValueError, RuntimeError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        print(f"moved {moved} blocks into {len(database.list_partitions())} partitions of {args.size}")
+        return 0
+
+    if not database.partition_size():
+        print("error: blocks are not partitioned (run: partitions.py migrate --size N)", file=sys.stderr)
+        return 1
+    numbers = getattr(args, "partition", None) or database.list_partitions()
+
+    if args.command == "list":
+        print(f"partition size: {database.partition_size()}")
+        for n, path, count, first, last, size in partition_info():
+            print(f"{n:>6}  {count:>8} blocks  {first}..{last}  {size} bytes  {os.path.basename(path)}")
+    elif args.command == "backup":
+        for n in numbers:
+            dest = backup_partition(n, args.dest)
+            print(f"partition {n} -> {dest} (sha256 {_file_sha256(dest)})")
+    else:
+        failed = False
+        for n in numbers:
+            ok, message = verify_partition(n, rehash=not args.links_only)
+            print(("VALID: " if ok else "INVALID: ") + message)
+            failed = failed or not ok
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import random
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILE_DIR = os.path.join(_BASE_DIR, "profiles")
+
+
+class ProfileHook:
+    """
+    Runtime-switchable per-call profiler for ledger methods.
+
+    When enabled, a call is profiled with probability `sample_rate`; a
+    profiled call is kept when `slow_ms` is None or the call took at least
+    `slow_ms`. Each kept capture is a directory holding the cProfile stats,
+    a tracemalloc snapshot and a short text summary. Only the newest
+    `max_captures` directories are kept. Disabled, it costs one attribute read.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.slow_ms = None
+        self.out_dir = DEFAULT_PROFILE_DIR
+        self.max_captures = 50
+        self.captured = 0
+        self.write_errors = 0
+        self._busy = threading.Lock()
+
+    def configure(self, enabled: bool = True, sample_rate: float = 1.0, slow_ms=None, out_dir=None, max_captures=None):
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.slow_ms = None if slow_ms is None else float(slow_ms)
+        if out_dir:
+            self.out_dir = out_dir
+        if max_captures is not None:
+            self.max_captures = max(1, int(max_captures))
+        self.enabled = bool(enabled)
+        return self.status()
+
+    def disable(self):
+        self.enabled = False
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "out_dir": self.out_dir,
+            "max_captures": self.max_captures,
+            "captured": self.captured,
+            "write_errors": self.write_errors,
+        }
+
+    def call(self, name: str, height_fn, fn, args, kwargs):
+        if random.random() >= self.sample_rate or not self._busy.acquire(blocking=False):
+            return fn(*args, **kwargs)
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                self._finish(name, height_fn, profiler, start, started_tracing)
+                raise
+            self._finish(name, height_fn, profiler, start, started_tracing)
+            return result
+        finally:
+            self._busy.release()
+
+    def _finish(self, name: str, height_fn, profiler, start, started_tracing):
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+        if self.slow_ms is not None and elapsed_ms < self.slow_ms:
+            return
+        # A capture that cannot be written is dropped: profiling must never
+        # change the outcome of the call it profiles.
+        try:
+            self._write(name, height_fn(), elapsed_ms, profiler, snapshot)
+        except OSError as e:
+            self.write_errors += 1
+            print(f"Profile capture for {name} dropped: {e}", file=sys.stderr)
+
+    def _write(self, name: str, height, elapsed_ms: float, profiler, snapshot):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(self.out_dir, f"{stamp}_{name}_h{height}")
+        os.makedirs(path, exist_ok=True)
+        profiler.dump_stats(os.path.join(path, "profile.prof"))
+        snapshot.dump(os.path.join(path, "memory.tracemalloc"))
+
+        buf = io.StringIO()
+        buf.write(f"method={name} chain_height={height} elapsed_ms={elapsed_ms:.3f}\n\n")
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(25)
+        buf.write("\nTop allocations:\n")
+        for stat in snapshot.statistics("lineno")[:15]:
+            buf.write(f"{stat}\n")
+        with open(os.path.join(path, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+        self.captured += 1
+        self._rotate()
+
+    def _rotate(self):
+        try:
+            entries = sorted(
+                e for e in os.listdir(self.out_dir) if os.path.isdir(os.path.join(self.out_dir, e))
+            )
+        except OSError:
+            return
+        for old in entries[: max(0, len(entries) - self.max_captures)]:
+            shutil.rmtree(os.path.join(self.out_dir, old), ignore_errors=True)
+
+
+PROFILER = ProfileHook()
+
+
+def _chain_height(api) -> int:
+    chain = getattr(api, "blockchain", None)
+    return getattr(chain, "height", 0) if chain is not None else 0
+
+
+def profiled(fn):
+    """Route an API method through PROFILER while it is enabled."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if not PROFILER.enabled:
+            return fn(self, *args, **kwargs)
+        return PROFILER.call(name, lambda: _chain_height(self), fn, (self,) + args, kwargs)
+
+    return wrapper
@@ -0,0 +1,190 @@
+import os
+from array import array
+from bisect import bisect_left, insort
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import database
+from blockchain import Block
+
+
+WORKERS_ENV_VAR = "SVWEN_READ_WORKERS"
+_NO_TIME = -(1 << 62)
+
+
+def _parse_tx(data: str) -> dict:
+    out = {}
+    for p in (data or "").split("|"):
+        p = p.strip()
+        if "=" in p:
+            k, v = p.split("=", 1)
+            out[k.strip()] = v.strip()
+    return out
+
+
+class ChainReplica:
+    """
+    A read-only worker's copy of the stored chain: the blocks, the running
+    maximum of their epochs (as in Blockchain) and each wallet's transfer
+    positions. refresh() appends what the writer has stored since the last
+    call, so a wallet's history page is O(log n + page) however long the
+    chain is. Transfers stamped earlier than a block before them are also
+    kept per wallet as sorted (epoch, position) pairs; a bounded query on a
+    wallet that has any, or any transfer whose time does not parse, is O(k)
+    instead.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.time_hi = array("q")
+        self.by_wallet = {}
+        self.late_by_wallet = {}
+        self.untimed_wallets = set()
+
+    def refresh(self):
+        blocks = self.blocks
+        # A different stored block at our tail means the database was
+        # replaced or rewritten; start over.
+        if blocks and database.get_block_hash(blocks[-1].index) != blocks[-1].current_hash:
+            self.__init__()
+            blocks = self.blocks
+        start = blocks[-1].index + 1 if blocks else 0
+        for row in database.iter_blocks(start):
+            self._add(Block.from_stored(*row))
+
+    def _add(self, block):
+        position = len(self.blocks)
+        self.blocks.append(block)
+        epoch = block.epoch
+        last = self.time_hi[-1] if self.time_hi else _NO_TIME
+        late = epoch is not None and epoch < last
+        self.time_hi.append(last if epoch is None or late else epoch)
+        tx = block.transfer() if block.index != 0 else None
+        if tx is not None:
+            for wallet in {tx[0], tx[1]}:
+                self.by_wallet.setdefault(wallet, array("i")).append(position)
+                if late:
+                    insort(self.late_by_wallet.setdefault(wallet, []), (epoch, position))
+                elif epoch is None:
+                    self.untimed_wallets.add(wallet)
+
+    def _positions(self, wallet, since, until):
+        positions = self.by_wallet.get(wallet, ())
+        lo, hi = 0, len(positions)
+        if since is not None:
+            lo = bisect_left(positions, bisect_left(self.time_hi, since))
+        if until is not None:
+            hi = bisect_left(positions, bisect_left(self.time_hi, until))
+        late = self.late_by_wallet.get(wallet, ())
+        if since is None and until is None or not late and wallet not in self.untimed_wallets:
+            return positions, lo, max(lo, hi)
+        # Drop the late and untimed transfers bisection placed by position
+        # and add back the late ones whose own time is in range, keeping
+        # chain order.
+        blocks, times = self.blocks, self.time_hi
+        kept = [p for p in positions[lo:hi] if blocks[p].epoch is not None and blocks[p].epoch >= times[p]]
+        first = 0 if since is None else bisect_left(late, (since,))
+        stop = len(late) if until is None else bisect_left(late, (until,))
+        merged = sorted(kept + [p for _, p in late[first:stop]])
+        return merged, 0, len(merged)
+
+    def _entry(self, position, parsed=None):
+        block = self.blocks[position]
+        return {
+            "block_index": block.index,
+            "block_hash": block.current_hash,
+            "timestamp": block.timestamp,
+            "tx": parsed if parsed is not None else _parse_tx(block.data),
+        }
+
+    def history(self, wallet, start, stop, since=None, until=None) -> dict:
+        positions, lo, hi = self._positions(wallet, since, until)
+        first = lo + start
+        last = hi if stop is None else min(hi, lo + stop)
+        txs = [self._entry(positions[i]) for i in range(first, last)]
+        return {"total": hi - lo, "offset": start, "transactions": txs}
+
+    def search(self, wallet, query, matched_wallets, start, stop, since=None, until=None) -> dict:
+        positions, lo, hi = self._positions(wallet, since, until)
+        txs = []
+        total = 0
+        for i in range(lo, hi):
+            parsed = _parse_tx(self.blocks[positions[i]].data)
+            hay = " ".join(
+                str(parsed.get(k, "")) for k in ("TxHash", "From", "To", "Amount", "Time", "Type")
+            ).lower()
+            if query in hay or parsed.get("From") in matched_wallets or parsed.get("To") in matched_wallets:
+                if start <= total and (stop is None or total < stop):
+                    txs.append(self._entry(positions[i], parsed))
+                total += 1
+        return {"total": total, "offset": start, "transactions": txs}
+
+
+_replica = None
+
+
+def _init_worker(db_path):
+    global _replica
+    database.set_database_path(db_path)
+    database.set_read_only()
+    _replica = ChainReplica()
+
+
+def _history(*args):
+    _replica.refresh()
+    return _replica.history(*args)
+
+
+def _search(*args):
+    _replica.refresh()
+    return _replica.search(*args)
+
+
+class ReadPool:
+    """
+    Worker processes serving history and search from their own read-only
+    copy of the chain, so those loops run off the writer's GIL. The
+    database is switched to WAL first, which lets the workers read while
+    the writer appends; the writer keeps sole ownership of every write.
+    A call that fails returns None and the caller answers it itself.
+    """
+
+    def __init__(self, workers=None):
+        database.enable_wal()
+        self.workers = int(workers or max(1, (os.cpu_count() or 2) - 1))
+        if self.workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.calls = 0
+        self.failures = 0
+        # Spawned rather than forked: the writer has live threads and connections.
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=get_context("spawn"), initializer=_init_worker, initargs=(database.DB_NAME,)
+        )
+
+    def _call(self, fn, *args):
+        self.calls += 1
+        try:
+            return self._executor.submit(fn, *args).result()
+        except Exception:
+            self.failures += 1
+            return None
+
+    def history(self, wallet, start, stop, since=None, until=None):
+        return self._call(_history, wallet, start, stop, since, until)
+
+    def search(self, wallet, query, matched_wallets, start, stop, since=None, until=None):
+        return self._call(_search, wallet, query, frozenset(matched_wallets), start, stop, since, until)
+
+    def status(self) -> dict:
+        return {"workers": self.workers, "calls": self.calls, "failures": self.failures}
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def readers_from_env():
+    """A ReadPool when SVWEN_READ_WORKERS is set to a worker count; otherwise None."""
+    workers = os.environ.get(WORKERS_ENV_VAR, "").strip()
+    if not workers or int(workers) <= 0:
+        return None
+    return ReadPool(int(workers))
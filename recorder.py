@@ -0,0 +1,155 @@
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from auth_db import get_user_by_id, get_wallet_by_address
+from security import verify_token
+
+
+RECORDED_METHODS = (
+    "login",
+    "seed_info",
+    "me",
+    "send_sol",
+    "send_sol_to_username",
+    "submit_transfer",
+    "my_transactions",
+    "search_transactions",
+    "export_statement",
+    "activity_series",
+    "ledger_analytics",
+    "verify_blockchain",
+    "tamper_blockchain",
+    "integrity_status",
+    "ledger_root",
+    "inclusion_proof",
+)
+
+REDACTED = "<redacted>"
+
+RECORD_ENV_VAR = "SVWEN_RECORD_FILE"
+
+
+def _token_identity(token) -> dict:
+    # Tokens are never written out; only the username they were issued to,
+    # so a replay can log that user in against a fresh database.
+    payload = verify_token(token or "")
+    if payload is None:
+        return {"redacted": "token", "user": None}
+    return {"redacted": "token", "user": payload.get("usr")}
+
+
+def _wallet_owner(wallet_address) -> Optional[str]:
+    wallet = get_wallet_by_address((wallet_address or "").strip())
+    if wallet is None:
+        return None
+    user = get_user_by_id(wallet["user_id"])
+    return user["username"] if user else None
+
+
+class TrafficRecorder:
+    """
+    Opt-in JSONL recorder for LedgerAPI / SVWENLedger calls.
+
+    One line per top-level call: method, arguments (passwords and tokens
+    redacted), wall-clock timestamp and latency. Calls made by another
+    recorded method (send_sol_to_username -> send_sol) are not recorded twice.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def _sanitize(self, bound: dict) -> dict:
+        args = {}
+        for key, value in bound.items():
+            if key == "token":
+                args[key] = _token_identity(value)
+            elif key == "password":
+                args[key] = REDACTED
+            elif key == "receiver_wallet_address":
+                args[key] = value
+                args["_receiver_owner"] = _wallet_owner(value)
+            else:
+                args[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        return args
+
+    def write(self, entry: dict):
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def wrap(self, name: str, fn):
+        sig = inspect.signature(fn)
+
+        def recorded(*args, **kwargs):
+            depth = getattr(self._local, "depth", 0)
+            if depth:
+                return fn(*args, **kwargs)
+            self._local.depth = 1
+            ts = time.time()
+            start = time.perf_counter()
+            error = None
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = repr(e)
+                raise
+            finally:
+                latency_ms = (time.perf_counter() - start) * 1000.0
+                self._local.depth = 0
+                try:
+                    bound = sig.bind_partial(*args, **kwargs).arguments
+                except TypeError:
+                    bound = {"args": list(args), "kwargs": kwargs}
+                entry = {
+                    "ts": ts,
+                    "method": name,
+                    "args": self._sanitize(dict(bound)),
+                    "latency_ms": round(latency_ms, 3),
+                }
+                if error is not None:
+                    entry["ok"] = False
+                    entry["exception"] = error
+                elif isinstance(result, dict) and "ok" in result:
+                    entry["ok"] = bool(result.get("ok"))
+                    if not entry["ok"]:
+                        entry["error"] = result.get("error")
+                self.write(entry)
+
+        recorded.__name__ = getattr(fn, "__name__", name)
+        recorded.__doc__ = getattr(fn, "__doc__", None)
+        return recorded
+
+
+def attach_recorder(api, recorder: TrafficRecorder):
+    for name in RECORDED_METHODS:
+        fn = getattr(api, name, None)
+        if fn is None:
+            continue
+        setattr(api, name, recorder.wrap(name, fn))
+    api.recorder = recorder
+    return api
+
+
+def recorder_from_env() -> Optional[TrafficRecorder]:
+    path = os.environ.get(RECORD_ENV_VAR, "").strip()
+    if not path:
+        return None
+    return TrafficRecorder(path)
@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+
+REPLAY_PASSWORD = "replay123"
+# Sent for logins that failed when recorded, so they fail again.
+WRONG_PASSWORD = "replay-wrong-password"
+REPLAY_BALANCE = 1_000_000_000_000.0
+
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class _Discard:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def load_recording(path: str) -> list:
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entries.append(json.loads(line))
+    entries.sort(key=lambda e: e.get("ts", 0.0))
+    return entries
+
+
+def _referenced_users(entries: list) -> set:
+    users = set()
+    for e in entries:
+        args = e.get("args") or {}
+        tok = args.get("token")
+        if isinstance(tok, dict) and tok.get("user"):
+            users.add(tok["user"])
+        if e.get("method") == "login" and args.get("username"):
+            users.add(str(args["username"]).strip())
+        if args.get("_receiver_owner"):
+            users.add(args["_receiver_owner"])
+        if args.get("receiver_username"):
+            users.add(str(args["receiver_username"]).strip())
+    users.discard("")
+    return users
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def histogram(values: list) -> dict:
+    counts = {}
+    for b in HISTOGRAM_BUCKETS_MS:
+        counts[f"le_{b}ms"] = 0
+    counts["le_inf"] = 0
+    for v in values:
+        for b in HISTOGRAM_BUCKETS_MS:
+            if v <= b:
+                counts[f"le_{b}ms"] += 1
+                break
+        else:
+            counts["le_inf"] += 1
+    return counts
+
+
+class Replayer:
+    """
+    Re-issues a recorded traffic file against a fresh ledger database.
+
+    Users referenced in the recording are created (or reused from the fresh
+    seed) and logged in once up front; recorded tokens map to those sessions
+    and recorded receiver wallets map to the same owner's new wallet.
+    """
+
+    def __init__(self, api_factory, entries: list, speed=1.0, concurrency: int = 1):
+        self.entries = entries
+        self.speed = speed
+        self.concurrency = max(1, int(concurrency))
+        self.api = api_factory()
+        self.passwords = {}
+        self.tokens = {}
+        self.wallets = {}
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        from auth_db import create_user_with_wallet, get_user_by_username, get_wallet_by_user_id
+        from security import hash_password
+
+        for username, info in (self.api.seed_info().get("created") or {}).items():
+            self.passwords[username] = info.get("seed_password")
+
+        for username in sorted(_referenced_users(self.entries)):
+            user = get_user_by_username(username)
+            if user is None:
+                create_user_with_wallet(username, hash_password(REPLAY_PASSWORD), "user", REPLAY_BALANCE)
+                self.passwords[username] = REPLAY_PASSWORD
+                user = get_user_by_username(username)
+            if username not in self.passwords:
+                continue
+            res = self.api.login(username, self.passwords[username])
+            if res.get("ok"):
+                self.tokens[username] = res["token"]
+            wallet = get_wallet_by_user_id(user["id"])
+            if wallet is not None:
+                self.wallets[username] = wallet["wallet_address"]
+
+    def _call_args(self, entry: dict) -> dict:
+        args = dict(entry.get("args") or {})
+        owner = args.pop("_receiver_owner", None)
+        tok = args.get("token")
+        if isinstance(tok, dict):
+            args["token"] = self.tokens.get(tok.get("user"), "")
+        if entry.get("method") == "login":
+            if entry.get("ok"):
+                args["password"] = self.passwords.get(str(args.get("username", "")).strip(), "")
+            else:
+                args["password"] = WRONG_PASSWORD
+        if entry.get("method") == "export_statement":
+            # The recorded stream is not replayable; the statement is discarded.
+            args["out"] = _Discard()
+        if owner and owner in self.wallets:
+            args["receiver_wallet_address"] = self.wallets[owner]
+        return args
+
+    def _issue(self, entry: dict):
+        method = entry.get("method")
+        fn = getattr(self.api, method, None)
+        if fn is None:
+            return
+        args = self._call_args(entry)
+        start = time.perf_counter()
+        ok = True
+        try:
+            res = fn(**args)
+            if isinstance(res, dict) and "ok" in res:
+                ok = bool(res.get("ok"))
+        except Exception:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self.latencies.setdefault(method, []).append(elapsed_ms)
+            if not ok:
+                self.errors[method] = self.errors.get(method, 0) + 1
+
+    def run(self) -> dict:
+        self.prepare()
+        if not self.entries:
+            return self.summary(0.0)
+        t0_rec = self.entries[0].get("ts", 0.0)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = []
+            for entry in self.entries:
+                if self.speed != "max":
+                    due = (entry.get("ts", t0_rec) - t0_rec) / float(self.speed)
+                    delay = due - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(pool.submit(self._issue, entry))
+            for f in futures:
+                f.result()
+        return self.summary(time.perf_counter() - start)
+
+    def summary(self, wall_seconds: float) -> dict:
+        methods = {}
+        total = 0
+        for method, values in sorted(self.latencies.items()):
+            vals = sorted(values)
+            total += len(vals)
+            methods[method] = {
+                "count": len(vals),
+                "errors": self.errors.get(method, 0),
+                "p50_ms": round(percentile(vals, 50), 3),
+                "p95_ms": round(percentile(vals, 95), 3),
+                "p99_ms": round(percentile(vals, 99), 3),
+                "max_ms": round(vals[-1], 3) if vals else 0.0,
+                "histogram": histogram(vals),
+            }
+        return {
+            "calls": total,
+            "wall_seconds": round(wall_seconds, 3),
+            "throughput_per_s": round(total / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+            "speed": self.speed,
+            "concurrency": self.concurrency,
+            "methods": methods,
+        }
+
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"calls={summary['calls']} wall={summary['wall_seconds']}s "
+        f"throughput={summary['throughput_per_s']}/s speed={summary['speed']} "
+        f"concurrency={summary['concurrency']}",
+        f"{'method':<24}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for method, m in summary["methods"].items():
+        lines.append(
+            f"{method:<24}{m['count']:>8}{m['errors']:>8}{m['p50_ms']:>10}{m['p95_ms']:>10}{m['p99_ms']:>10}{m['max_ms']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_speed(value: str):
+    v = (value or "").strip().lower()
+    if v in ("max", "0", "inf"):
+        return "max"
+    v = v.rstrip("x")
+    speed = float(v)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded SVWEN traffic file against a fresh database.")
+    parser.add_argument("recording", help="JSONL file written by recorder.TrafficRecorder")
+    parser.add_argument("--speed", type=_parse_speed, default=1.0, help="1x, Nx (e.g. 10x) or 'max'")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--db", default=None, help="database file to create (default: temporary)")
+    parser.add_argument("--api", choices=("ledger", "core"), default="ledger")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the summary as JSON here")
+    args = parser.parse_args(argv)
+
+    entries = load_recording(args.recording)
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="svwen_replay_"), "replay.db")
+    if os.path.exists(db_path):
+        parser.error(f"{db_path} already exists; replay needs a fresh database")
+    database.set_database_path(db_path)
+
+    if args.api == "core":
+        from svwen_core import SVWENLedger as factory
+    else:
+        from ledger_api import LedgerAPI as factory
+
+    summary = Replayer(factory, entries, speed=args.speed, concurrency=args.concurrency).run()
+    summary["database"] = db_path
+    print(format_summary(summary))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import database
+from events import INTEGRITY
+from hashing import block_digest
+
+
+DEFAULT_BYTES_PER_SEC = 1 << 20
+DEFAULT_INTERVAL = 300.0
+DEFAULT_BATCH = 500
+# A batch reads at most this many seconds' worth of the byte budget, so the
+# rate holds within a batch too; rows are assumed this size until measured.
+BATCH_SECONDS = 0.1
+ROW_BYTES_ESTIMATE = 256
+MAX_REPORTED = 100
+BUDGET_ENV_VAR = "SVWEN_SCRUB_BYTES_PER_SEC"
+
+
+def _row_bytes(row) -> int:
+    return 8 + len(row[1]) + len(row[2]) + len(row[3]) + len(row[4])
+
+
+class IntegrityScrubber:
+    """
+    Background pass over the stored blocks, in index order, comparing each
+    row with its recomputed hash, with the previous row's hash and with the
+    in-memory block. Rows are read in small batches on short-lived
+    connections and the pass sleeps to stay under `bytes_per_sec`, so it
+    never holds a read lock across a foreground write. A batch is at most
+    `batch_size` rows and at most BATCH_SECONDS of the budget.
+    """
+
+    def __init__(self, blockchain):
+        self.blockchain = blockchain
+        self.bytes_per_sec = DEFAULT_BYTES_PER_SEC
+        self.interval = DEFAULT_INTERVAL
+        self.batch_size = DEFAULT_BATCH
+        self.passes = 0
+        self.last_pass = None
+        self.current = None
+        self.divergences = deque(maxlen=MAX_REPORTED)
+        self.divergence_count = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool = True, bytes_per_sec=None, interval=None, batch_size=None):
+        if bytes_per_sec is not None:
+            bytes_per_sec = float(bytes_per_sec)
+            if bytes_per_sec <= 0:
+                raise ValueError("bytes_per_sec must be positive")
+            self.bytes_per_sec = bytes_per_sec
+        if interval is not None:
+            self.interval = max(0.0, float(interval))
+        if batch_size is not None:
+            self.batch_size = max(1, int(batch_size))
+        if enabled:
+            self.start()
+        else:
+            self.stop()
+        return self.status()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._wake.set()
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="svwen-scrubber", daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        self._stop.set()
+        self._wake.set()
+        if wait and thread is not None:
+            thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "bytes_per_sec": self.bytes_per_sec,
+                "interval": self.interval,
+                "passes": self.passes,
+                "current_pass": dict(self.current) if self.current else None,
+                "last_pass": dict(self.last_pass) if self.last_pass else None,
+                # Divergences found by the running pass, or the last one.
+                "divergence_count": self.divergence_count,
+                "divergences": list(self.divergences),
+            }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.scrub_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _report(self, index, kind, detail):
+        with self._lock:
+            self.divergence_count += 1
+            self.divergences.append({"index": index, "kind": kind, "detail": detail})
+
+    def scrub_once(self) -> dict:
+        """Run one full pass now; returns the pass summary."""
+        if not self.running:
+            self._stop.clear()
+        stats = {
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "rows": 0,
+            "bytes": 0,
+            "divergences": 0,
+            "busy_seconds": 0.0,
+        }
+        with self._lock:
+            self.current = stats
+            self.divergences.clear()
+            self.divergence_count = 0
+        start = time.perf_counter()
+        chain = self.blockchain
+        node = chain.head
+        prev_hash = "0"
+        index = 0
+        while not self._stop.is_set():
+            busy = time.perf_counter()
+            row_bytes = stats["bytes"] / stats["rows"] if stats["rows"] else ROW_BYTES_ESTIMATE
+            batch = max(1, min(self.batch_size, int(self.bytes_per_sec * BATCH_SECONDS / row_bytes)))
+            rows = list(database.iter_blocks(index, index + batch - 1))
+            for row in rows:
+                row_index, timestamp, data, previous_hash, hash_value, scheme = row
+                if row_index != index:
+                    self._diverge(stats, index, "missing_row", f"next stored row is {row_index}")
+                    while node is not None and node.index < row_index:
+                        node = node.next
+                    index = row_index
+                if previous_hash != prev_hash:
+                    self._diverge(stats, row_index, "link_mismatch", "stored previous_hash does not match block before it")
+                try:
+                    recomputed = block_digest(row_index, timestamp, data, previous_hash, scheme).hex()
+                except ValueError as e:
+                    recomputed = str(e)
+                if recomputed != hash_value:
+                    self._diverge(stats, row_index, "hash_mismatch", "stored hash does not match the stored fields")
+                if node is None:
+                    self._diverge(stats, row_index, "missing_in_memory", "row is not in the in-memory chain")
+                else:
+                    differs = [
+                        name
+                        for name, stored, held in (
+                            ("timestamp", timestamp, node.timestamp),
+                            ("data", data, node.data),
+                            ("previous_hash", previous_hash, node.previous_hash),
+                            ("hash", hash_value, node.current_hash),
+                            ("hash_scheme", scheme, node.scheme),
+                        )
+                        if stored != held
+                    ]
+                    if differs:
+                        self._diverge(stats, row_index, "memory_differs", ", ".join(differs))
+                    node = node.next
+                prev_hash = hash_value
+                index = row_index + 1
+                stats["rows"] += 1
+                stats["bytes"] += _row_bytes(row)
+            stats["busy_seconds"] += time.perf_counter() - busy
+            if len(rows) < batch:
+                break
+            # Sleep until the bytes read so far fit the budget.
+            wait = start + stats["bytes"] / self.bytes_per_sec - time.perf_counter()
+            if wait > 0 and self._stop.wait(wait):
+                break
+        # Blocks appended after the last batch was read are not divergences.
+        # The chain links a new block before storing it, both under its lock,
+        # so the check is made under that lock too.
+        if node is not None and not self._stop.is_set():
+            with chain._lock:
+                missing = database.get_block_hash(node.index) is None
+            if missing:
+                self._diverge(stats, node.index, "missing_in_db", "in-memory block has no stored row")
+
+        elapsed = time.perf_counter() - start
+        stats["seconds"] = round(elapsed, 3)
+        stats["busy_seconds"] = round(stats["busy_seconds"], 3)
+        stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed else None
+        stats["bytes_per_second"] = round(stats["bytes"] / elapsed, 1) if elapsed else None
+        stats["complete"] = not self._stop.is_set()
+        with self._lock:
+            previous = self.last_pass
+            self.current = None
+            self.last_pass = stats
+            self.passes += 1
+        events = getattr(chain, "events", None)
+        if events and stats["complete"] and stats["divergences"] != (previous or {}).get("divergences", 0):
+            events.publish({"kind": INTEGRITY, "valid": stats["divergences"] == 0, "source": "scrubber",
+                            "divergences": stats["divergences"]})
+        return stats
+
+    def _diverge(self, stats, index, kind, detail):
+        stats["divergences"] += 1
+        self._report(index, kind, detail)
+
+
+def scrubber_from_env(blockchain):
+    """Start a scrubber when SVWEN_SCRUB_BYTES_PER_SEC is set; otherwise return None."""
+    budget = os.environ.get(BUDGET_ENV_VAR, "").strip()
+    if not budget:
+        return None
+    scrubber = IntegrityScrubber(blockchain)
+    scrubber.configure(enabled=True, bytes_per_sec=float(budget))
+    return scrubber
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_IMPORT_MS = 250.0
+DEFAULT_LEDGER_MS = 500.0
+DEFAULT_WINDOW_MS = 1000.0
+
+# Each probe runs in a fresh interpreter so module caches do not hide import cost.
+IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import svwen_app, frontend_gui
+ms = (time.perf_counter() - t) * 1000.0
+eager = [m for m in ("ledger_api", "svwen_core", "blockchain", "auth_db", "sqlite3") if m in sys.modules]
+print(json.dumps({"ms": ms, "eager": eager}))
+"""
+
+LEDGER_PROBE = """
+import json, time
+t = time.perf_counter()
+from ledger_api import LedgerAPI
+LedgerAPI(seed=False)
+print(json.dumps({"ms": (time.perf_counter() - t) * 1000.0}))
+"""
+
+WINDOW_PROBE = """
+import json, time
+t = time.perf_counter()
+from frontend_gui import SVWENApp
+app = SVWENApp()
+app.update()
+ms = (time.perf_counter() - t) * 1000.0
+app.destroy()
+print(json.dumps({"ms": ms}))
+"""
+
+
+def _probe(code: str, db_path: str) -> dict:
+    env = dict(os.environ)
+    env["SVWEN_DB_PATH"] = db_path
+    env.pop("SVWEN_RECORD_FILE", None)
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=_BASE_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or f"probe exited with {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _has_display() -> bool:
+    return sys.platform.startswith("win") or sys.platform == "darwin" or bool(os.environ.get("DISPLAY"))
+
+
+def check(import_ms: float, ledger_ms: float, window_ms: float, runs: int = 3) -> list:
+    """Return [(name, measured_ms, budget_ms, ok, note)] using the best of `runs` cold starts."""
+    results = []
+    workdir = tempfile.mkdtemp(prefix="svwen_startup_")
+    try:
+        best = None
+        eager = []
+        for _ in range(runs):
+            r = _probe(IMPORT_PROBE, os.path.join(workdir, "import.db"))
+            best = r["ms"] if best is None else min(best, r["ms"])
+            eager = r["eager"]
+        note = f"eagerly imported: {', '.join(eager)}" if eager else ""
+        results.append(("import svwen_app + frontend_gui", best, import_ms, best <= import_ms and not eager, note))
+
+        best = None
+        for i in range(runs):
+            r = _probe(LEDGER_PROBE, os.path.join(workdir, f"cold{i}.db"))
+            best = r["ms"] if best is None else min(best, r["ms"])
+        results.append(("LedgerAPI(seed=False) on empty db", best, ledger_ms, best <= ledger_ms, ""))
+
+        if _has_display():
+            best = None
+            for i in range(runs):
+                r = _probe(WINDOW_PROBE, os.path.join(workdir, f"window{i}.db"))
+                best = r["ms"] if best is None else min(best, r["ms"])
+            results.append(("login window painted", best, window_ms, best <= window_ms, ""))
+        else:
+            results.append(("login window painted", None, window_ms, True, "skipped: no display"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when SVWEN cold start exceeds its time budget.")
+    parser.add_argument("--import-ms", type=float, default=DEFAULT_IMPORT_MS)
+    parser.add_argument("--ledger-ms", type=float, default=DEFAULT_LEDGER_MS)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, measured, budget, ok, note in check(args.import_ms, args.ledger_ms, args.window_ms, args.runs):
+        shown = "-" if measured is None else f"{measured:.1f} ms"
+        status = "ok" if ok else "OVER BUDGET"
+        print(f"{name:<36}{shown:>12}  budget {budget:.0f} ms  {status}  {note}".rstrip())
+        failed = failed or not ok
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+
+FORMATS = ("csv", "jsonl")
+COLUMNS = ("block_index", "time", "direction", "counterparty", "amount", "type", "tx_hash", "block_hash")
+CHUNK_ROWS = 1000
+
+
+def _fields(data: str) -> dict:
+    out = {}
+    for part in (data or "").split("|"):
+        key, sep, value = part.partition("=")
+        if sep:
+            out[key.strip()] = value.strip()
+    return out
+
+
+def statement_rows(blocks, wallet, min_amount=None, max_amount=None):
+    """
+    Yield `wallet`'s transfers among `blocks` as statement rows, one at a
+    time. Amounts are compared as Decimals against the stored text; both
+    bounds are inclusive.
+    """
+    for block in blocks:
+        tx = block.transfer()
+        if tx is None or wallet not in (tx[0], tx[1]):
+            continue
+        fields = _fields(block.data)
+        try:
+            amount = Decimal(fields.get("Amount", ""))
+        except InvalidOperation:
+            continue
+        if (min_amount is not None and amount < min_amount) or (max_amount is not None and amount > max_amount):
+            continue
+        outgoing = fields.get("From") == wallet
+        yield {
+            "block_index": block.index,
+            "time": block.timestamp,
+            "direction": "out" if outgoing else "in",
+            "counterparty": fields.get("To") if outgoing else fields.get("From"),
+            "amount": fields["Amount"],
+            "type": fields.get("Type", ""),
+            "tx_hash": fields.get("TxHash", ""),
+            "block_hash": block.current_hash,
+        }
+
+
+def statement_chunks(rows, fmt="csv", chunk_rows=CHUNK_ROWS):
+    """Yield the formatted statement as text chunks of up to `chunk_rows` rows (CSV starts with a header)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    buf = io.StringIO()
+    if fmt == "csv":
+        writer = csv.DictWriter(buf, fieldnames=COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            buf.write(json.dumps(row))
+            buf.write("\n")
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def write_statement(chunks, out) -> int:
+    """Write `chunks` to the text file `out`, flushing after each; returns the characters written."""
+    written = 0
+    for chunk in chunks:
+        out.write(chunk)
+        out.flush()
+        written += len(chunk)
+    return written
+
+
+def export_statement(blocks, wallet, out, fmt="csv", min_amount=None, max_amount=None) -> dict:
+    """Stream `wallet`'s statement over `blocks` into `out`; memory stays flat however many rows there are."""
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    chars = write_statement(statement_chunks(counted(statement_rows(blocks, wallet, min_amount, max_amount)), fmt), out)
+    return {"rows": count, "chars": chars}
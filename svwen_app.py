@@ -1,7 +1,25 @@
-from frontend_gui import SVWENApp
+import sys
+
+
+def setup():
+    from ledger_api import LedgerAPI
+
+    api = LedgerAPI(seed=False)
+    created = api.setup().get("created") or {}
+    if not created:
+        print("Accounts already set up.")
+    for name, u in created.items():
+        print(f"{name}: password={u.get('seed_password')} wallet={u.get('wallet_address')}")
 
 
 def main():
+    if "--setup" in sys.argv[1:]:
+        setup()
+        return
+    # Imported here so `import svwen_app` stays cheap; the ledger itself is
+    # opened by the app on a background thread.
+    from frontend_gui import SVWENApp
+
     SVWENApp().mainloop()
 
 
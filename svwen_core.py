@@ -1,13 +1,24 @@
 import hashlib
 import io
+import json
+import time
 from contextlib import redirect_stdout
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
 from typing import Optional, Dict, Any, List
 
+from activity import DAILY, HOURLY
+from admission import AdmissionRejected, admission_from_env
+from analytics import QUERIES as ANALYTICS_QUERIES, LedgerAnalytics
 from blockchain import Blockchain
+from checkpoint import load_checkpoint, update_checkpoint
+from events import BALANCE, BLOCK, INTEGRITY
+from idempotency import IdempotencyStore
+from mempool import Mempool, MempoolFull, PendingTransfer, producer_from_env
 from auth_db import (
+    count_users,
+    ensure_auth_schema,
     ensure_seeded_accounts,
     get_user_by_id,
     get_user_by_username,
@@ -16,6 +27,12 @@ from auth_db import (
     transfer_balance,
     reverse_transfer,
 )
+from metrics import REGISTRY, timed_method
+from profiling import PROFILER, profiled
+from readers import ReadPool, readers_from_env
+from recorder import attach_recorder, recorder_from_env
+from scrubber import IntegrityScrubber, scrubber_from_env
+from statement import FORMATS as STATEMENT_FORMATS, export_statement
 from security import hash_password, issue_token, verify_password, verify_token
 
 
@@ -50,6 +67,34 @@ def _tx_hash(sender_wallet: str, receiver_wallet: str, amount_str: str, timestam
     return hashlib.sha256(payload).hexdigest()
 
 
+def _page_bounds(offset, limit):
+    """(start, stop) positions of an offset/limit page of matches; stop is None when unlimited."""
+    start = int(offset or 0)
+    if start < 0:
+        raise ValueError("offset must be >= 0")
+    if limit is None:
+        return start, None
+    limit = int(limit)
+    if limit < 0:
+        raise ValueError("limit must be >= 0")
+    return start, start + limit
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _time_bound(value):
+    """Epoch seconds (on the naive scale of block timestamps) for an int or a "%Y-%m-%d[ %H:%M:%S]" string."""
+    if value is None or isinstance(value, int) and not isinstance(value, bool):
+        return value
+    text = str(value).strip()
+    try:
+        moment = datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        moment = datetime.strptime(text, "%Y-%m-%d")
+    return (moment - _EPOCH) // timedelta(seconds=1)
+
+
 @dataclass(frozen=True)
 class Session:
     token: str
@@ -65,11 +110,29 @@ class SVWENLedger:
     - Uses SQLite for persistence (blockchain + users/wallets).
     """
 
-    def __init__(self):
+    def __init__(self, recorder=None, seed=True):
         self.blockchain = Blockchain()
         if self.blockchain.head is None:
             _capture(self.blockchain.create_genesis_block)
-        self._seed_info = self._ensure_seeded()
+        if seed:
+            self._seed_info = self._ensure_seeded()
+        else:
+            # Seeding hashes up to a dozen passwords; callers that need a fast
+            # start (the GUI) run it later through setup().
+            ensure_auth_schema()
+            self._seed_info = {}
+        self.scrubber = scrubber_from_env(self.blockchain) or IntegrityScrubber(self.blockchain)
+        self.analytics = LedgerAnalytics()
+        self.idempotency = IdempotencyStore()
+        self.admission = admission_from_env()
+        self.mempool = Mempool()
+        self.producer = producer_from_env(self.mempool, self._seal_batch)
+        self.readers = readers_from_env()
+        self._subscribers = {}  # subscription id -> owning user id
+        if recorder is None:
+            recorder = recorder_from_env()
+        if recorder is not None:
+            attach_recorder(self, recorder)
 
     # --- auth / session ---
 
@@ -88,12 +151,30 @@ class SVWENLedger:
             created["seed_password"] = plain
             return created
 
+        # A warm-start checkpoint records how many users existed once seeding
+        # finished; if they are all still there the seeding queries are skipped.
+        ckpt = load_checkpoint()
+        seeded_users = (ckpt or {}).get("seeded_users")
+        if seeded_users and count_users() >= int(seeded_users):
+            return {}
+
         created = ensure_seeded_accounts(create_user)
+        update_checkpoint(seeded_users=count_users())
         return created
 
+    @timed_method
+    def setup(self) -> dict:
+        self._seed_info = self._ensure_seeded()
+        return self.seed_info()
+
+    def needs_setup(self) -> bool:
+        return count_users() == 0
+
     def seed_info(self) -> dict:
         return {"created": self._seed_info}
 
+    @timed_method
+    @profiled
     def login(self, username: str, password: str) -> dict:
         user = get_user_by_username((username or "").strip())
         if user is None:
@@ -117,6 +198,7 @@ class SVWENLedger:
             return None
         return {"user": user, "wallet": wallet}
 
+    @timed_method
     def me(self, token: str) -> dict:
         ctx = self._require_token(token)
         if ctx is None:
@@ -134,11 +216,63 @@ class SVWENLedger:
 
     # --- ledger operations ---
 
-    def send_sol(self, token: str, receiver_wallet_address: str, amount) -> dict:
+    @timed_method
+    @profiled
+    def send_sol(self, token: str, receiver_wallet_address: str, amount, idempotency_key: Optional[str] = None) -> dict:
         ctx = self._require_token(token)
         if ctx is None:
             return {"ok": False, "error": "Unauthorized"}
+        if idempotency_key is None:
+            return self._send_sol(ctx, receiver_wallet_address, amount)
 
+        # A retry with the same key returns the first successful result
+        # instead of moving the funds again.
+        try:
+            key = IdempotencyStore.normalize(idempotency_key)
+        except ValueError:
+            return {"ok": False, "error": "Invalid idempotency key"}
+        receiver = (receiver_wallet_address or "").strip()
+        try:
+            fingerprint = f"{receiver}|{format(_amount_to_decimal(amount).normalize(), 'f')}"
+        except (InvalidOperation, ValueError):
+            return {"ok": False, "error": "Invalid amount"}
+        return self.idempotency.run(
+            ctx["user"]["id"], key, fingerprint,
+            lambda: self._send_sol(ctx, receiver, amount, idempotency=(key, fingerprint)),
+        )
+
+    def _send_sol(self, ctx, receiver_wallet_address: str, amount, idempotency=None) -> dict:
+        # With the block producer running, the transfer is debited here and
+        # sealed into a block with others; the caller waits for its receipt.
+        try:
+            with self.admission.slot(ctx["user"]["id"]):
+                if not self.producer.running:
+                    return self._transfer(ctx, receiver_wallet_address, amount, idempotency)
+                res = self._enqueue(ctx, receiver_wallet_address, amount, idempotency=idempotency)
+        except AdmissionRejected as e:
+            return {"ok": False, "error": str(e), "retry_after": e.retry_after}
+        if not res.get("ok"):
+            return res
+        return res["receipt"].result()
+
+    def _transfer(self, ctx, receiver_wallet_address: str, amount, idempotency=None) -> dict:
+        tx = self._debit(ctx, receiver_wallet_address, amount, verify=True, idempotency=idempotency)
+        if isinstance(tx, dict):
+            return tx
+
+        ok, out = _capture(self.blockchain.add_block, tx.data)
+        if not ok:
+            reverse_transfer(tx.sender_id, tx.receiver, tx.amount, tx.idempotency_key)
+            return {"ok": False, "error": "Blockchain rejected transaction"}
+        self._publish_balances(tx)
+        return self._transfer_result(tx, out)
+
+    def _debit(self, ctx, receiver_wallet_address: str, amount, verify: bool, priority: int = 0, idempotency=None):
+        """
+        Validate and move the balance; returns the PendingTransfer for its
+        block, or an error result. With `idempotency` (key, fingerprint),
+        the key is recorded in the same transaction as the balances.
+        """
         sender_user = ctx["user"]
         sender_wallet = ctx["wallet"]["wallet_address"]
 
@@ -152,38 +286,101 @@ class SVWENLedger:
 
         amount_str = format(dec.normalize(), "f")
 
-        valid, _ = _capture(self.blockchain.verify_chain)
-        if not valid:
-            return {"ok": False, "error": "Blockchain integrity check failed"}
-
-        t = transfer_balance(sender_user["id"], (receiver_wallet_address or "").strip(), float(dec))
-        if not t.get("ok"):
-            return {"ok": False, "error": t.get("error", "Transfer failed")}
+        if verify:
+            valid, _ = _capture(self.blockchain.verify_chain)
+            if not valid:
+                return {"ok": False, "error": "Blockchain integrity check failed"}
 
+        receiver = (receiver_wallet_address or "").strip()
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        txh = _tx_hash(sender_wallet, t["receiver_wallet_address"], amount_str, timestamp)
+        txh = _tx_hash(sender_wallet, receiver, amount_str, timestamp)
         data = (
-            f"TxHash={txh} | From={sender_wallet} | To={t['receiver_wallet_address']} | "
+            f"TxHash={txh} | From={sender_wallet} | To={receiver} | "
             f"Amount={amount_str} | Type=TRANSFER | Time={timestamp}"
         )
+        claim = None
+        if idempotency is not None:
+            # Replayed if the process dies before the full result is stored.
+            committed = {
+                "ok": True, "tx_hash": txh, "sender_wallet_address": sender_wallet,
+                "receiver_wallet_address": receiver, "amount": float(dec), "timestamp": timestamp,
+            }
+            now = time.time()
+            claim = (idempotency[0], idempotency[1], json.dumps(committed), now, now - self.idempotency.ttl)
+
+        t = transfer_balance(sender_user["id"], receiver, float(dec), claim)
+        if not t.get("ok"):
+            if "idempotency_conflict" in t:
+                return {"ok": False, "error": t["error"], "idempotency_conflict": t["idempotency_conflict"]}
+            return {"ok": False, "error": t.get("error", "Transfer failed")}
 
-        ok, out = _capture(self.blockchain.add_block, data)
-        if not ok:
-            reverse_transfer(sender_user["id"], t["receiver_wallet_address"], float(dec))
-            return {"ok": False, "error": "Blockchain rejected transaction"}
+        tx = PendingTransfer(
+            sender_user["id"], sender_wallet, receiver, float(dec), data, txh, timestamp,
+            t["sender_balance"], t["receiver_balance"], priority,
+        )
+        tx.idempotency_key = idempotency[0] if idempotency is not None else None
+        return tx
 
+    def _publish_balances(self, tx):
+        events = self.blockchain.events
+        if events:
+            for wallet, balance in ((tx.sender, tx.sender_balance), (tx.receiver, tx.receiver_balance)):
+                events.publish({"kind": BALANCE, "wallet": wallet, "balance": balance}, wallets=(wallet,))
+
+    @staticmethod
+    def _transfer_result(tx, out: str) -> dict:
         return {
             "ok": True,
-            "tx_hash": txh,
-            "sender_wallet_address": sender_wallet,
-            "receiver_wallet_address": t["receiver_wallet_address"],
-            "amount": float(dec),
-            "timestamp": timestamp,
+            "tx_hash": tx.tx_hash,
+            "sender_wallet_address": tx.sender,
+            "receiver_wallet_address": tx.receiver,
+            "amount": tx.amount,
+            "timestamp": tx.timestamp,
             "blockchain_output": out.strip(),
-            "sender_balance": t["sender_balance"],
+            "sender_balance": tx.sender_balance,
         }
 
-    def send_sol_to_username(self, token: str, receiver_username: str, amount) -> dict:
+    def _enqueue(self, ctx, receiver_wallet_address: str, amount, priority: int = 0, nonce=None, idempotency=None) -> dict:
+        sender = ctx["wallet"]["wallet_address"]
+        if self.mempool.full():
+            return {"ok": False, "error": "Mempool is full"}
+        if nonce is not None and nonce != self.mempool.next_nonce(sender):
+            return {"ok": False, "error": "Invalid nonce", "next_nonce": self.mempool.next_nonce(sender)}
+        tx = self._debit(ctx, receiver_wallet_address, amount, verify=False, priority=priority, idempotency=idempotency)
+        if isinstance(tx, dict):
+            return tx
+        try:
+            receipt = self.producer.submit(tx, nonce)
+        except (MempoolFull, ValueError) as e:
+            reverse_transfer(tx.sender_id, tx.receiver, tx.amount, tx.idempotency_key)
+            if isinstance(e, MempoolFull):
+                return {"ok": False, "error": "Mempool is full"}
+            return {"ok": False, "error": "Invalid nonce", "next_nonce": self.mempool.next_nonce(sender)}
+        return {"ok": True, "tx_hash": tx.tx_hash, "nonce": tx.nonce, "receipt": receipt}
+
+    def _seal_batch(self, batch):
+        # One integrity check and one write for the whole batch.
+        blocks, out = [], ""
+        valid, _ = _capture(self.blockchain.verify_chain)
+        if valid:
+            blocks, out = _capture(self.blockchain.add_blocks, [tx.data for tx in batch])
+        if not blocks:
+            error = "Blockchain rejected transaction" if valid else "Blockchain integrity check failed"
+            for tx in batch:
+                reverse_transfer(tx.sender_id, tx.receiver, tx.amount, tx.idempotency_key)
+                tx.receipt.set_result({"ok": False, "error": error})
+            return
+        for tx, block in zip(batch, blocks):
+            self._publish_balances(tx)
+            result = self._transfer_result(tx, out)
+            result.update(block_index=block.index, block_hash=block.current_hash, nonce=tx.nonce)
+            tx.receipt.set_result(result)
+
+    @timed_method
+    @profiled
+    def send_sol_to_username(
+        self, token: str, receiver_username: str, amount, idempotency_key: Optional[str] = None
+    ) -> dict:
         ctx = self._require_token(token)
         if ctx is None:
             return {"ok": False, "error": "Unauthorized"}
@@ -196,45 +393,136 @@ class SVWENLedger:
         receiver_wallet = get_wallet_by_user_id(receiver_user["id"])
         if receiver_wallet is None:
             return {"ok": False, "error": "Receiver wallet not found"}
-        res = self.send_sol(token, receiver_wallet["wallet_address"], amount)
+        res = self.send_sol(token, receiver_wallet["wallet_address"], amount, idempotency_key=idempotency_key)
         if res.get("ok"):
             res["receiver_username"] = ru
         return res
 
-    def my_transactions(self, token: str) -> dict:
+    @timed_method
+    @profiled
+    def submit_transfer(
+        self, token: str, receiver_wallet_address: str, amount, priority: int = 0, nonce: Optional[int] = None
+    ) -> dict:
+        """
+        Queue a transfer for the block producer and return at once. The
+        result's "receipt" is a Future resolving to the send_sol result plus
+        block_index, block_hash and nonce once the transfer's block is written.
+        """
         ctx = self._require_token(token)
         if ctx is None:
             return {"ok": False, "error": "Unauthorized"}
+        if not self.producer.running:
+            return {"ok": False, "error": "Block producer is not running"}
+        try:
+            priority = int(priority)
+            nonce = None if nonce is None else int(nonce)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid priority/nonce"}
+        try:
+            with self.admission.slot(ctx["user"]["id"]):
+                return self._enqueue(ctx, (receiver_wallet_address or "").strip(), amount, priority, nonce)
+        except AdmissionRejected as e:
+            return {"ok": False, "error": str(e), "retry_after": e.retry_after}
+
+    @timed_method
+    @profiled
+    def my_transactions(
+        self, token: str, offset: int = 0, limit: Optional[int] = None, since=None, until=None
+    ) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        try:
+            start, stop = _page_bounds(offset, limit)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid offset/limit"}
+        try:
+            since, until = _time_bound(since), _time_bound(until)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid since/until"}
         wallet = ctx["wallet"]["wallet_address"]
+        if self.readers is not None:
+            page = self.readers.history(wallet, start, stop, since, until)
+            if page is not None:
+                return {"ok": True, "wallet_address": wallet, **page}
         txs = []
-        cur = self.blockchain.head
-        while cur is not None:
+        total = 0
+        for cur in self.blockchain.blocks_between(since, until):
             if cur.index != 0:
                 parsed = _parse_kv_pipe(cur.data)
                 if parsed.get("From") == wallet or parsed.get("To") == wallet:
-                    txs.append(
-                        {
-                            "block_index": cur.index,
-                            "block_hash": cur.current_hash,
-                            "timestamp": cur.timestamp,
-                            "tx": parsed,
-                        }
-                    )
-            cur = cur.next
-        return {"ok": True, "wallet_address": wallet, "transactions": txs}
-
-    def search_transactions(self, token: str, query: str) -> dict:
+                    # Only the requested page is materialised; the rest is counted.
+                    if start <= total and (stop is None or total < stop):
+                        txs.append(
+                            {
+                                "block_index": cur.index,
+                                "block_hash": cur.current_hash,
+                                "timestamp": cur.timestamp,
+                                "tx": parsed,
+                            }
+                        )
+                    total += 1
+        return {"ok": True, "wallet_address": wallet, "total": total, "offset": start, "transactions": txs}
+
+    @timed_method
+    def export_statement(
+        self, token: str, out, fmt: str = "csv", since=None, until=None, min_amount=None, max_amount=None
+    ) -> dict:
+        """
+        Write the caller's transfers to the writable text stream `out` as a
+        CSV or JSONL statement, streamed in chunks. The caller opens (and
+        closes) the destination; the ledger never picks a file itself.
+        """
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        fmt = (fmt or "csv").strip().lower()
+        if fmt not in STATEMENT_FORMATS:
+            return {"ok": False, "error": f"Format must be one of: {', '.join(STATEMENT_FORMATS)}"}
+        try:
+            since, until = _time_bound(since), _time_bound(until)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid since/until"}
+        try:
+            lo = None if min_amount is None else _amount_to_decimal(min_amount)
+            hi = None if max_amount is None else _amount_to_decimal(max_amount)
+        except (InvalidOperation, ValueError):
+            return {"ok": False, "error": "Invalid amount filter"}
+        wallet = ctx["wallet"]["wallet_address"]
+        try:
+            written = export_statement(self.blockchain.blocks_between(since, until), wallet, out, fmt, lo, hi)
+        except OSError as e:
+            return {"ok": False, "error": f"Could not write statement: {e}"}
+        return {"ok": True, "wallet_address": wallet, "format": fmt, **written}
+
+    @timed_method
+    @profiled
+    def search_transactions(
+        self, token: str, query: str, offset: int = 0, limit: Optional[int] = None, since=None, until=None
+    ) -> dict:
         ctx = self._require_token(token)
         if ctx is None:
             return {"ok": False, "error": "Unauthorized"}
         q = (query or "").strip().lower()
         if not q:
             return {"ok": False, "error": "Query cannot be empty"}
+        try:
+            start, stop = _page_bounds(offset, limit)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid offset/limit"}
+        try:
+            since, until = _time_bound(since), _time_bound(until)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid since/until"}
         wallet = ctx["wallet"]["wallet_address"]
         matched_wallets = set(find_wallet_addresses_by_username_query(q))
+        if self.readers is not None:
+            page = self.readers.search(wallet, q, matched_wallets, start, stop, since, until)
+            if page is not None:
+                return {"ok": True, "query": query, **page}
         txs = []
-        cur = self.blockchain.head
-        while cur is not None:
+        total = 0
+        for cur in self.blockchain.blocks_between(since, until):
             if cur.index != 0:
                 parsed = _parse_kv_pipe(cur.data)
                 if parsed.get("From") == wallet or parsed.get("To") == wallet:
@@ -249,28 +537,80 @@ class SVWENLedger:
                         ]
                     ).lower()
                     if q in hay or parsed.get("From") in matched_wallets or parsed.get("To") in matched_wallets:
-                        txs.append(
-                            {
-                                "block_index": cur.index,
-                                "block_hash": cur.current_hash,
-                                "timestamp": cur.timestamp,
-                                "tx": parsed,
-                            }
-                        )
-            cur = cur.next
-        return {"ok": True, "query": query, "transactions": txs}
+                        if start <= total and (stop is None or total < stop):
+                            txs.append(
+                                {
+                                    "block_index": cur.index,
+                                    "block_hash": cur.current_hash,
+                                    "timestamp": cur.timestamp,
+                                    "tx": parsed,
+                                }
+                            )
+                        total += 1
+        return {"ok": True, "query": query, "total": total, "offset": start, "transactions": txs}
 
     # --- tester tools ---
 
+    @timed_method
+    @profiled
+    def activity_series(self, token: str, count: int = 7, granularity: str = "daily") -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if granularity not in (HOURLY, DAILY):
+            return {"ok": False, "error": "Granularity must be 'hourly' or 'daily'"}
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid count"}
+        if not 1 <= count <= 366:
+            return {"ok": False, "error": "Count must be between 1 and 366"}
+        wallet = ctx["wallet"]["wallet_address"]
+        series = self.blockchain.activity.series(wallet, count, granularity)
+        return {"ok": True, "wallet_address": wallet, "granularity": granularity, "series": series}
+
+    @timed_method
+    def subscribe(self, token: str, callback, kinds=None) -> dict:
+        """
+        Call `callback(event)` for new blocks and balance changes touching
+        the caller's wallet and for integrity-status changes. It runs on the
+        thread that made the change.
+        """
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if kinds is not None and not set(kinds) <= {BLOCK, BALANCE, INTEGRITY}:
+            return {"ok": False, "error": "Unknown event kind"}
+        wallet = ctx["wallet"]["wallet_address"]
+        sub_id = self.blockchain.events.subscribe(callback, wallets=(wallet,), kinds=kinds)
+        self._subscribers[sub_id] = ctx["user"]["id"]
+        return {"ok": True, "subscription": sub_id, "wallet_address": wallet}
+
+    @timed_method
+    def unsubscribe(self, token: str, subscription: int) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        # Another user's subscription looks exactly like one that does not exist.
+        if self._subscribers.get(subscription) != ctx["user"]["id"]:
+            return {"ok": False, "error": "Unknown subscription"}
+        self._subscribers.pop(subscription, None)
+        if not self.blockchain.events.unsubscribe(subscription):
+            return {"ok": False, "error": "Unknown subscription"}
+        return {"ok": True}
+
+    @timed_method
+    @profiled
     def verify_blockchain(self, token: str) -> dict:
         ctx = self._require_token(token)
         if ctx is None:
             return {"ok": False, "error": "Unauthorized"}
         if ctx["user"]["role"] != "tester":
             return {"ok": False, "error": "Forbidden"}
-        valid, out = _capture(self.blockchain.verify_chain)
+        valid, out = _capture(self.blockchain.verify_chain, full=True)
         return {"ok": True, "valid": bool(valid), "output": out.strip()}
 
+    @timed_method
     def tamper_blockchain(self, token: str, index: int, new_data: str) -> dict:
         ctx = self._require_token(token)
         if ctx is None:
@@ -291,15 +631,185 @@ class SVWENLedger:
             return {"ok": False, "error": "Block not found"}
         block.data = nd
         self.blockchain.is_valid = False
+        self.blockchain.verified_height = min(self.blockchain.verified_height, idx)
         return {"ok": True, "message": f"Block {idx} tampered. Run verify to see effect."}
 
+    @timed_method
     def integrity_status(self, token: str) -> dict:
         ctx = self._require_token(token)
         if ctx is None:
             return {"ok": False, "error": "Unauthorized"}
         if ctx["user"]["role"] != "tester":
             return {"ok": False, "error": "Forbidden"}
-        return {"ok": True, "is_valid": bool(self.blockchain.is_valid)}
+        return {"ok": True, "is_valid": bool(self.blockchain.is_valid), "scrubber": self.scrubber.status()}
+
+    @timed_method
+    def configure_scrubber(self, token: str, enabled: bool, bytes_per_sec=None, interval=None) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        try:
+            status = self.scrubber.configure(enabled=enabled, bytes_per_sec=bytes_per_sec, interval=interval)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid scrubber settings"}
+        return {"ok": True, "scrubber": status}
+
+    @timed_method
+    def admission_status(self, token: str) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        return {"ok": True, "admission": self.admission.status()}
+
+    @timed_method
+    def configure_admission(
+        self, token: str, rate=None, burst=None, max_concurrent=None, max_queue=None, queue_timeout=None
+    ) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        try:
+            status = self.admission.configure(
+                rate=rate, burst=burst, max_concurrent=max_concurrent, max_queue=max_queue, queue_timeout=queue_timeout
+            )
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid admission settings"}
+        return {"ok": True, "admission": status}
+
+    @timed_method
+    def mempool_status(self, token: str) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        return {"ok": True, "producer": self.producer.status()}
+
+    @timed_method
+    def configure_mempool(self, token: str, enabled: bool, interval_ms=None, max_batch=None, max_pending=None) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        try:
+            status = self.producer.configure(
+                enabled=enabled, interval_ms=interval_ms, max_batch=max_batch, max_pending=max_pending
+            )
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid mempool settings"}
+        return {"ok": True, "producer": status}
+
+    @timed_method
+    def configure_readers(self, token: str, workers: int) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        try:
+            workers = int(workers)
+            if workers < 0:
+                raise ValueError(workers)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid worker count"}
+        if self.readers is not None:
+            self.readers.close()
+            self.readers = None
+        if workers:
+            self.readers = ReadPool(workers)
+        return {"ok": True, "readers": self.readers.status() if self.readers else None}
+
+    @timed_method
+    def ledger_root(self, token: str) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        mmr = self.blockchain.mmr
+        return {"ok": True, "leaf_count": mmr.leaf_count, "root": mmr.root().hex()}
+
+    @timed_method
+    @profiled
+    def inclusion_proof(self, token: str, block_index=None, tx_hash: str = None) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if tx_hash is not None and not isinstance(tx_hash, str):
+            return {"ok": False, "error": "Invalid tx_hash"}
+        if tx_hash:
+            block = self.blockchain.get_block_by_tx_hash(tx_hash.strip().lower())
+            if block is None:
+                return {"ok": False, "error": "Transaction not found"}
+        else:
+            try:
+                block = self.blockchain.get_block_by_index(int(block_index))
+            except (TypeError, ValueError):
+                return {"ok": False, "error": "Invalid index"}
+            if block is None:
+                return {"ok": False, "error": "Block not found"}
+        try:
+            proof = self.blockchain.mmr.proof(block.index, block.current_hash)
+        except IndexError:
+            return {"ok": False, "error": "Block not yet accumulated"}
+        return {"ok": True, "proof": proof}
+
+    @timed_method
+    @profiled
+    def ledger_analytics(self, token: str, query: str, wallet=None, limit=None, top=None, since=None, until=None) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        if query not in ANALYTICS_QUERIES:
+            return {"ok": False, "error": f"Unknown query; expected one of {', '.join(ANALYTICS_QUERIES)}"}
+        params = {"since": since, "until": until}
+        if query == "top_counterparties":
+            params.update(wallet=wallet, limit=limit)
+        elif query == "largest_transfers":
+            params["limit"] = limit
+        elif query == "concentration":
+            params["top"] = top
+        try:
+            self.analytics.sync(self.blockchain)
+            result = self.analytics.query(query, **params)
+        except (TypeError, ValueError) as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, "query": query, "transfers": len(self.analytics), "result": result}
+
+    def stats(self, token: str) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        return {"ok": True, "stats": REGISTRY.snapshot()}
+
+    def stats_text(self, token: str) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        return {"ok": True, "text": REGISTRY.render_text()}
+
+    def configure_profiling(self, token: str, enabled: bool, sample_rate: float = 1.0, slow_ms=None) -> dict:
+        ctx = self._require_token(token)
+        if ctx is None:
+            return {"ok": False, "error": "Unauthorized"}
+        if ctx["user"]["role"] != "tester":
+            return {"ok": False, "error": "Forbidden"}
+        try:
+            status = PROFILER.configure(enabled=enabled, sample_rate=sample_rate, slow_ms=slow_ms)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "Invalid profiling settings"}
+        return {"ok": True, "profiling": status}
 
 
 def activity_series_from_transactions(wallet_address: str, transactions: List[dict], limit: int = 18) -> List[float]: